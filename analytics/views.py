@@ -11,6 +11,7 @@ from django.template.loader import get_template
 from xhtml2pdf import pisa
 from io import BytesIO
 from appointments.models import Appointment
+from predictions import drift
 
 
 User = get_user_model()
@@ -54,6 +55,7 @@ def admin_analytics_dashboard(request):
         'appointments_by_status': appointments_by_status,
         'top_doctors': top_doctors,
         'top_patients': top_patients,
+        'drift': drift.report(),
     }
 
     return render(request, 'analytics/admin_dashboard.html', context)
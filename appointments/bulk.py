@@ -0,0 +1,90 @@
+# appointments/bulk.py
+"""
+Bulk doctor actions: approve / complete / cancel many appointments at once.
+
+One SELECT reads (id, status, slot) for the requested ids that belong to the
+doctor; the ids whose current status allows the action then change in a
+single UPDATE, which re-checks the status so a concurrent change isn't
+overwritten. Rejecting slot bookings runs that UPDATE once per slot and
+gives back exactly the seats each one released, with one more UPDATE over
+the affected slots. Every requested id gets a result.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+
+from appointments.models import Appointment, TimeSlot
+from appointments.scheduling import LIVE_STATUSES, RELEASING_STATUSES
+
+# action -> (statuses it may be applied to, resulting status)
+TRANSITIONS = {
+    'approve': (('Pending',), 'Approved'),
+    'complete': (('Approved',), 'Completed'),
+    'cancel': (LIVE_STATUSES, 'Rejected'),  # doctor-initiated cancellation shows as Rejected
+}
+
+
+def apply(doctor, ids, action):
+    """
+    Returns ``{"action", "status", "updated", "results": [{"id", "result", ...}]}``
+    where result is "updated", "not_found" (missing or another doctor's) or
+    "not_allowed" (with the appointment's current status).
+    """
+    allowed_from, target = TRANSITIONS[action]
+    ids = list(dict.fromkeys(ids))  # de-duplicate, keep order
+
+    with transaction.atomic():
+        # select_for_update keeps the statuses read here stable until commit
+        # where the backend supports row locks (a no-op on SQLite)
+        current = {
+            pk: (status, slot_id)
+            for pk, status, slot_id in Appointment.objects.select_for_update()
+            .filter(doctor=doctor, id__in=ids).values_list('id', 'status', 'slot_id')
+        }
+        eligible = [pk for pk in ids if pk in current and current[pk][0] in allowed_from]
+        if target in RELEASING_STATUSES:
+            # One conditional UPDATE per slot, so each slot gives back exactly
+            # as many seats as this request released, never one that a
+            # concurrent cancel already gave back
+            groups = defaultdict(list)
+            for pk in eligible:
+                groups[current[pk][1]].append(pk)
+            done, seats = [], {}
+            for slot_id, group in groups.items():
+                n = _transition(group, allowed_from, target, done)
+                if n and slot_id is not None:
+                    seats[slot_id] = n
+            if seats:
+                TimeSlot.objects.filter(pk__in=seats, booked__gt=0).update(
+                    booked=F('booked') - Case(*(When(pk=slot_id, then=Value(n)) for slot_id, n in seats.items()))
+                )
+        else:
+            done = []
+            _transition(eligible, allowed_from, target, done)
+
+    done = set(done)
+    results = []
+    for pk in ids:
+        if pk in done:
+            results.append({'id': pk, 'result': 'updated'})
+        elif pk not in current:
+            results.append({'id': pk, 'result': 'not_found'})
+        else:
+            results.append({'id': pk, 'result': 'not_allowed', 'status': current[pk][0]})
+    return {'action': action, 'status': target, 'updated': len(done), 'results': results}
+
+
+def _transition(ids, allowed_from, target, done):
+    """Conditionally move ``ids`` to ``target``; extends ``done`` with the ids that moved, returns how many."""
+    if not ids:
+        return 0
+    updated = Appointment.objects.filter(id__in=ids, status__in=allowed_from).update(status=target)
+    if updated == len(ids):
+        done.extend(ids)
+    elif updated:
+        # something changed under us: report the rows now at the target status
+        # (only for the per-id results; seat accounting uses ``updated``)
+        moved = set(Appointment.objects.filter(id__in=ids, status=target).values_list('id', flat=True))
+        done.extend(pk for pk in ids if pk in moved)
+    return updated
@@ -0,0 +1,50 @@
+# appointments/chat.py
+"""Appointment chat helpers shared by the page, the JSON endpoints and the WebSocket."""
+from django.db import transaction
+from django.utils import dateformat, timezone
+
+from appointments.models import AppointmentMessage
+from appointments.pubsub import broker
+
+MAX_MESSAGE_LENGTH = 5000
+SYNC_BATCH = 200  # most messages returned by one resync
+CHAT_STATUS = "Approved"  # the chat is open only while the appointment is approved
+
+
+def is_participant(user, appointment):
+    return user.is_authenticated and user.pk in (appointment.doctor_id, appointment.patient_id)
+
+
+def can_send(user, appointment):
+    """Only the doctor and patient of an approved appointment may write to its chat."""
+    return appointment.status == CHAT_STATUS and is_participant(user, appointment)
+
+
+def serialize(msg, sender_name=None):
+    return {
+        "id": msg.id,
+        "sender_id": msg.sender_id,
+        "sender": sender_name or msg.sender.username,
+        "message": msg.message,
+        "time": dateformat.format(timezone.localtime(msg.timestamp), "M d, H:i"),
+    }
+
+
+def save_message(appointment, user, text):
+    """Persist one message and fan it out to live subscribers once committed."""
+    msg = AppointmentMessage.objects.create(
+        appointment=appointment, sender=user, message=text[:MAX_MESSAGE_LENGTH]
+    )
+    payload = serialize(msg, sender_name=user.username)
+    transaction.on_commit(lambda: broker.publish(appointment.id, payload))
+    return payload
+
+
+def messages_after(appointment_id, after_id=0, limit=SYNC_BATCH):
+    """Messages with id > after_id, oldest first (served by the (appointment, id) index)."""
+    qs = (
+        AppointmentMessage.objects.filter(appointment_id=appointment_id, id__gt=after_id)
+        .select_related("sender")
+        .order_by("id")[:limit]
+    )
+    return [serialize(m) for m in qs]
@@ -0,0 +1,120 @@
+# appointments/dashboard.py
+"""
+Appointment lists for the doctor and patient dashboards.
+
+Every query is bounded by the page size, not by how much history the user
+has:
+
+* "Upcoming & open" (Pending / Approved, soonest first) and "History"
+  (Completed / Rejected / Cancelled, newest first) are keyset-paginated on
+  (date, start_time, id), so slot bookings list in time order within a day.
+  The cursor is the last row shown, so page N costs the same as page 1, and
+  rows added meanwhile don't shift what comes next.
+* Both read ordered ranges of the (doctor|patient, status, date, start_time)
+  indexes, and the per-status counts come from one grouped query on the
+  same index.
+"""
+from datetime import date, datetime
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db.models import Count, Q
+
+from appointments.models import Appointment
+from appointments.scheduling import LIVE_STATUSES
+
+OPEN_STATUSES = LIVE_STATUSES
+CLOSED_STATUSES = ('Completed', 'Rejected', 'Cancelled')
+CURSOR_PARAMS = ('open_after', 'history_after')
+
+
+def encode_cursor(appointment):
+    return f"{appointment.date.isoformat()}_{appointment.start_time:%H%M%S}_{appointment.id}"
+
+
+def decode_cursor(value):
+    """'2025-11-19_093000_42' -> (date(2025, 11, 19), time(9, 30), 42); None if missing or malformed."""
+    try:
+        day, start, pk = (value or "").split("_")
+        return date.fromisoformat(day), datetime.strptime(start, "%H%M%S").time(), int(pk)
+    except ValueError:
+        return None
+
+
+def keyset_page(queryset, statuses, after=None, size=20, descending=False):
+    """
+    One page of ``queryset`` rows with a status in ``statuses``, ordered by
+    (date, start_time, id) and starting after the ``after`` cursor.
+
+    ``status IN (...)`` can't be read back in date order from the index, so
+    a single query would sort the user's whole history. Instead each status
+    is one ordered index range with LIMIT page + 1, and the few rows are
+    merged here.
+    """
+    cursor = decode_cursor(after)
+    if cursor:
+        day, start, pk = cursor
+        # The redundant date bound is what lets the index seek to the cursor;
+        # the OR alone only narrows rows after scanning from the start of the range
+        if descending:
+            queryset = queryset.filter(date__lte=day).filter(
+                Q(date__lt=day) | Q(date=day, start_time__lt=start) | Q(date=day, start_time=start, id__lt=pk)
+            )
+        else:
+            queryset = queryset.filter(date__gte=day).filter(
+                Q(date__gt=day) | Q(date=day, start_time__gt=start) | Q(date=day, start_time=start, id__gt=pk)
+            )
+    order = ('-date', '-start_time', '-id') if descending else ('date', 'start_time', 'id')
+
+    rows = []
+    for status in statuses:
+        rows.extend(queryset.filter(status=status).order_by(*order)[:size + 1])
+    rows.sort(key=lambda a: (a.date, a.start_time, a.id), reverse=descending)
+    rows = rows[:size + 1]  # one extra row says whether there is a next page
+    return {
+        'items': rows[:size],
+        'next': encode_cursor(rows[size - 1]) if len(rows) > size else None,
+        'is_first': cursor is None,
+    }
+
+
+def status_counts(**owner):
+    """{'Pending': 3, 'Approved': 1, ..., 'total': 4} from one GROUP BY query."""
+    counts = dict(
+        Appointment.objects.filter(**owner)
+        .order_by()
+        .values_list('status')
+        .annotate(n=Count('id'))
+    )
+    counts['total'] = sum(counts.values())
+    return counts
+
+
+def dashboard_context(request, role):
+    """Context for doctor/dashboard.html (role='doctor') or patient/dashboard.html (role='patient')."""
+    owner = {role: request.user}
+    counterpart = 'patient' if role == 'doctor' else 'doctor'
+    base = Appointment.objects.filter(**owner).select_related(counterpart, 'slot')
+    size = getattr(settings, 'DASHBOARD_PAGE_SIZE', 20)
+
+    def section(title, key, page, empty):
+        # each section pages on its own; keep the other one's cursor in the links
+        others = {k: v for k, v in request.GET.items() if k in CURSOR_PARAMS and k != key}
+        return {
+            'title': title,
+            'page': page,
+            'empty': empty,
+            'next_query': urlencode({**others, key: page['next']}) if page['next'] else '',
+            'reset_query': urlencode(others),
+        }
+
+    upcoming = keyset_page(base, OPEN_STATUSES, request.GET.get('open_after'), size)
+    history = keyset_page(base, CLOSED_STATUSES, request.GET.get('history_after'), size, descending=True)
+    return {
+        'sections': [
+            section('Upcoming & open', 'open_after', upcoming, 'No pending or approved appointments.'),
+            section('History', 'history_after', history, 'No completed, rejected or cancelled appointments.'),
+        ],
+        'status_counts': status_counts(**owner),
+        'page_size': size,
+    }
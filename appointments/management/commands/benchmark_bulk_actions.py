@@ -0,0 +1,94 @@
+# appointments/management/commands/benchmark_bulk_actions.py
+"""
+Compare approving/completing N appointments one POST at a time (the
+manage_appointment path) with a single bulk POST.
+
+    python manage.py benchmark_bulk_actions --sizes 10,50,200 --repeat 3
+
+Runs in-process through the Django test client against a throwaway on-disk
+test database and reports wall time and SQL statements for each path.
+"""
+import json
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from appointments.models import Appointment
+
+
+class Command(BaseCommand):
+    help = "Benchmark bulk appointment actions against the per-appointment POST path."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="10,50,200", help="Comma-separated batch sizes.")
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per size (median is reported).")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(n) for n in options["sizes"].split(",") if n.strip()]
+        except ValueError:
+            raise CommandError("--sizes must be a comma-separated list of integers.")
+
+        old_db_name = connection.settings_dict["NAME"]
+        test_settings = connection.settings_dict.setdefault("TEST", {})
+        old_test_name = test_settings.get("NAME")
+        if connection.vendor == "sqlite":
+            test_settings["NAME"] = str(old_db_name) + ".bulkbench"
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(ALLOWED_HOSTS=["testserver"], APPOINTMENT_BULK_MAX=max(sizes)):
+                self._run(sizes, max(1, options["repeat"]))
+        finally:
+            connection.creation.destroy_test_db(old_db_name, verbosity=0)
+            test_settings["NAME"] = old_test_name
+
+    def _run(self, sizes, repeat):
+        User = get_user_model()
+        doctor = User.objects.create_user("bench_doctor", password="x", is_doctor=True)
+        patient = User.objects.create_user("bench_patient", password="x", is_patient=True)
+        client = Client()
+        client.force_login(doctor)
+        day = timezone.localdate() + timedelta(days=1)
+
+        self.stdout.write(f"{'size':>6} {'path':>9} {'ms':>9} {'ms/appt':>8} {'queries':>8}")
+        for size in sizes:
+            timings = {"per-item": [], "bulk": []}
+            queries = {}
+            for _ in range(repeat):
+                for path in timings:
+                    ids = [
+                        a.id for a in Appointment.objects.bulk_create(
+                            Appointment(doctor=doctor, patient=patient, date=day, status="Pending")
+                            for _ in range(size)
+                        )
+                    ]
+                    with CaptureQueriesContext(connection) as captured:
+                        started = time.perf_counter()
+                        if path == "per-item":
+                            for pk in ids:
+                                client.post(reverse("manage_appointment", args=[pk, "approve"]))
+                        else:
+                            response = client.post(
+                                reverse("bulk_manage_appointments"),
+                                data=json.dumps({"ids": ids, "action": "approve"}),
+                                content_type="application/json",
+                            )
+                            if response.json().get("updated") != size:
+                                raise CommandError(f"bulk approve updated {response.json().get('updated')} of {size}")
+                        timings[path].append(time.perf_counter() - started)
+                    queries[path] = len(captured.captured_queries)
+                    if Appointment.objects.filter(id__in=ids, status="Approved").count() != size:
+                        raise CommandError(f"{path} path did not approve all {size} appointments")
+                    Appointment.objects.filter(id__in=ids).delete()
+
+            for path, runs in timings.items():
+                ms = statistics.median(runs) * 1000
+                self.stdout.write(f"{size:>6} {path:>9} {ms:>9.1f} {ms / size:>8.2f} {queries[path]:>8}")
@@ -0,0 +1,156 @@
+# appointments/management/commands/booking_stress_test.py
+"""
+Fire hundreds of simultaneous bookings at one time slot and check nothing oversells.
+
+    python manage.py booking_stress_test --bookings 300 --capacity 5 --patients 250
+
+Runs against a throwaway on-disk test database (so SQLite's write lock is
+really contended). Every booking thread waits on a barrier and then calls
+scheduling.book_slot at the same moment; some patients book more than once.
+Afterwards half of the winners cancel — each twice, concurrently — to check
+seats are given back exactly once. Exits non-zero if any invariant breaks.
+"""
+import threading
+import time
+from collections import Counter
+from datetime import time as dtime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.utils import timezone
+
+from appointments import scheduling
+from appointments.models import Appointment, TimeSlot
+
+
+class Command(BaseCommand):
+    help = "Stress-test concurrent slot booking: hundreds of threads, one slot, no overselling."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bookings", type=int, default=300, help="Simultaneous booking attempts.")
+        parser.add_argument("--capacity", type=int, default=5, help="Seats in the contested slot.")
+        parser.add_argument("--patients", type=int,
+                            help="Distinct patients (default: 80%% of --bookings, so some book twice).")
+
+    def handle(self, *args, **options):
+        bookings = options["bookings"]
+        capacity = options["capacity"]
+        n_patients = options["patients"] or max(1, int(bookings * 0.8))
+        if bookings < 1 or capacity < 1:
+            raise CommandError("--bookings and --capacity must be positive.")
+
+        old_db_name = connection.settings_dict["NAME"]
+        test_settings = connection.settings_dict.setdefault("TEST", {})
+        old_test_name = test_settings.get("NAME")
+        if connection.vendor == "sqlite":
+            test_settings["NAME"] = str(old_db_name) + ".bookingtest"
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            failures = self._run(bookings, capacity, n_patients)
+        finally:
+            connection.creation.destroy_test_db(old_db_name, verbosity=0)
+            test_settings["NAME"] = old_test_name
+
+        if failures:
+            raise CommandError("; ".join(failures))
+        self.stdout.write(self.style.SUCCESS("OK: no overselling, no double booking, seats released once."))
+
+    def _run(self, bookings, capacity, n_patients):
+        User = get_user_model()
+        doctor = User.objects.create_user("stress_doctor", password="x", is_doctor=True)
+        User.objects.bulk_create(
+            [User(username=f"stress_patient_{i}", is_patient=True) for i in range(n_patients)]
+        )
+        patients = list(User.objects.filter(is_patient=True).order_by("id"))
+        slot = TimeSlot.objects.create(
+            doctor=doctor, date=timezone.localdate() + timedelta(days=1),
+            start_time=dtime(10, 0), end_time=dtime(10, 30), capacity=capacity,
+        )
+
+        outcomes = Counter()
+        booked_by = []
+        lock = threading.Lock()
+
+        def book(i):
+            patient = patients[i % n_patients]
+            try:
+                appointment = scheduling.book_slot(patient, slot.id)
+                outcome = "booked"
+            except scheduling.SlotUnavailable:
+                outcome = "full"
+            except scheduling.AlreadyBooked:
+                outcome = "duplicate"
+            except OperationalError as exc:  # e.g. SQLite "database is locked" after its busy timeout
+                outcome = f"db error: {exc}"
+            with lock:
+                outcomes[outcome] += 1
+                if outcome == "booked":
+                    booked_by.append(appointment)
+
+        elapsed = self._fire(book, bookings)
+        slot.refresh_from_db()
+        live = Appointment.objects.filter(slot=slot, status__in=scheduling.LIVE_STATUSES)
+        per_patient = Counter(live.values_list("patient_id", flat=True))
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\n== {bookings} simultaneous bookings, capacity {capacity}, {n_patients} patients =="))
+        self.stdout.write(f"wall: {elapsed:.2f}s  outcomes: {dict(outcomes)}")
+        self.stdout.write(f"slot counter: {slot.booked}/{slot.capacity}  live appointments: {live.count()}")
+
+        failures = []
+        expected = min(capacity, n_patients)
+        if outcomes["booked"] > capacity or slot.booked > capacity:
+            failures.append(f"oversold: {outcomes['booked']} bookings for {capacity} seats")
+        if not any(k.startswith("db error") for k in outcomes) and outcomes["booked"] != expected:
+            failures.append(f"expected {expected} bookings, got {outcomes['booked']}")
+        if slot.booked != live.count():
+            failures.append(f"counter {slot.booked} != {live.count()} live appointments")
+        if per_patient and max(per_patient.values()) > 1:
+            failures.append("a patient holds two seats in the same slot")
+
+        # Half the winners cancel, each from two threads at once
+        cancelling = booked_by[: len(booked_by) // 2]
+        released = Counter()
+
+        def cancel(i):
+            appointment = Appointment.objects.get(pk=cancelling[i // 2].pk)
+            try:
+                changed = scheduling.set_status(appointment, "Cancelled")
+            except OperationalError:
+                changed = None
+            with lock:
+                released[changed] += 1
+
+        if cancelling:
+            elapsed = self._fire(cancel, len(cancelling) * 2)
+            slot.refresh_from_db()
+            remaining = Appointment.objects.filter(slot=slot, status__in=scheduling.LIVE_STATUSES).count()
+            self.stdout.write(f"\ncancel race: {len(cancelling)} appointments x2 in {elapsed:.2f}s  "
+                              f"released: {released[True]}  no-op: {released[False]}  "
+                              f"db errors: {released[None]}")
+            self.stdout.write(f"slot counter: {slot.booked}/{slot.capacity}  live appointments: {remaining}")
+            if released[True] > len(cancelling):
+                failures.append("a seat was released twice")
+            if slot.booked != remaining:
+                failures.append(f"after cancelling, counter {slot.booked} != {remaining} live appointments")
+        return failures
+
+    def _fire(self, target, count):
+        """Start ``count`` threads that all call ``target(i)`` at the same moment."""
+        barrier = threading.Barrier(count)
+
+        def run(i):
+            barrier.wait()
+            try:
+                target(i)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return time.perf_counter() - started
@@ -0,0 +1,32 @@
+# appointments/management/commands/generate_slots.py
+"""
+Generate bookable time slots from every doctor's weekly availability.
+
+    python manage.py generate_slots --days 14
+
+Safe to run repeatedly (e.g. nightly from cron): existing slots are left as
+they are and only missing ones are inserted. The booking page also generates
+a day's slots on demand, so this just keeps the horizon filled ahead of time.
+"""
+from django.core.management.base import BaseCommand
+
+from appointments import scheduling
+from appointments.models import DoctorAvailability
+
+
+class Command(BaseCommand):
+    help = "Create missing time slots from doctors' weekly availability templates."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Days ahead (default: APPOINTMENT_SLOT_HORIZON_DAYS).")
+        parser.add_argument("--doctor", type=int, help="Only this doctor (user id).")
+
+    def handle(self, *args, **options):
+        doctors = DoctorAvailability.objects.values_list("doctor_id", flat=True).distinct()
+        if options["doctor"]:
+            doctors = doctors.filter(doctor_id=options["doctor"])
+
+        total = 0
+        for doctor_id in doctors:
+            total += scheduling.generate_slots(doctor_id, days=options["days"])
+        self.stdout.write(self.style.SUCCESS(f"{len(doctors)} doctor(s), {total} slot(s) in range."))
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-19 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0004_appointmentmessage'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointmentmessage',
+            index=models.Index(fields=['appointment', 'id'], name='apptmsg_appt_id_idx'),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0005_appointmentmessage_apptmsg_appt_id_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DoctorAvailability',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('slot_minutes', models.PositiveSmallIntegerField(default=30)),
+                ('capacity', models.PositiveSmallIntegerField(default=1)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['weekday', 'start_time'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TimeSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('capacity', models.PositiveSmallIntegerField(default=1)),
+                ('booked', models.PositiveSmallIntegerField(default=0)),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='time_slots', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['date', 'start_time'],
+            },
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='slot',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='appointments', to='appointments.timeslot'),
+        ),
+        migrations.AddConstraint(
+            model_name='appointment',
+            constraint=models.UniqueConstraint(condition=models.Q(('slot__isnull', False), models.Q(('status__in', ['Cancelled', 'Rejected']), _negated=True)), fields=('slot', 'patient'), name='appt_unique_live_slot_patient'),
+        ),
+        migrations.AddConstraint(
+            model_name='doctoravailability',
+            constraint=models.UniqueConstraint(fields=('doctor', 'weekday', 'start_time'), name='availability_unique_start'),
+        ),
+        migrations.AddConstraint(
+            model_name='doctoravailability',
+            constraint=models.CheckConstraint(condition=models.Q(('end_time__gt', models.F('start_time'))), name='availability_end_after_start'),
+        ),
+        migrations.AddConstraint(
+            model_name='doctoravailability',
+            constraint=models.CheckConstraint(condition=models.Q(('slot_minutes__gt', 0)), name='availability_slot_minutes_positive'),
+        ),
+        migrations.AddConstraint(
+            model_name='doctoravailability',
+            constraint=models.CheckConstraint(condition=models.Q(('capacity__gt', 0)), name='availability_capacity_positive'),
+        ),
+        migrations.AddConstraint(
+            model_name='timeslot',
+            constraint=models.UniqueConstraint(fields=('doctor', 'date', 'start_time'), name='timeslot_unique_start'),
+        ),
+        migrations.AddConstraint(
+            model_name='timeslot',
+            constraint=models.CheckConstraint(condition=models.Q(('booked__gte', 0), ('booked__lte', models.F('capacity'))), name='timeslot_booked_within_capacity'),
+        ),
+    ]
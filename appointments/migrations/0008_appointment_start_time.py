@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:10
+
+import datetime
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_slot_start(apps, schema_editor):
+    Appointment = apps.get_model('appointments', 'Appointment')
+    TimeSlot = apps.get_model('appointments', 'TimeSlot')
+    Appointment.objects.filter(slot__isnull=False).update(
+        start_time=models.Subquery(
+            TimeSlot.objects.filter(pk=models.OuterRef('slot_id')).values('start_time')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0007_dashboard_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='appointment',
+            name='appt_doctor_status_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='appointment',
+            name='appt_patient_status_date_idx',
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='start_time',
+            field=models.TimeField(default=datetime.time(0, 0)),
+        ),
+        migrations.RunPython(copy_slot_start, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['doctor', 'status', 'date', 'start_time'], name='appt_doctor_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['patient', 'status', 'date', 'start_time'], name='appt_patient_status_date_idx'),
+        ),
+    ]
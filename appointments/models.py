@@ -1,5 +1,7 @@
 
 
+import datetime
+
 from django.db import models
 from django.conf import settings
 
@@ -9,10 +11,87 @@ class Appointment(models.Model):
 
     date = models.DateField()
     status = models.CharField(max_length=50, default='Pending')
+    # Set when booked through a time slot; date-only bookings (doctors without availability) leave it empty
+    slot = models.ForeignKey('TimeSlot', on_delete=models.SET_NULL, null=True, blank=True, related_name='appointments')
+    # Copy of slot.start_time so the dashboards can page on (date, start_time) from the index;
+    # midnight for date-only bookings, which therefore list first on their day
+    start_time = models.TimeField(default=datetime.time(0, 0))
+
+    class Meta:
+        indexes = [
+            # dashboards: WHERE doctor/patient = ? AND status = ? ORDER BY date, start_time, id; grouped status counts
+            models.Index(fields=['doctor', 'status', 'date', 'start_time'], name='appt_doctor_status_date_idx'),
+            models.Index(fields=['patient', 'status', 'date', 'start_time'], name='appt_patient_status_date_idx'),
+        ]
+        constraints = [
+            # a patient holds at most one live booking per slot
+            models.UniqueConstraint(
+                fields=['slot', 'patient'],
+                condition=models.Q(slot__isnull=False) & ~models.Q(status__in=['Cancelled', 'Rejected']),
+                name='appt_unique_live_slot_patient',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.patient} → {self.doctor} on {self.date}"
 
+
+class DoctorAvailability(models.Model):
+    """Weekly template: e.g. Mondays 09:00–12:00 in 30-minute slots, 1 patient each."""
+    WEEKDAYS = [(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'),
+                (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')]
+
+    doctor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='availability')
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAYS)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    slot_minutes = models.PositiveSmallIntegerField(default=30)
+    capacity = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        ordering = ['weekday', 'start_time']
+        constraints = [
+            models.UniqueConstraint(fields=['doctor', 'weekday', 'start_time'], name='availability_unique_start'),
+            models.CheckConstraint(condition=models.Q(end_time__gt=models.F('start_time')),
+                                   name='availability_end_after_start'),
+            models.CheckConstraint(condition=models.Q(slot_minutes__gt=0), name='availability_slot_minutes_positive'),
+            models.CheckConstraint(condition=models.Q(capacity__gt=0), name='availability_capacity_positive'),
+        ]
+
+    def __str__(self):
+        return f"{self.doctor} {self.get_weekday_display()} {self.start_time:%H:%M}-{self.end_time:%H:%M}"
+
+
+class TimeSlot(models.Model):
+    """
+    One bookable slot generated from a DoctorAvailability template.
+
+    ``booked`` is only ever changed with a conditional UPDATE
+    (see appointments.scheduling), and the check constraint keeps it within
+    0..capacity even if some other code path gets it wrong.
+    """
+    doctor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='time_slots')
+    date = models.DateField()
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    capacity = models.PositiveSmallIntegerField(default=1)
+    booked = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ['date', 'start_time']
+        constraints = [
+            models.UniqueConstraint(fields=['doctor', 'date', 'start_time'], name='timeslot_unique_start'),
+            models.CheckConstraint(condition=models.Q(booked__gte=0) & models.Q(booked__lte=models.F('capacity')),
+                                   name='timeslot_booked_within_capacity'),
+        ]
+
+    @property
+    def remaining(self):
+        return self.capacity - self.booked
+
+    def __str__(self):
+        return f"{self.doctor} {self.date} {self.start_time:%H:%M} ({self.booked}/{self.capacity})"
+
 class AppointmentMessage(models.Model):
     appointment = models.ForeignKey(Appointment, on_delete=models.CASCADE)
     sender = models.ForeignKey(        # 🔥 use AUTH_USER_MODEL instead of User
@@ -25,6 +104,10 @@ class AppointmentMessage(models.Model):
 
     class Meta:
         ordering = ["timestamp"]
+        indexes = [
+            # incremental sync: WHERE appointment_id = ? AND id > ? ORDER BY id
+            models.Index(fields=["appointment", "id"], name="apptmsg_appt_id_idx"),
+        ]
 
     def __str__(self):
         return f"Msg by {self.sender} on {self.appointment} at {self.timestamp}"
@@ -0,0 +1,89 @@
+# appointments/pubsub.py
+"""
+In-process publish/subscribe for appointment chat messages.
+
+Subscribers are asyncio queues (one per open WebSocket / long-poll) keyed by
+appointment id. ``publish`` may be called from any thread — sync views run
+in worker threads — and hands each message to the subscriber's event loop
+with ``call_soon_threadsafe``. A subscriber whose queue is full is marked
+``overflowed`` instead of blocking the publisher; it then resyncs from the
+database by message id.
+
+Only subscribers in the same process are reached; chat_socket also polls
+the database every few seconds, so participants connected to different
+workers still get each other's messages.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+
+class Subscription:
+    def __init__(self, broker, appointment_id, maxsize):
+        self.broker = broker
+        self.appointment_id = appointment_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def _deliver(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout=None):
+        """Next published message, or None after ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker._unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Broker:
+    def __init__(self, maxsize=100):
+        self.maxsize = maxsize
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, appointment_id):
+        """Call from async code; use as a context manager so it is always removed."""
+        sub = Subscription(self, appointment_id, self.maxsize)
+        with self._lock:
+            self._subscribers[appointment_id].add(sub)
+        return sub
+
+    def _unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subscribers.get(sub.appointment_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.appointment_id]
+
+    def publish(self, appointment_id, message):
+        with self._lock:
+            subs = list(self._subscribers.get(appointment_id, ()))
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(sub._deliver, message)
+            except RuntimeError:  # loop already closed
+                self._unsubscribe(sub)
+        return len(subs)
+
+    def stats(self):
+        with self._lock:
+            return {"appointments": len(self._subscribers),
+                    "subscribers": sum(len(s) for s in self._subscribers.values())}
+
+
+broker = Broker()
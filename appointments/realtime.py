@@ -0,0 +1,91 @@
+# appointments/realtime.py
+"""
+WebSocket chat per appointment: ``ws/appointments/<id>/chat/?after=<last id>``.
+
+On connect the socket subscribes to the in-process broker FIRST and then
+replays every message with id > ``after`` from the database, so nothing
+published in between is lost; ids already sent are skipped, which makes
+reconnect-and-resume safe. Messages sent by the client are persisted and
+published to every other socket of the appointment. As with the send_message
+view, only an Approved appointment's chat is open: otherwise the socket is
+refused, or closed on the next send once the status changes, with 1008
+(policy violation).
+
+    client → {"message": "..."}
+    server → {"type": "message", "id": ..., "sender": ..., "message": ..., "time": ...}
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from appointments import chat
+from appointments.models import Appointment
+from appointments.pubsub import broker
+
+
+async def chat_socket(ws, appointment_id):
+    appointment = await Appointment.objects.filter(pk=appointment_id).afirst()
+    if appointment is None or not chat.is_participant(ws.user, appointment):
+        await ws.close(code=4403)
+        return
+    if not chat.can_send(ws.user, appointment):
+        await ws.close(code=1008)
+        return
+    await ws.accept()
+
+    try:
+        last_sent = max(0, int(ws.query.get("after", 0)))
+    except ValueError:
+        last_sent = 0
+    poll_seconds = getattr(settings, "APPOINTMENT_CHAT_POLL_SECONDS", 5)
+
+    with broker.subscribe(appointment.id) as sub:
+
+        async def send(payload):
+            nonlocal last_sent
+            if payload["id"] > last_sent:
+                last_sent = payload["id"]
+                await ws.send_json({"type": "message", **payload})
+
+        async def resync():
+            """Catch up from the DB (initial replay, overflow, other workers)."""
+            while True:
+                batch = await sync_to_async(chat.messages_after)(appointment.id, last_sent)
+                for payload in batch:
+                    await send(payload)
+                if len(batch) < chat.SYNC_BATCH:
+                    return
+
+        async def forward():
+            await resync()
+            while True:
+                payload = await sub.get(timeout=poll_seconds)
+                if sub.overflowed:
+                    sub.overflowed = False
+                    await resync()
+                elif payload is None:
+                    await resync()  # nothing pushed for a while — pick up other workers' messages
+                else:
+                    await send(payload)
+
+        forwarder = asyncio.create_task(forward())
+        try:
+            while True:
+                message = await ws.receive()
+                try:
+                    text = (json.loads(message.get("text") or "{}").get("message") or "").strip()
+                except (ValueError, AttributeError):
+                    continue
+                if not text:
+                    continue
+                # the status may have changed since connect (completed, cancelled, ...)
+                appointment.status = await Appointment.objects.filter(pk=appointment.id).values_list(
+                    "status", flat=True).afirst()
+                if not chat.can_send(ws.user, appointment):
+                    await ws.close(code=1008)
+                    return
+                await sync_to_async(chat.save_message)(appointment, ws.user, text)
+        finally:
+            forwarder.cancel()
@@ -0,0 +1,8 @@
+# appointments/routing.py
+from django.urls import path
+
+from appointments import realtime
+
+websocket_urlpatterns = [
+    path("ws/appointments/<int:appointment_id>/chat/", realtime.chat_socket, name="appointment_chat_ws"),
+]
@@ -0,0 +1,153 @@
+# appointments/scheduling.py
+"""
+Slot-based booking.
+
+Weekly DoctorAvailability templates are expanded into TimeSlot rows by
+``generate_slots`` (idempotent: the unique (doctor, date, start_time)
+constraint makes re-runs insert only what is missing). Booking never reads
+the counter and then writes it back; it claims a seat with one conditional
+UPDATE on the slot row
+
+    UPDATE timeslot SET booked = booked + 1
+     WHERE id = ? AND booked < capacity AND <slot not in the past>
+
+which either succeeds or touches zero rows, so concurrent requests cannot
+oversell a slot and only that row is written. The Appointment is created in
+the same transaction; if that fails (the patient already holds a seat in
+this slot) the increment rolls back with it.
+
+Editing a template does not touch slots that were already generated.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from appointments.models import Appointment, DoctorAvailability, TimeSlot
+
+LIVE_STATUSES = ('Pending', 'Approved')        # hold a seat in their slot
+RELEASING_STATUSES = ('Cancelled', 'Rejected')  # give it back
+
+# status -> statuses it may be reached from; nothing leaves Completed/Cancelled/Rejected
+ALLOWED_FROM = {
+    'Approved': ('Pending',),
+    'Completed': ('Approved',),
+    'Rejected': LIVE_STATUSES,
+    'Cancelled': LIVE_STATUSES,
+}
+
+
+class BookingError(Exception):
+    pass
+
+
+class SlotUnavailable(BookingError):
+    """The slot is full, already started, or does not exist."""
+
+
+class AlreadyBooked(BookingError):
+    """The patient already holds a seat in this slot."""
+
+
+def _bookable():
+    """Slots that have not started yet (local time)."""
+    now = timezone.localtime()
+    return Q(date__gt=now.date()) | Q(date=now.date(), start_time__gt=now.time())
+
+
+def _slot_times(availability, day):
+    step = datetime.timedelta(minutes=availability.slot_minutes)
+    start = datetime.datetime.combine(day, availability.start_time)
+    end = datetime.datetime.combine(day, availability.end_time)
+    while start + step <= end:
+        yield start.time(), (start + step).time()
+        start += step
+
+
+def generate_slots(doctor, start=None, days=None):
+    """
+    Create the missing slots of ``doctor`` (user or id) for ``days`` days
+    from ``start`` (default: today, APPOINTMENT_SLOT_HORIZON_DAYS). Returns
+    how many slots the templates describe for that range.
+    """
+    doctor_id = getattr(doctor, 'pk', doctor)
+    start = start or timezone.localdate()
+    if days is None:
+        days = getattr(settings, 'APPOINTMENT_SLOT_HORIZON_DAYS', 14)
+
+    templates = list(DoctorAvailability.objects.filter(doctor_id=doctor_id))
+    rows = []
+    for offset in range(days):
+        day = start + datetime.timedelta(days=offset)
+        for availability in templates:
+            if availability.weekday != day.weekday():
+                continue
+            rows.extend(
+                TimeSlot(doctor_id=doctor_id, date=day, start_time=begin, end_time=end,
+                         capacity=availability.capacity)
+                for begin, end in _slot_times(availability, day)
+            )
+    if rows:
+        TimeSlot.objects.bulk_create(rows, batch_size=500, ignore_conflicts=True)
+    return len(rows)
+
+
+def has_availability(doctor):
+    return DoctorAvailability.objects.filter(doctor_id=getattr(doctor, 'pk', doctor)).exists()
+
+
+def available_slots(doctor, day):
+    """Open slots of one day, generating them first if the day is within the horizon."""
+    doctor_id = getattr(doctor, 'pk', doctor)
+    today = timezone.localdate()
+    horizon = getattr(settings, 'APPOINTMENT_SLOT_HORIZON_DAYS', 14)
+    if day < today or (day - today).days >= horizon:
+        return []
+    generate_slots(doctor_id, day, 1)
+    return list(
+        TimeSlot.objects.filter(_bookable(), doctor_id=doctor_id, date=day, booked__lt=F('capacity'))
+        .order_by('start_time')
+    )
+
+
+def book_slot(patient, slot_id):
+    """Claim one seat of ``slot_id`` for ``patient``; raises a BookingError subclass."""
+    with transaction.atomic():
+        claimed = (
+            TimeSlot.objects.filter(_bookable(), pk=slot_id, booked__lt=F('capacity'))
+            .update(booked=F('booked') + 1)
+        )
+        if not claimed:
+            raise SlotUnavailable("This time slot is no longer available.")
+        slot = TimeSlot.objects.only('doctor_id', 'date', 'start_time').get(pk=slot_id)
+        try:
+            return Appointment.objects.create(
+                doctor_id=slot.doctor_id, patient=patient, date=slot.date, start_time=slot.start_time,
+                slot=slot, status='Pending'
+            )
+        except IntegrityError:
+            # leaving the atomic block rolls the seat back too
+            raise AlreadyBooked("You have already booked this time slot.")
+
+
+def set_status(appointment, status, allowed_from=None):
+    """
+    Move ``appointment`` to ``status`` if its current status allows it
+    (ALLOWED_FROM, or ``allowed_from``); returns False when it doesn't.
+
+    The check and the write are one conditional UPDATE, so a concurrent
+    change (e.g. the patient cancelling while the doctor approves) is never
+    overwritten. Cancelling or rejecting a slot booking gives its seat back
+    in the same transaction; a released booking can't become live again,
+    because its seat may already belong to someone else.
+    """
+    allowed_from = allowed_from or ALLOWED_FROM[status]
+    with transaction.atomic():
+        changed = Appointment.objects.filter(pk=appointment.pk, status__in=allowed_from).update(status=status)
+        if changed and appointment.slot_id is not None and status in RELEASING_STATUSES:
+            TimeSlot.objects.filter(pk=appointment.slot_id, booked__gt=0).update(booked=F('booked') - 1)
+    if changed:
+        appointment.status = status
+    return bool(changed)
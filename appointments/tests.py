@@ -0,0 +1,289 @@
+import json
+import threading
+import time as clock
+from collections import Counter
+from datetime import date, time, timedelta
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from appointments import bulk, dashboard, realtime, scheduling
+from appointments.models import Appointment, AppointmentMessage, TimeSlot
+from medassist.websocket import WebSocket
+
+User = get_user_model()
+
+
+class KeysetPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.doctor = User.objects.create_user("kp_doctor", is_doctor=True)
+        cls.patient = User.objects.create_user("kp_patient", is_patient=True)
+        day = date.today() + timedelta(days=3)
+        rows = [
+            # several rows share (date, start_time), so only the id breaks the tie
+            (day, time(9, 0), "Pending"), (day, time(9, 0), "Approved"), (day, time(9, 0), "Pending"),
+            (day, time(0, 0), "Approved"), (day, time(10, 30), "Pending"),
+            (day + timedelta(days=1), time(9, 0), "Approved"), (day - timedelta(days=1), time(16, 0), "Pending"),
+        ]
+        for d, t, status in rows:
+            Appointment.objects.create(doctor=cls.doctor, patient=cls.patient, date=d, start_time=t, status=status)
+
+    def walk(self, size, descending=False):
+        base = Appointment.objects.filter(doctor=self.doctor)
+        seen, after = [], None
+        while True:
+            page = dashboard.keyset_page(base, dashboard.OPEN_STATUSES, after, size, descending)
+            seen.extend(a.id for a in page["items"])
+            if not page["next"]:
+                return seen
+            after = page["next"]
+
+    def test_pages_follow_date_start_time_id_across_boundaries(self):
+        expected = list(
+            Appointment.objects.filter(doctor=self.doctor).order_by("date", "start_time", "id").values_list("id", flat=True)
+        )
+        for size in (1, 2, 3):
+            with self.subTest(size=size):
+                self.assertEqual(self.walk(size), expected)
+                self.assertEqual(self.walk(size, descending=True), expected[::-1])
+
+    def test_malformed_cursor_starts_over(self):
+        base = Appointment.objects.filter(doctor=self.doctor)
+        page = dashboard.keyset_page(base, dashboard.OPEN_STATUSES, "2025-01-01_42", 2)
+        self.assertTrue(page["is_first"])
+
+    @skipUnless(connection.vendor == "sqlite", "query plan text is SQLite's")
+    def test_cursor_seeks_the_index(self):
+        first = Appointment.objects.filter(doctor=self.doctor).order_by("date", "start_time", "id").first()
+        queryset = Appointment.objects.filter(doctor=self.doctor)
+        with CaptureQueriesContext(connection) as captured:
+            dashboard.keyset_page(queryset, ["Pending"], dashboard.encode_cursor(first), 2)
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + captured.captured_queries[0]["sql"])
+            plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+        # the seek must include the date bound, not just (doctor_id=? AND status=?)
+        self.assertIn("appt_doctor_status_date_idx", plan)
+        self.assertIn("date>", plan.replace(" ", ""))
+
+
+def run_together(target, count):
+    """Call ``target(i)`` from ``count`` threads released at the same moment."""
+    barrier = threading.Barrier(count)
+
+    def run(i):
+        try:
+            barrier.wait()
+            target(i)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def retry_locked(call, attempts=50):
+    """SQLite may refuse a contended write ("database is locked"); a real client would retry."""
+    for _ in range(attempts - 1):
+        try:
+            return call()
+        except OperationalError:
+            clock.sleep(0.01)
+    return call()
+
+
+class BookingConcurrencyTests(TransactionTestCase):
+    capacity = 3
+    attempts = 12
+
+    def setUp(self):
+        self.doctor = User.objects.create_user("cc_doctor", is_doctor=True)
+        self.patients = [User.objects.create_user(f"cc_patient_{i}", is_patient=True)
+                         for i in range(self.attempts)]
+        self.slot = TimeSlot.objects.create(
+            doctor=self.doctor, date=timezone.localdate() + timedelta(days=1),
+            start_time=time(10, 0), end_time=time(10, 30), capacity=self.capacity,
+        )
+
+    def test_simultaneous_bookings_never_oversell(self):
+        outcomes = Counter()
+        lock = threading.Lock()
+
+        def book(i):
+            try:
+                retry_locked(lambda: scheduling.book_slot(self.patients[i], self.slot.id))
+                outcome = "booked"
+            except scheduling.SlotUnavailable:
+                outcome = "full"
+            with lock:
+                outcomes[outcome] += 1
+
+        run_together(book, self.attempts)
+
+        self.slot.refresh_from_db()
+        live = Appointment.objects.filter(slot=self.slot, status__in=scheduling.LIVE_STATUSES).count()
+        self.assertEqual(outcomes, Counter(booked=self.capacity, full=self.attempts - self.capacity))
+        self.assertEqual(live, self.capacity)
+        self.assertEqual(self.slot.booked, self.capacity)
+
+    def test_concurrent_cancels_release_the_seat_once(self):
+        appointment = scheduling.book_slot(self.patients[0], self.slot.id)
+        results = []
+
+        def cancel(_i):
+            results.append(retry_locked(
+                lambda: scheduling.set_status(Appointment.objects.get(pk=appointment.pk), "Cancelled")
+            ))
+
+        run_together(cancel, 4)
+
+        self.slot.refresh_from_db()
+        self.assertEqual(sorted(results), [False, False, False, True])
+        self.assertEqual(self.slot.booked, 0)
+
+
+class SetStatusTests(TestCase):
+    def setUp(self):
+        self.doctor = User.objects.create_user("ss_doctor", is_doctor=True)
+        self.patient = User.objects.create_user("ss_patient", is_patient=True)
+        self.slot = TimeSlot.objects.create(
+            doctor=self.doctor, date=timezone.localdate() + timedelta(days=1),
+            start_time=time(11, 0), end_time=time(11, 30), capacity=1,
+        )
+
+    def test_released_booking_cannot_become_live_again(self):
+        appointment = scheduling.book_slot(self.patient, self.slot.id)
+        self.assertTrue(scheduling.set_status(appointment, "Cancelled"))
+        self.assertFalse(scheduling.set_status(appointment, "Approved"))
+        self.slot.refresh_from_db()
+        self.assertEqual(self.slot.booked, 0)
+        self.assertEqual(Appointment.objects.get(pk=appointment.pk).status, "Cancelled")
+
+    def test_only_allowed_transitions(self):
+        appointment = Appointment.objects.create(doctor=self.doctor, patient=self.patient, date=self.slot.date)
+        self.assertFalse(scheduling.set_status(appointment, "Completed"))  # not approved yet
+        self.assertTrue(scheduling.set_status(appointment, "Approved"))
+        self.assertTrue(scheduling.set_status(appointment, "Completed"))
+        self.assertFalse(scheduling.set_status(appointment, "Rejected"))
+
+
+class BulkApplyTests(TestCase):
+    def setUp(self):
+        self.doctor = User.objects.create_user("bulk_doctor", is_doctor=True)
+        other = User.objects.create_user("bulk_other", is_doctor=True)
+        patients = [User.objects.create_user(f"bulk_patient_{i}", is_patient=True) for i in range(3)]
+        day = timezone.localdate() + timedelta(days=1)
+        self.slots = [
+            TimeSlot.objects.create(doctor=self.doctor, date=day, start_time=time(h, 0), end_time=time(h, 30),
+                                    capacity=capacity)
+            for h, capacity in ((9, 3), (10, 2))
+        ]
+        self.booked = [scheduling.book_slot(p, self.slots[0].id) for p in patients]
+        self.booked += [scheduling.book_slot(p, self.slots[1].id) for p in patients[:2]]
+        self.date_only = Appointment.objects.create(doctor=self.doctor, patient=patients[0], date=day)
+        self.completed = Appointment.objects.create(doctor=self.doctor, patient=patients[1], date=day,
+                                                    status="Completed")
+        self.foreign = Appointment.objects.create(doctor=other, patient=patients[2], date=day)
+
+    def seats(self):
+        return [TimeSlot.objects.get(pk=s.pk).booked for s in self.slots]
+
+    def test_per_id_results(self):
+        ids = [a.id for a in self.booked] + [self.date_only.id, self.completed.id, self.foreign.id, 999999]
+        outcome = bulk.apply(self.doctor, ids, "cancel")
+
+        results = {r["id"]: r for r in outcome["results"]}
+        self.assertEqual(outcome["updated"], len(self.booked) + 1)
+        for a in self.booked + [self.date_only]:
+            self.assertEqual(results[a.id]["result"], "updated")
+        self.assertEqual(results[self.completed.id], {"id": self.completed.id, "result": "not_allowed",
+                                                      "status": "Completed"})
+        self.assertEqual(results[self.foreign.id]["result"], "not_found")
+        self.assertEqual(results[999999]["result"], "not_found")
+        self.assertEqual(Appointment.objects.get(pk=self.foreign.pk).status, "Pending")
+
+    def test_seats_are_given_back_exactly_once(self):
+        ids = [a.id for a in self.booked]
+        bulk.apply(self.doctor, ids, "cancel")
+        self.assertEqual(self.seats(), [0, 0])
+
+        again = bulk.apply(self.doctor, ids, "cancel")
+        self.assertEqual(again["updated"], 0)
+        self.assertEqual({r["result"] for r in again["results"]}, {"not_allowed"})
+        self.assertEqual(self.seats(), [0, 0])
+
+    def test_concurrent_cancel_is_not_released_twice(self):
+        # the patient cancels one booking between the bulk request's read and its update
+        racing = self.booked[0]
+        original = bulk._transition
+
+        def transition(ids, allowed_from, target, done):
+            if racing.id in ids:
+                scheduling.set_status(Appointment.objects.get(pk=racing.pk), "Cancelled")
+            return original(ids, allowed_from, target, done)
+
+        with mock.patch.object(bulk, "_transition", transition):
+            bulk.apply(self.doctor, [a.id for a in self.booked], "cancel")
+
+        self.assertEqual(self.seats(), [0, 0])
+        self.assertEqual(Appointment.objects.get(pk=racing.pk).status, "Cancelled")
+
+
+class ChatStatusTests(TestCase):
+    """Chat is open only on Approved appointments, over HTTP and over the socket."""
+
+    def setUp(self):
+        self.doctor = User.objects.create_user("chat_doctor", is_doctor=True)
+        self.patient = User.objects.create_user("chat_patient", is_patient=True)
+        self.appointment = Appointment.objects.create(
+            doctor=self.doctor, patient=self.patient, date=timezone.localdate(), status="Pending",
+        )
+
+    async def open_socket(self, incoming):
+        sent = []
+
+        async def receive():
+            if incoming:
+                return await incoming.pop(0)()
+            return {"type": "websocket.disconnect", "code": 1000}
+
+        async def send(message):
+            sent.append(message)
+
+        ws = WebSocket({"type": "websocket", "headers": [], "query_string": b""}, receive, send)
+        ws.user = self.patient
+        await realtime.chat_socket(ws, self.appointment.id)
+        return [m["type"] for m in sent], sent[-1]
+
+    def test_send_message_view_rejects_pending(self):
+        self.client.force_login(self.patient)
+        response = self.client.post(reverse("send_chat_message", args=[self.appointment.id]), {"message": "hi"})
+        self.assertEqual(response.json()["msg"], "Not allowed")
+
+    async def test_socket_refused_unless_approved(self):
+        for status in ("Pending", "Rejected", "Completed"):
+            with self.subTest(status=status):
+                await Appointment.objects.filter(pk=self.appointment.pk).aupdate(status=status)
+                types, last = await self.open_socket([])
+                self.assertEqual(types, ["websocket.close"])
+                self.assertEqual(last["code"], 1008)
+
+    async def test_socket_closed_when_status_changes(self):
+        await Appointment.objects.filter(pk=self.appointment.pk).aupdate(status="Approved")
+
+        async def complete_then_send():
+            await Appointment.objects.filter(pk=self.appointment.pk).aupdate(status="Completed")
+            return {"type": "websocket.receive", "text": json.dumps({"message": "still there?"})}
+
+        types, last = await self.open_socket([complete_then_send])
+        self.assertEqual(types, ["websocket.accept", "websocket.close"])
+        self.assertEqual(last["code"], 1008)
+        self.assertFalse(await AppointmentMessage.objects.aexists())
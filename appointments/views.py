@@ -1,15 +1,25 @@
+import json
+
 from django.contrib.auth import get_user_model
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.conf import settings
 from django.views.decorators.http import require_POST
-from django.db.models import Q
-from .models import Appointment, AppointmentMessage
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+from django.core.paginator import Paginator
+from django.db.models import Exists, OuterRef
+from .models import Appointment, AppointmentMessage, DoctorAvailability, TimeSlot
 from django.views.decorators.http import require_http_methods
 from users.models import User, DoctorProfile  # ✅ custom user model
+from users import geo, search
 from datetime import date
 from django.views.decorators.csrf import csrf_exempt
+from django.http import HttpResponseNotModified, JsonResponse
+from asgiref.sync import sync_to_async
+from . import bulk, chat, scheduling
+from .pubsub import broker
 
 User = get_user_model()
 
@@ -17,28 +27,38 @@ User = get_user_model()
 @login_required
 def book_appointment(request):
     """
-    Show a searchable list of doctors. Patient selects a doctor and date to book.
+    Show a searchable list of doctors. Patient selects a doctor and a time
+    slot (or just a date, for doctors who haven't published availability).
     Only allow booking for today or a future date.
     """
     q = request.GET.get('q', '').strip()
-    doctors = User.objects.filter(is_doctor=True)
-
-    if q:
-        doctors = doctors.filter(
-            Q(username__icontains=q) |
-            Q(email__icontains=q) |
-            Q(doctorprofile__specialty__icontains=q) |
-            Q(doctorprofile__address__icontains=q)
-        ).distinct()
 
     if request.method == 'POST':
         doctor_id = request.POST.get('doctor')
+        slot_id = request.POST.get('slot')
         date_str = request.POST.get('date')  # format 'YYYY-MM-DD'
 
+        if slot_id:
+            try:
+                scheduling.book_slot(request.user, int(slot_id))
+            except ValueError:
+                messages.error(request, "Please choose a valid time slot.")
+                return redirect('book_appointment')
+            except scheduling.BookingError as exc:
+                messages.error(request, str(exc))
+                return redirect('book_appointment')
+            messages.success(request, "Appointment booked successfully!")
+            return redirect('patient_dashboard')
+
         if not doctor_id or not date_str:
             messages.error(request, "Please fill all fields.")
             return redirect('book_appointment')
 
+        # Doctors with availability are booked by slot only, so their capacity holds
+        if scheduling.has_availability(doctor_id):
+            messages.error(request, "Please choose a time slot.")
+            return redirect('book_appointment')
+
         # 👉 Simple, safe server-side check
         today_str = date.today().isoformat()  # e.g. '2025-11-19'
 
@@ -57,15 +77,109 @@ def book_appointment(request):
         messages.success(request, "Appointment booked successfully!")
         return redirect('patient_dashboard')
 
-    doctors = doctors.select_related('doctorprofile')
+    doctors = User.objects.filter(is_doctor=True).select_related('doctorprofile').annotate(
+        has_slots=Exists(DoctorAvailability.objects.filter(doctor=OuterRef('pk')))
+    )
+    near = geo.parse_point(request.GET)
+    if q:
+        # Ranked full-text matches (users.search)
+        doctors = search.search_doctors(q, doctors)
+    elif near:
+        # k nearest doctors with a location (users.geo), closest first
+        hits = geo.doctors.nearest(*near)
+        found = doctors.in_bulk([user_id for _, user_id in hits])
+        doctors = []
+        for km, user_id in hits:
+            if user_id in found:
+                found[user_id].distance_km = round(km, 1)
+                doctors.append(found[user_id])
+    else:
+        doctors = doctors.order_by('username')
+    page = Paginator(doctors, getattr(settings, 'DOCTOR_SEARCH_PAGE_SIZE', 20)).get_page(request.GET.get('page'))
 
     context = {
-        'doctors': doctors,
+        'doctors': page.object_list,
+        'page_obj': page,
         'q': q,
+        'near': bool(near) and not q,
         'today': date.today().isoformat(),  # used by template for min=""
     }
     return render(request, 'appointments/book_appointment.html', context)
 
+
+@login_required
+def doctor_slots(request, doctor_id):
+    """Open slots of one doctor for ?date=YYYY-MM-DD (fills the booking form's time picker)."""
+    try:
+        day = date.fromisoformat(request.GET.get('date', ''))
+    except ValueError:
+        return JsonResponse({"status": "error", "msg": "Bad date"}, status=400)
+
+    slots = scheduling.available_slots(doctor_id, day)
+    return JsonResponse({"slots": [
+        {
+            "id": s.id,
+            "start": s.start_time.strftime('%H:%M'),
+            "end": s.end_time.strftime('%H:%M'),
+            "remaining": s.remaining,
+        }
+        for s in slots
+    ]})
+
+
+@login_required
+@require_http_methods(["GET", "POST"])
+def manage_availability(request):
+    """
+    Doctor: weekly availability templates. Slots are generated from them
+    APPOINTMENT_SLOT_HORIZON_DAYS ahead (also by the generate_slots command).
+    """
+    if not request.user.is_doctor:
+        return redirect('home')
+
+    if request.method == 'POST':
+        delete_id = request.POST.get('delete')
+        if delete_id:
+            availability = get_object_or_404(DoctorAvailability, id=delete_id, doctor=request.user)
+            # Drop future slots of this template nobody holds; booked ones stay
+            TimeSlot.objects.filter(
+                doctor=request.user,
+                date__gte=date.today(),
+                date__iso_week_day=availability.weekday + 1,
+                start_time__gte=availability.start_time,
+                start_time__lt=availability.end_time,
+                booked=0,
+            ).delete()
+            availability.delete()
+            messages.success(request, "Availability removed.")
+            return redirect('manage_availability')
+
+        try:
+            availability = DoctorAvailability(
+                doctor=request.user,
+                weekday=int(request.POST.get('weekday', '')),
+                start_time=request.POST.get('start_time'),
+                end_time=request.POST.get('end_time'),
+                slot_minutes=int(request.POST.get('slot_minutes') or 30),
+                capacity=int(request.POST.get('capacity') or 1),
+            )
+            availability.full_clean()  # field ranges, end after start, no duplicate start time
+            availability.save()
+        except (ValueError, IntegrityError):
+            messages.error(request, "Please enter a valid day, time range, slot length and capacity.")
+        except ValidationError as exc:
+            messages.error(request, " ".join(exc.messages))
+        else:
+            scheduling.generate_slots(request.user)
+            messages.success(request, "Availability added.")
+        return redirect('manage_availability')
+
+    return render(request, 'appointments/availability.html', {
+        'availability': DoctorAvailability.objects.filter(doctor=request.user),
+        'weekdays': DoctorAvailability.WEEKDAYS,
+        'upcoming': TimeSlot.objects.filter(doctor=request.user, date__gte=date.today())[:50],
+    })
+
 # Doctor: manage appointments
 @login_required
 @require_POST
@@ -76,20 +190,70 @@ def manage_appointment(request, appointment_id, action):
     """
     appointment = get_object_or_404(Appointment, id=appointment_id, doctor=request.user)
 
-    if action == 'approve':
-        appointment.status = 'Approved'
-        messages.success(request, "Appointment approved.")
-    elif action == 'complete':
-        appointment.status = 'Completed'
-        messages.success(request, "Appointment marked as completed.")
-    elif action == 'cancel':
-        # Doctor-initiated cancellation -> reflect as Rejected for patient
-        appointment.status = 'Rejected'
-        messages.success(request, "Appointment rejected.")
-    else:
+    targets = {
+        'approve': ('Approved', "Appointment approved."),
+        'complete': ('Completed', "Appointment marked as completed."),
+        # Doctor-initiated cancellation -> reflect as Rejected for patient (frees the slot)
+        'cancel': ('Rejected', "Appointment rejected."),
+    }
+    if action not in targets:
         messages.error(request, "Unknown action.")
+    else:
+        status, done = targets[action]
+        if scheduling.set_status(appointment, status):
+            messages.success(request, done)
+        else:
+            appointment.refresh_from_db(fields=['status'])
+            messages.error(request, f"This appointment is already {appointment.status}; it can't be {status.lower()} now.")
+
+    return redirect('doctor_dashboard')
+
+
+@login_required
+@require_POST
+def bulk_manage_appointments(request):
+    """
+    Doctor: approve / complete / cancel many appointments in one request.
 
-    appointment.save()
+    Form POST (dashboard checkboxes): ids=1&ids=2&action=approve → redirect
+    with a summary message. JSON POST {"ids": [1, 2], "action": "approve"}
+    → per-id results from appointments.bulk.apply.
+    """
+    if not request.user.is_doctor:
+        return JsonResponse({"status": "error", "msg": "Doctors only"}, status=403)
+
+    wants_json = request.content_type == "application/json"
+    if wants_json:
+        try:
+            body = json.loads(request.body or b"{}")
+            raw_ids, action = body.get("ids") or [], body.get("action")
+        except (ValueError, AttributeError):
+            return JsonResponse({"status": "error", "msg": "Bad JSON"}, status=400)
+    else:
+        raw_ids, action = request.POST.getlist("ids"), request.POST.get("action")
+
+    max_ids = getattr(settings, "APPOINTMENT_BULK_MAX", 200)
+    try:
+        ids = [int(i) for i in raw_ids]
+    except (TypeError, ValueError):
+        ids = None
+    if action not in bulk.TRANSITIONS or not ids or len(ids) > max_ids:
+        msg = f"Pick an action ({', '.join(bulk.TRANSITIONS)}) and 1–{max_ids} appointment ids."
+        if wants_json:
+            return JsonResponse({"status": "error", "msg": msg}, status=400)
+        messages.error(request, msg)
+        return redirect('doctor_dashboard')
+
+    result = bulk.apply(request.user, ids, action)
+    if wants_json:
+        return JsonResponse({"status": "success", **result})
+
+    skipped = len(result["results"]) - result["updated"]
+    messages.success(
+        request,
+        f"{result['updated']} appointment(s) marked {result['status']}."
+        + (f" {skipped} skipped (already changed or not yours)." if skipped else "")
+    )
     return redirect('doctor_dashboard')
 
 
@@ -106,8 +270,10 @@ def cancel_appointment_patient(request, appointment_id):
         messages.error(request, "You can only cancel appointments that are still pending.")
         return redirect('patient_dashboard')
 
-    appointment.status = 'Cancelled'   # new status for patient cancellation
-    appointment.save()
+    # new status for patient cancellation; frees the slot. Conditional, in case the doctor just acted on it
+    if not scheduling.set_status(appointment, 'Cancelled', allowed_from=('Pending',)):
+        messages.error(request, "You can only cancel appointments that are still pending.")
+        return redirect('patient_dashboard')
     messages.success(request, "Your appointment has been cancelled.")
     return redirect('patient_dashboard')
 
@@ -124,19 +290,16 @@ def chat_view(request, appointment_id):
     chat_with = appointment.patient if request.user == appointment.doctor else appointment.doctor
 
     if request.method == "POST":
+        # Fallback when the WebSocket isn't available; live participants still get a push
         text = request.POST.get("message", "").strip()
         if text:
-            AppointmentMessage.objects.create(
-                appointment=appointment,
-                sender=request.user,
-                message=text
-            )
+            chat.save_message(appointment, request.user, text)
         # ❌ NO redirect — just reload page
         # ❌ NO messages.success()
 
     messages_qs = AppointmentMessage.objects.filter(
         appointment=appointment
-    ).order_by("timestamp")
+    ).select_related("sender").order_by("id")
 
     return render(request, "appointments/chat_room.html", {
         "appointment": appointment,
@@ -149,27 +312,69 @@ def chat_view(request, appointment_id):
 @login_required
 def send_message(request, appointment_id):
     if request.method == "POST":
-        text = request.POST.get("message")
+        text = (request.POST.get("message") or "").strip()
         appointment = get_object_or_404(Appointment, id=appointment_id)
 
-        if appointment.status != "Approved":
+        if not chat.can_send(request.user, appointment):
             return JsonResponse({"status": "error", "msg": "Not allowed"})
+        if not text:
+            return JsonResponse({"status": "error", "msg": "Empty message"})
 
-        msg = AppointmentMessage.objects.create(
-            appointment=appointment,
-            sender=request.user,
-            message=text  # ✅ correct
-        )
+        msg = chat.save_message(appointment, request.user, text)
 
-        return JsonResponse({
-            "status": "success",
-            "sender": request.user.username,
-            "message": msg.message,
-            "time": msg.timestamp.strftime("%H:%M"),
-        })
+        return JsonResponse({"status": "success", **msg})
 
     return JsonResponse({"status": "error"})
 
+async def sync_messages(request, appointment_id):
+    """
+    Incremental chat sync for clients without WebSockets:
+
+        GET chat/<id>/messages/?after=<last id>&wait=<seconds>
+
+    Returns only messages with id > after (oldest first, up to 200). The ETag
+    names the newest id the client would have, so a repeat request with
+    If-None-Match gets 304. With ``wait`` the request long-polls (capped at
+    APPOINTMENT_CHAT_LONGPOLL_MAX seconds) until a message arrives.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({"status": "error", "msg": "Login required"}, status=401)
+    appointment = await Appointment.objects.filter(pk=appointment_id).afirst()
+    if appointment is None or not chat.is_participant(user, appointment):
+        return JsonResponse({"status": "error", "msg": "Not allowed"}, status=403)
+
+    try:
+        after = max(0, int(request.GET.get("after", 0)))
+        wait = min(float(request.GET.get("wait", 0)), getattr(settings, "APPOINTMENT_CHAT_LONGPOLL_MAX", 25))
+    except ValueError:
+        return JsonResponse({"status": "error", "msg": "Bad after/wait"}, status=400)
+
+    fetch = sync_to_async(chat.messages_after)
+    batch = await fetch(appointment.id, after)
+    if not batch and wait > 0:
+        # subscribe, then re-check, so a message saved in between isn't missed
+        with broker.subscribe(appointment.id) as sub:
+            batch = await fetch(appointment.id, after)
+            if not batch:
+                await sub.get(timeout=wait)
+                batch = await fetch(appointment.id, after)
+
+    last_id = batch[-1]["id"] if batch else after
+    etag = f'"{appointment.id}-{last_id}"'
+    if not batch and request.headers.get("If-None-Match") == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse({
+            "messages": batch,
+            "last_id": last_id,
+            "has_more": len(batch) == chat.SYNC_BATCH,
+        })
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
 @login_required
 @require_POST
 def clear_completed_patient(request):
@@ -0,0 +1,33 @@
+# ai_medical_assistant/chatbot/faq.py
+# Curated FAQ answered by the retrieval tier (chatbot/retrieval.py).
+# Each entry: (question phrasings, answer). Add phrasings rather than near-duplicate entries.
+FAQ = [
+    (["how do i book an appointment", "book a doctor", "schedule appointment with doctor"],
+     "Go to your dashboard and open 'Book Appointment'. Search for a doctor by name, specialty or area, pick a date, and submit. The doctor will approve it shortly."),
+    (["how do i cancel my appointment", "cancel appointment"],
+     "Open your dashboard and press 'Cancel' next to the appointment. Only appointments that are still pending can be cancelled."),
+    (["how do i order medicine", "buy medicines online", "pharmacy order"],
+     "Open the Pharmacy marketplace, choose a medicine and quantity, select Cash on Delivery or UPI, and place the order. You can track it under 'My Orders'."),
+    (["how does disease prediction work", "predict my disease", "symptom checker"],
+     "Open 'Disease Prediction' and select at least two symptoms. Our model suggests the most likely condition with causes, prevention tips and home remedies. It is not a diagnosis — please confirm with a doctor."),
+    (["how do i track my health", "record blood pressure and sugar", "health analytics"],
+     "Use 'Manage Health' to log weight, height, BP, sugar, heart rate and oxygen. The analytics dashboard charts your records and lets you download a PDF report."),
+    (["what is a normal blood pressure", "normal bp range"],
+     "A normal adult blood pressure is around 120/80 mmHg. Readings consistently above 130/80 should be discussed with a doctor."),
+    (["what is normal blood sugar", "normal sugar level", "fasting glucose range"],
+     "Normal fasting blood sugar is about 70–99 mg/dL, and below 140 mg/dL two hours after eating. Higher values should be checked by a doctor."),
+    (["what is normal oxygen level", "normal spo2"],
+     "A healthy SpO2 is usually 95–100%. Below 92% needs prompt medical attention."),
+    (["what is a normal heart rate", "normal pulse rate"],
+     "A normal resting heart rate for adults is 60–100 beats per minute."),
+    (["how is bmi calculated", "what is a healthy bmi"],
+     "BMI = weight (kg) ÷ height (m)². 18.5–24.9 is considered healthy, 25–29.9 overweight, and 30 or above obese."),
+    (["how much water should i drink", "daily water intake"],
+     "Most adults need about 2–3 liters of water a day, more in hot weather or during exercise."),
+    (["when should i see a doctor", "is it an emergency", "when to go to hospital"],
+     "See a doctor if symptoms are severe, last more than a few days, or keep coming back. Go to emergency care right away for chest pain, trouble breathing, fainting, severe bleeding or sudden weakness."),
+    (["can you prescribe medicine", "what medicine should i take", "give me a prescription"],
+     "I can't prescribe medicines. For anything beyond simple home care, please book an appointment with a doctor."),
+    (["is my data private", "who can see my health data"],
+     "Your records are only visible to you and to doctors you book appointments with."),
+]
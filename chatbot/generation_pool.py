@@ -0,0 +1,87 @@
+# ai_medical_assistant/chatbot/generation_pool.py
+"""
+Bounded executor for DialoGPT generation.
+
+Generation runs on a small dedicated thread pool so a burst of chat traffic
+can't occupy every server worker. At most ``workers + max_queue`` jobs are
+admitted; anything beyond that is rejected immediately with ``PoolBusy`` so
+the view can answer 503 instead of piling up.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+class PoolBusy(Exception):
+    """Raised when the generation queue is full."""
+
+
+class GenerationPool:
+    def __init__(self, workers, max_queue):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chatbot-gen")
+        self._lock = threading.Lock()
+        self._admitted = 0   # queued + running
+        self._running = 0
+        self._rejected = 0
+        self._cancelled = 0
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue ``fn`` and return a Future, or raise PoolBusy when full."""
+        with self._lock:
+            if self._admitted >= self.workers + self.max_queue:
+                self._rejected += 1
+                raise PoolBusy()
+            self._admitted += 1
+
+        def run():
+            with self._lock:
+                self._running += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+        future = self._executor.submit(run)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future):
+        with self._lock:
+            self._admitted -= 1
+            if future.cancelled():
+                self._cancelled += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queue_depth": self._admitted - self._running,
+                "rejected": self._rejected,
+                "cancelled": self._cancelled,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Process-wide generation pool, sized from settings."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = GenerationPool(
+                    workers=getattr(settings, "CHATBOT_GENERATION_WORKERS", 2),
+                    max_queue=getattr(settings, "CHATBOT_GENERATION_QUEUE", 8),
+                )
+    return _pool
@@ -0,0 +1,63 @@
+# ai_medical_assistant/chatbot/history_writer.py
+"""
+Write-behind buffer for ChatHistory (see medassist/batch_writer.py).
+
+Chat turns are queued in memory and written with one ``bulk_create`` every
+``CHATBOT_HISTORY_BATCH_SIZE`` rows or ``CHATBOT_HISTORY_FLUSH_MS`` ms,
+whichever comes first, and once more at interpreter shutdown. This turns one
+SQLite write transaction per message into one per batch.
+
+``CHATBOT_HISTORY_WRITE_MODE = "durable"`` keeps the old behaviour (one
+synchronous insert per turn) for deployments that can't afford to lose the
+last few unflushed rows on a crash.
+"""
+import atexit
+import threading
+
+from django.conf import settings
+
+from chatbot.models import ChatHistory
+from medassist.batch_writer import BatchWriter
+
+BUFFERED = "buffered"
+DURABLE = "durable"
+
+
+class ChatHistoryWriter(BatchWriter):
+    def __init__(self, batch_size=50, flush_interval_ms=500, max_pending=10000):
+        super().__init__(ChatHistory, "chat-history", batch_size, flush_interval_ms, max_pending)
+
+    def add(self, user, message, response):
+        self.add_row(ChatHistory(user_id=user.pk if user else None, message=message, response=response))
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = ChatHistoryWriter(
+                    batch_size=getattr(settings, "CHATBOT_HISTORY_BATCH_SIZE", 50),
+                    flush_interval_ms=getattr(settings, "CHATBOT_HISTORY_FLUSH_MS", 500),
+                    max_pending=getattr(settings, "CHATBOT_HISTORY_MAX_PENDING", 10000),
+                )
+                atexit.register(_writer.flush)
+    return _writer
+
+
+def save_turn(user, message, response):
+    """Record one chat turn according to CHATBOT_HISTORY_WRITE_MODE."""
+    if getattr(settings, "CHATBOT_HISTORY_WRITE_MODE", BUFFERED) == DURABLE:
+        ChatHistory.objects.create(user=user, message=message, response=response)
+    else:
+        get_writer().add(user, message, response)
+
+
+def flush_pending():
+    """Make queued turns visible before reading/deleting history."""
+    if _writer is not None:
+        _writer.flush()
@@ -0,0 +1,268 @@
+# ai_medical_assistant/chatbot/management/commands/chatbot_loadtest.py
+"""
+Replay a chat corpus against chatbot_reply and report throughput.
+
+    python manage.py chatbot_loadtest --concurrency 1,4,16 --requests 200 --stub-latency-ms 150
+
+By default it runs in-process through the Django test client, against a
+throwaway test database and throwaway in-memory caches (so stub replies and
+test conversations never reach the real reply cache or chatbot memory), with
+DialoGPT replaced by a deterministic stub (no model download). Use
+--live-url to hit a running server instead.
+"""
+import hashlib
+import http.cookiejar
+import statistics
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from chatbot import history_writer, memory_store, reply_cache, retrieval
+from chatbot import views as chatbot_views
+
+# Mix of RULES hits, retrieval-tier questions and free text that needs generation
+DEFAULT_CORPUS = [
+    "hello",
+    "I have a fever since yesterday",
+    "my head hurts, is it a headache?",
+    "what causes dengue",
+    "how do i book an appointment",
+    "i have a rash on my arm",
+    "rash on arm",
+    "my knee clicks when i climb stairs",
+    "normal blood pressure range?",
+    "feeling tired after lunch every day",
+    "can stress cause stomach problems",
+    "thank you",
+    "my child keeps waking up at night",
+    "how much water should I drink",
+    "i twisted my ankle playing football",
+    "diabetis diet tips",
+    "what should i eat to gain weight",
+    "bye",
+]
+
+
+class Command(BaseCommand):
+    help = "Load-test the chatbot endpoint with a stub model and report RPS, latency, DB writes and session size."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", default="1,4,16",
+                            help="Comma-separated concurrency levels (default: 1,4,16).")
+        parser.add_argument("--requests", type=int, default=200, help="Requests per concurrency level.")
+        parser.add_argument("--corpus", help="Text file with one chat message per line.")
+        parser.add_argument("--endpoint", choices=["sync", "async"], default="sync")
+        parser.add_argument("--stub-latency-ms", type=float, default=100.0,
+                            help="Simulated generation latency of the stub model.")
+        parser.add_argument("--real-model", action="store_true",
+                            help="Use the configured model instead of the stub.")
+        parser.add_argument("--no-reply-cache", action="store_true", help="Disable the reply cache.")
+        parser.add_argument("--live-url", help="Base URL of a running server, e.g. http://127.0.0.1:8000")
+
+    def handle(self, *args, **options):
+        corpus = self._load_corpus(options["corpus"])
+        try:
+            levels = [int(c) for c in options["concurrency"].split(",") if c.strip()]
+        except ValueError:
+            raise CommandError("--concurrency must be a comma-separated list of integers.")
+
+        url_name = "chatbot_reply_async" if options["endpoint"] == "async" else "chatbot_reply"
+        path = reverse(url_name)
+
+        if options["live_url"]:
+            url = options["live_url"].rstrip("/") + path
+            for level in levels:
+                self._report(level, self._run(level, options["requests"], corpus,
+                                              lambda: _LiveSession(url)))
+            return
+
+        overrides = {
+            "ALLOWED_HOSTS": ["testserver", "localhost", "127.0.0.1"],
+            # Every alias on its own private LocMemCache, discarded afterwards
+            "CACHES": {
+                alias: {
+                    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                    "LOCATION": f"chatbot-loadtest-{alias}",
+                    "TIMEOUT": config.get("TIMEOUT", 300),
+                    "OPTIONS": config.get("OPTIONS", {}),
+                }
+                for alias, config in settings.CACHES.items()
+            },
+        }
+        if options["no_reply_cache"]:
+            overrides["CHATBOT_REPLY_CACHE"] = False
+
+        originals = (chatbot_views._generate_torch, chatbot_views._generate_onnx)
+        if not options["real_model"]:
+            stub = _make_stub(options["stub_latency_ms"] / 1000.0)
+            chatbot_views._generate_torch = chatbot_views._generate_onnx = stub
+
+        # On-disk throwaway database, so SQLite write-lock contention is realistic
+        old_db_name = connection.settings_dict["NAME"]
+        test_settings = connection.settings_dict.setdefault("TEST", {})
+        old_test_name = test_settings.get("NAME")
+        if connection.vendor == "sqlite":
+            test_settings["NAME"] = str(old_db_name) + ".loadtest"
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(**overrides):
+                memory_store.reset_store()  # drop the store bound to the real memory cache
+                for level in levels:
+                    result = self._run(level, options["requests"], corpus,
+                                       lambda: _ClientSession(path))
+                    result["history_writer"] = history_writer.get_writer().stats() \
+                        if history_writer._writer is not None else {}
+                    self._report(level, result)
+                self.stdout.write(f"Reply cache: {reply_cache.cache_stats()}")
+        finally:
+            history_writer.flush_pending()
+            memory_store.reset_store()
+            chatbot_views._generate_torch, chatbot_views._generate_onnx = originals
+            connection.creation.destroy_test_db(old_db_name, verbosity=0)
+            test_settings["NAME"] = old_test_name
+
+        self.stdout.write(f"Retrieval tier: {retrieval.stats()}")
+
+    def _load_corpus(self, path):
+        if not path:
+            return DEFAULT_CORPUS
+        with open(path, encoding="utf-8") as fh:
+            corpus = [line.strip() for line in fh if line.strip()]
+        if not corpus:
+            raise CommandError(f"{path} has no messages.")
+        return corpus
+
+    def _run(self, concurrency, total, corpus, session_factory):
+        """Each worker is one chat user (own cookies) sending messages back to back."""
+        latencies, errors, db_writes = [], [0], [0]
+        sessions = []
+        lock = threading.Lock()
+        counter = iter(range(total))
+
+        def worker(worker_id):
+            session = session_factory()
+            with lock:
+                sessions.append(session)
+            writes = _WriteCounter()
+            with connection.execute_wrapper(writes):
+                while True:
+                    with lock:
+                        i = next(counter, None)
+                    if i is None:
+                        break
+                    message = corpus[(i + worker_id) % len(corpus)]
+                    start = time.perf_counter()
+                    ok = session.send(message)
+                    elapsed = time.perf_counter() - start
+                    with lock:
+                        latencies.append(elapsed)
+                        if not ok:
+                            errors[0] += 1
+            connection.close()
+            with lock:
+                db_writes[0] += writes.count
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(worker, range(concurrency)))
+        wall = time.perf_counter() - started
+
+        history_writer.flush_pending()
+        return {
+            "requests": len(latencies),
+            "errors": errors[0],
+            "wall": wall,
+            "latencies": sorted(latencies),
+            "db_writes": db_writes[0],
+            "session_bytes": [s.session_bytes() for s in sessions],
+        }
+
+    def _report(self, level, r):
+        lat = r["latencies"]
+
+        def pct(p):
+            return lat[min(len(lat) - 1, int(round(p / 100.0 * (len(lat) - 1))))] * 1000 if lat else 0.0
+
+        sizes = [s for s in r["session_bytes"] if s is not None]
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n== concurrency {level} =="))
+        self.stdout.write(f"requests: {r['requests']}  errors: {r['errors']}  wall: {r['wall']:.2f}s  "
+                          f"RPS: {r['requests'] / r['wall'] if r['wall'] else 0:.1f}")
+        self.stdout.write(f"latency ms: p50 {pct(50):.1f}  p90 {pct(90):.1f}  p99 {pct(99):.1f}  "
+                          f"max {(lat[-1] * 1000 if lat else 0):.1f}  mean "
+                          f"{(statistics.mean(lat) * 1000 if lat else 0):.1f}")
+        self.stdout.write(f"DB writes on request threads: {r['db_writes']}"
+                          + (f"  (history writer: {r['history_writer']})" if r.get("history_writer") else ""))
+        if sizes:
+            self.stdout.write(f"session size bytes: max {max(sizes)}  mean {statistics.mean(sizes):.0f}")
+        else:
+            self.stdout.write("session size bytes: n/a")
+
+
+def _make_stub(latency):
+    """Deterministic stand-in for DialoGPT: same context → same reply, fixed latency."""
+    def stub(conversation_context, cancel_event=None):
+        if latency:
+            time.sleep(latency)
+        digest = hashlib.sha1(conversation_context.encode("utf-8")).hexdigest()[:8]
+        return f"[stub reply {digest}] Please tell me more about how you feel."
+    return stub
+
+
+class _WriteCounter:
+    """connection.execute_wrapper that counts INSERT/UPDATE/DELETE statements."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip()[:6].upper() in ("INSERT", "UPDATE", "DELETE"):
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+class _ClientSession:
+    def __init__(self, path):
+        self.client = Client()
+        self.path = path
+
+    def send(self, message):
+        response = self.client.post(self.path, {"message": message})
+        return response.status_code == 200
+
+    def session_bytes(self):
+        from django.contrib.sessions.models import Session
+
+        key = self.client.cookies.get(settings.SESSION_COOKIE_NAME)
+        if not key:
+            return 0  # the chat path never created a session
+        row = Session.objects.filter(session_key=key.value).values_list("session_data", flat=True).first()
+        return len(row or "")
+
+
+class _LiveSession:
+    def __init__(self, url):
+        self.url = url
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar())
+        )
+
+    def send(self, message):
+        data = urllib.parse.urlencode({"message": message}).encode()
+        try:
+            with self.opener.open(self.url, data=data, timeout=60) as response:
+                response.read()
+                return response.status == 200
+        except Exception:
+            return False
+
+    def session_bytes(self):
+        return None  # not observable from outside the server
@@ -0,0 +1,95 @@
+# ai_medical_assistant/chatbot/management/commands/export_chatbot_onnx.py
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from chatbot.onnx_backend import ONNX_MODEL_FILE, get_onnx_dir
+
+MODEL_NAME = "microsoft/DialoGPT-small"
+
+
+class Command(BaseCommand):
+    help = "Export the cached DialoGPT-small model to ONNX (with past-key-value inputs)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default=None, help="Output directory (default: settings.CHATBOT_ONNX_DIR).")
+        parser.add_argument("--cache-dir", default="models/", help="Hugging Face cache used by the chatbot.")
+        parser.add_argument("--opset", type=int, default=14)
+
+    def handle(self, *args, **options):
+        try:
+            import torch
+            from transformers import AutoModelForCausalLM, AutoTokenizer
+        except ImportError as e:
+            raise CommandError(f"torch and transformers are required for export: {e}")
+
+        out_dir = options["output"] or get_onnx_dir()
+        os.makedirs(out_dir, exist_ok=True)
+
+        self.stdout.write(f"🔹 Loading {MODEL_NAME} from {options['cache_dir']} ...")
+        tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME, cache_dir=options["cache_dir"])
+        model = AutoModelForCausalLM.from_pretrained(MODEL_NAME, cache_dir=options["cache_dir"])
+        model.eval()
+        model.config.use_cache = True
+
+        config = model.config
+        n_layer, n_head = config.n_layer, config.n_head
+        head_dim = config.n_embd // n_head
+
+        class DecoderWithPast(torch.nn.Module):
+            """Flatten the KV cache into positional tensors so it can cross the ONNX boundary."""
+
+            def __init__(self, lm):
+                super().__init__()
+                self.lm = lm
+
+            def forward(self, input_ids, attention_mask, *past_flat):
+                past = tuple((past_flat[2 * i], past_flat[2 * i + 1]) for i in range(n_layer))
+                try:
+                    from transformers import DynamicCache
+                    past = DynamicCache.from_legacy_cache(past)
+                except ImportError:
+                    pass
+                out = self.lm(input_ids=input_ids, attention_mask=attention_mask,
+                              past_key_values=past, use_cache=True)
+                present = out.past_key_values
+                if hasattr(present, "to_legacy_cache"):
+                    present = present.to_legacy_cache()
+                flat = [t for layer in present for t in layer]
+                return (out.logits, *flat)
+
+        past_names, present_names, dynamic_axes = [], [], {
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "total_sequence"},
+            "logits": {0: "batch", 1: "sequence"},
+        }
+        for i in range(n_layer):
+            for kind in ("key", "value"):
+                past_names.append(f"past_key_values.{i}.{kind}")
+                present_names.append(f"present.{i}.{kind}")
+                dynamic_axes[past_names[-1]] = {0: "batch", 2: "past_sequence"}
+                dynamic_axes[present_names[-1]] = {0: "batch", 2: "total_sequence"}
+
+        # Dummy inputs: 4 new tokens on top of 3 cached positions
+        input_ids = torch.randint(0, config.vocab_size, (1, 4), dtype=torch.long)
+        attention_mask = torch.ones((1, 7), dtype=torch.long)
+        past = [torch.zeros((1, n_head, 3, head_dim)) for _ in past_names]
+
+        onnx_path = os.path.join(out_dir, ONNX_MODEL_FILE)
+        self.stdout.write(f"⚙️ Exporting to {onnx_path} (opset {options['opset']}) ...")
+        with torch.no_grad():
+            torch.onnx.export(
+                DecoderWithPast(model),
+                (input_ids, attention_mask, *past),
+                onnx_path,
+                input_names=["input_ids", "attention_mask", *past_names],
+                output_names=["logits", *present_names],
+                dynamic_axes=dynamic_axes,
+                opset_version=options["opset"],
+                do_constant_folding=True,
+            )
+
+        # The runtime backend only needs tokenizer.json + config.json next to the graph
+        tokenizer.save_pretrained(out_dir)
+        config.save_pretrained(out_dir)
+        self.stdout.write(self.style.SUCCESS(f"✅ ONNX chatbot model exported to {out_dir}"))
@@ -0,0 +1,143 @@
+# ai_medical_assistant/chatbot/memory_store.py
+"""
+Short-term chatbot memory, kept out of the Django session.
+
+Each conversation is a fixed-size ring in the ``chatbot_memory`` cache:
+one counter key plus ``max_turns`` slot keys. Appending a turn is one
+``incr`` + one ``set``, independent of history length, and every key
+carries an idle TTL, so abandoned conversations simply expire.
+
+The ring relies on ``incr`` being atomic, so that concurrent turns of one
+conversation get distinct slots. LocMemCache (the default, per process) and
+RedisCache (shared, CHATBOT_MEMORY_REDIS_URL) both are. FileBasedCache is
+not a fit: its ``incr`` is a get + set, and every ``set`` scans the cache
+directory to cull it.
+
+Conversations are identified by a random id in the ``chat_conversation``
+cookie, so the chat hot path never touches (or re-saves) the session row.
+The cookie outlives a logout, so the memory key also carries the user id
+(``scoped_id``): the next person on the same browser starts a fresh
+conversation, and ``user_logged_out`` (chatbot.signals) wipes the old one.
+"""
+import re
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+CACHE_ALIAS = "chatbot_memory"
+CONVERSATION_COOKIE = "chat_conversation"
+_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+class ConversationMemory:
+    def __init__(self, cache, max_turns=10, ttl=1800):
+        self.cache = cache
+        self.max_turns = max_turns
+        self.ttl = ttl
+
+    @staticmethod
+    def _counter_key(conv_id):
+        return f"chatmem:{conv_id}:n"
+
+    @staticmethod
+    def _slot_key(conv_id, slot):
+        return f"chatmem:{conv_id}:{slot}"
+
+    def load(self, conv_id):
+        """Return the last ``max_turns`` exchanges, oldest first."""
+        count = self.cache.get(self._counter_key(conv_id))
+        if not count:
+            return []
+        seqs = range(max(1, count - self.max_turns + 1), count + 1)
+        keys = {self._slot_key(conv_id, (n - 1) % self.max_turns): n for n in seqs}
+        found = self.cache.get_many(list(keys))
+        memory = []
+        for key, n in sorted(keys.items(), key=lambda kv: kv[1]):
+            turn = found.get(key)
+            # skip slots that expired or still hold an older lap of the ring
+            if turn and turn.get("n") == n:
+                memory.append({"message": turn["message"], "response": turn["response"]})
+        return memory
+
+    def append(self, conv_id, message, response):
+        counter_key = self._counter_key(conv_id)
+        self.cache.add(counter_key, 0, timeout=self.ttl)
+        try:
+            count = self.cache.incr(counter_key)
+        except ValueError:  # expired between add() and incr()
+            self.cache.set(counter_key, 1, timeout=self.ttl)
+            count = 1
+        self.cache.touch(counter_key, timeout=self.ttl)
+        self.cache.set(
+            self._slot_key(conv_id, (count - 1) % self.max_turns),
+            {"n": count, "message": message, "response": response},
+            timeout=self.ttl,
+        )
+
+    def clear(self, conv_id):
+        self.cache.delete_many(
+            [self._counter_key(conv_id)]
+            + [self._slot_key(conv_id, slot) for slot in range(self.max_turns)]
+        )
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ConversationMemory(
+                    caches[CACHE_ALIAS],
+                    max_turns=getattr(settings, "CHATBOT_MEMORY_TURNS", 10),
+                    ttl=getattr(settings, "CHATBOT_MEMORY_TTL", 1800),
+                )
+    return _store
+
+
+def reset_store():
+    """Forget the store so the next get_store() binds to the current CACHES (e.g. after override_settings)."""
+    global _store
+    with _store_lock:
+        _store = None
+
+
+def scoped_id(conv_id, user=None):
+    """Memory key for ``conv_id`` as seen by ``user``; guests share the bare cookie id."""
+    if user is not None and user.is_authenticated:
+        return f"{conv_id}-u{user.pk}"
+    return conv_id
+
+
+def forget(conv_id, user=None):
+    """Drop what ``user`` and a guest said in this browser's conversation."""
+    store = get_store()
+    store.clear(scoped_id(conv_id, user))
+    store.clear(conv_id)
+
+
+def get_conversation_id(request):
+    """Conversation id from the cookie, or a fresh one."""
+    return conversation_id_from_cookies(request.COOKIES)
+
+
+def conversation_id_from_cookies(cookies):
+    conv_id = cookies.get(CONVERSATION_COOKIE, "")
+    return conv_id if _ID_RE.match(conv_id) else uuid.uuid4().hex
+
+
+def set_conversation_cookie(response, conv_id):
+    """(Re)set the cookie so its lifetime slides with the memory TTL."""
+    response.set_cookie(
+        CONVERSATION_COOKIE,
+        conv_id,
+        max_age=getattr(settings, "CHATBOT_MEMORY_TTL", 1800),
+        httponly=True,
+        samesite="Lax",
+    )
+    return response
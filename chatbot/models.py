@@ -12,5 +12,11 @@ class ChatHistory(models.Model):
     response = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # keyset pagination of a user's history: WHERE user_id = ? ORDER BY timestamp DESC, id DESC
+            models.Index(fields=["user", "-timestamp", "-id"], name="chat_user_ts_id_idx"),
+        ]
+
     def __str__(self):
         return f"Chat by {self.user or 'Guest'} at {self.timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
@@ -0,0 +1,153 @@
+# ai_medical_assistant/chatbot/onnx_backend.py
+"""
+ONNX Runtime backend for DialoGPT-small.
+
+The graph is produced by ``python manage.py export_chatbot_onnx`` and takes
+``input_ids``, ``attention_mask`` and one ``past_key_values.<layer>.key/value``
+pair per layer, so each decoding step only feeds the newest token.
+Generation runs on NumPy + onnxruntime only (no torch import).
+"""
+import json
+import os
+
+import numpy as np
+from django.conf import settings
+
+from medassist import thread_budget
+from medassist.model_manager import model_manager
+
+ONNX_MODEL_FILE = "model.onnx"
+
+
+def get_onnx_dir():
+    return str(getattr(
+        settings, "CHATBOT_ONNX_DIR",
+        os.path.join(settings.BASE_DIR, "models", "onnx", "dialogpt-small"),
+    ))
+
+
+class OnnxDialoGPT:
+    """Incremental (KV-cached) DialoGPT decoder running on ONNX Runtime CPU."""
+
+    def __init__(self, model_dir):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, "config.json"), encoding="utf-8") as fh:
+            config = json.load(fh)
+        self.n_layer = config["n_layer"]
+        self.n_head = config["n_head"]
+        self.head_dim = config["n_embd"] // config["n_head"]
+        self.eos_token_id = config.get("eos_token_id", 50256)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = (
+            getattr(settings, "CHATBOT_ONNX_THREADS", 0) or thread_budget.threads_per_worker()
+        )
+        options.inter_op_num_threads = thread_budget.interop_threads()
+        thread_budget.record("onnxruntime", {
+            "intra_op": options.intra_op_num_threads,
+            "inter_op": options.inter_op_num_threads,
+        })
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, ONNX_MODEL_FILE),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.past_names = [
+            f"past_key_values.{i}.{kind}"
+            for i in range(self.n_layer) for kind in ("key", "value")
+        ]
+
+    def encode(self, text):
+        return self.tokenizer.encode(text).ids
+
+    def decode(self, ids):
+        return self.tokenizer.decode(ids, skip_special_tokens=True)
+
+    def _empty_past(self):
+        shape = (1, self.n_head, 0, self.head_dim)
+        return {name: np.zeros(shape, dtype=np.float32) for name in self.past_names}
+
+    @staticmethod
+    def _banned_tokens(ids, n):
+        """Tokens that would repeat an n-gram already present (no_repeat_ngram_size)."""
+        if n <= 0 or len(ids) < n:
+            return []
+        prefix = tuple(ids[len(ids) - n + 1:])
+        return [
+            ids[i + n - 1]
+            for i in range(len(ids) - n + 1)
+            if tuple(ids[i:i + n - 1]) == prefix
+        ]
+
+    @staticmethod
+    def _sample(logits, top_k, top_p, temperature, rng):
+        logits = logits / max(temperature, 1e-5)
+        if top_k and top_k < logits.shape[-1]:
+            kth = np.partition(logits, -top_k)[-top_k]
+            logits = np.where(logits < kth, -np.inf, logits)
+        order = np.argsort(logits)[::-1]
+        probs = np.exp(logits[order] - logits[order[0]])
+        probs /= probs.sum()
+        if top_p < 1.0:
+            keep = np.cumsum(probs) - probs < top_p
+            probs = np.where(keep, probs, 0.0)
+            probs /= probs.sum()
+        return int(order[rng.choice(len(order), p=probs)])
+
+    def generate(self, input_ids, max_length=220, no_repeat_ngram_size=3,
+                 do_sample=False, top_k=40, top_p=0.9, temperature=0.8, seed=None,
+                 cancel_event=None):
+        """Return the newly generated token ids (prompt excluded), mirroring HF ``generate``."""
+        ids = list(input_ids)
+        prompt_len = len(ids)
+        rng = np.random.default_rng(seed)
+        past = self._empty_past()
+        step_ids = np.array([ids], dtype=np.int64)
+
+        while len(ids) < max_length:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            feeds = {
+                "input_ids": step_ids,
+                "attention_mask": np.ones((1, len(ids)), dtype=np.int64),
+            }
+            feeds.update(past)
+            outputs = self.session.run(None, feeds)
+            logits = outputs[0][0, -1].astype(np.float64)
+            past = dict(zip(self.past_names, outputs[1:]))
+
+            banned = self._banned_tokens(ids, no_repeat_ngram_size)
+            if banned:
+                logits[banned] = -np.inf
+
+            if do_sample:
+                token = self._sample(logits, top_k, top_p, temperature, rng)
+            else:
+                token = int(np.argmax(logits))
+
+            ids.append(token)
+            if token == self.eos_token_id:
+                break
+            step_ids = np.array([[token]], dtype=np.int64)
+
+        return ids[prompt_len:]
+
+
+def _load_generator():
+    print("🔹 Loading DialoGPT-small ONNX model...")
+    generator = OnnxDialoGPT(get_onnx_dir())
+    print("✅ Chatbot model ready (ONNX Runtime).")
+    return generator
+
+
+model_manager.register("dialogpt-onnx", _load_generator)
+
+
+def get_onnx_generator():
+    """Load the exported ONNX model on demand (unloaded again when idle)."""
+    return model_manager.get("dialogpt-onnx")
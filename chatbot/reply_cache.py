@@ -0,0 +1,86 @@
+# ai_medical_assistant/chatbot/reply_cache.py
+"""
+Cache for generated (non-RULES) chatbot replies.
+
+Key = normalized message + hash of the memory window used as context +
+generation settings/backend, so "i have a rash on my arm" and "rash on arm"
+share one entry while different contexts or decoding settings never collide.
+Entries live in the shared ``chatbot`` cache alias (TTL + MAX_ENTRIES culling).
+Hit/miss counts are kept in process memory, so they cost no cache round trip
+and ``cache_stats()`` reports the current process.
+"""
+import hashlib
+import json
+import re
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+
+CACHE_ALIAS = "chatbot"
+KEY_PREFIX = "reply:"
+_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+# Filler words that don't change what the user is asking about
+STOPWORDS = {
+    "a", "an", "the", "i", "im", "i'm", "me", "my", "mine", "have", "has", "had",
+    "got", "get", "having", "is", "am", "are", "was", "were", "be", "been", "on",
+    "in", "at", "of", "to", "for", "with", "and", "or", "some", "any", "this",
+    "that", "it", "its", "please", "can", "could", "you", "do", "does", "there",
+    "so", "very", "really", "just", "bit", "little",
+}
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+
+def normalize_message(text: str) -> str:
+    """Lowercase, strip punctuation and filler words, collapse duplicates."""
+    tokens = [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+    return " ".join(dict.fromkeys(tokens))
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def make_key(user_input, context_window, generation_kwargs):
+    context_hash = hashlib.sha1(
+        json.dumps(
+            [[c.get("message", ""), c.get("response", "")] for c in context_window or []],
+            ensure_ascii=False,
+        ).encode("utf-8")
+    ).hexdigest()
+    payload = json.dumps({
+        "msg": normalize_message(user_input),
+        "ctx": context_hash,
+        "gen": generation_kwargs,
+        "backend": getattr(settings, "CHATBOT_BACKEND", "torch"),
+    }, sort_keys=True)
+    return KEY_PREFIX + hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _bump(counter):
+    with _stats_lock:
+        _stats[counter] += 1
+
+
+def get_reply(key):
+    """Return the cached reply (and record a hit/miss)."""
+    reply = _cache().get(key)
+    _bump("hits" if reply is not None else "misses")
+    return reply
+
+
+def set_reply(key, reply):
+    _cache().set(key, reply, timeout=getattr(settings, "CHATBOT_REPLY_CACHE_TTL", 3600))
+
+
+def cache_stats():
+    with _stats_lock:
+        hits, misses = _stats["hits"], _stats["misses"]
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 4) if total else 0.0,
+    }
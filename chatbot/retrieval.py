@@ -0,0 +1,198 @@
+# ai_medical_assistant/chatbot/retrieval.py
+"""
+Retrieval tier between RULES and DialoGPT.
+
+Built once per process from the RULES keywords, the curated FAQ and
+DISEASE_INFO, answering in milliseconds when it is confident and returning
+None (generate) otherwise:
+
+* Disease answers ("what causes dengue", "home remedies for flu") are only
+  given when the message names exactly one DISEASE_INFO disease, by name or
+  alias (typos like "diabetis" are tolerated for longer names). The rest of
+  the message is matched against the question templates alone, so "home
+  remedies for lupus" can never come back as the Flu remedies just because
+  the template words match.
+* Everything else is a character n-gram TF-IDF search over the RULES
+  keywords and FAQ phrasings (char n-grams absorb typos like "presure").
+  The cosine score is scaled by the share of the message's content words
+  that the matched entry contains, so "how do i order pizza" doesn't
+  borrow the score of "how do i order medicine".
+
+Either score has to clear ``CHATBOT_RETRIEVAL_THRESHOLD``.
+"""
+import difflib
+import re
+import threading
+
+from django.conf import settings
+
+from chatbot.faq import FAQ
+from chatbot.reply_cache import STOPWORDS
+from predictions.disease_info import DISEASE_INFO
+
+_index = None
+_index_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+# Other names people use for the DISEASE_INFO diseases (the lowercased name always counts)
+DISEASE_ALIASES = {
+    "Allergy": ["allergies", "allergic"],
+    "Anemia": ["anaemia"],
+    "Anxiety Disorder": ["anxiety"],
+    "COVID-19": ["covid", "covid19", "coronavirus"],
+    "Chickenpox": ["chicken pox"],
+    "Chronic Fatigue Syndrome": ["chronic fatigue"],
+    "Flu": ["influenza"],
+    "Gastroenteritis": ["stomach flu"],
+    "Hypertension": ["high blood pressure", "high bp"],
+    "Tuberculosis": ["tb"],
+}
+FUZZY_MIN_LENGTH = 6   # shorter names must be spelled exactly ("flu" is not "lupus")
+FUZZY_RATIO = 0.85
+CANDIDATES = 5         # best cosine matches re-scored for content-word coverage
+
+# (topic field, question templates without the disease, answer template)
+DISEASE_TOPICS = [
+    ("causes", ["what causes", "causes of", "why do people get", "what is the cause of"],
+     "Common causes of {D}: {v}."),
+    ("prevention", ["how to prevent", "prevention of", "avoid getting", "how can i prevent"],
+     "To help prevent {D}: {v}."),
+    ("home_remedies", ["home remedies for", "natural treatment for", "home care", "remedies for"],
+     "Home remedies that may help with {D}: {v}. See a doctor if symptoms get worse."),
+    ("dos", ["what should i do for", "dos", "things to do with", "what to do if i have"],
+     "If you have {D}: {v}."),
+    ("donts", ["what to avoid with", "donts", "what not to do in", "things to avoid with", "what should i avoid"],
+     "With {D}, avoid the following: {v}."),
+]
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+QUESTION_WORDS = {
+    "how", "what", "why", "when", "where", "which", "who", "should", "would",
+    "will", "much", "many", "tell", "about", "need", "want", "know", "your",
+    "if", "by", "from", "after", "before", "any", "all", "we", "us",
+}
+
+
+def _words(text):
+    return _WORD_RE.findall(text.lower())
+
+
+def _content_words(text):
+    return [w for w in _words(text) if w not in STOPWORDS and w not in QUESTION_WORDS]
+
+
+def _similar(word, other):
+    return word == other or (
+        min(len(word), len(other)) >= FUZZY_MIN_LENGTH
+        and difflib.SequenceMatcher(None, word, other).ratio() >= FUZZY_RATIO
+    )
+
+
+def _build_vectorizer():
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    return TfidfVectorizer(analyzer="char_wb", ngram_range=(3, 5), lowercase=True, sublinear_tf=True)
+
+
+class RetrievalIndex:
+    def __init__(self, rules):
+        documents = [(keyword, reply) for keyword, reply in rules.items() if keyword != "default"]
+        documents += [(q, answer) for questions, answer in FAQ for q in questions]
+
+        self.answers = [answer for _, answer in documents]
+        self.doc_words = [set(_content_words(text)) for text, _ in documents]
+        self.vectorizer = _build_vectorizer()
+        # rows are L2-normalized, so matrix @ query = cosine similarity
+        self.matrix = self.vectorizer.fit_transform([text for text, _ in documents]).tocsr()
+
+        # disease name/alias -> disease, longest first so "stomach flu" wins over "flu"
+        aliases = {}
+        for disease in DISEASE_INFO:
+            if disease == "Unknown":
+                continue
+            for alias in [disease.lower()] + DISEASE_ALIASES.get(disease, []):
+                aliases[" ".join(_words(alias))] = disease
+        self.aliases = sorted(aliases.items(), key=lambda kv: -len(kv[0]))
+
+        self.topics = [(field, answer) for field, questions, answer in DISEASE_TOPICS for _ in questions]
+        self.topic_vectorizer = _build_vectorizer()
+        self.topic_matrix = self.topic_vectorizer.fit_transform(
+            [q for _, questions, _ in DISEASE_TOPICS for q in questions]
+        ).tocsr()
+
+    def find_disease(self, text):
+        """(disease, message with the mention removed) if exactly one disease is named, else (None, text)."""
+        words = _words(text)
+        found, rest = set(), list(words)
+        for alias, disease in self.aliases:
+            alias_words = alias.split()
+            n = len(alias_words)
+            for i in range(len(rest) - n + 1):
+                window = rest[i:i + n]
+                if window == alias_words or (n == 1 and _similar(window[0], alias)):
+                    found.add(disease)
+                    rest[i:i + n] = [""] * n
+        if len(found) != 1:
+            return None, text
+        return found.pop(), " ".join(w for w in rest if w)
+
+    def _search_disease(self, text):
+        disease, rest = self.find_disease(text)
+        if disease is None or not rest:
+            return None, 0.0
+        scores = (self.topic_matrix @ self.topic_vectorizer.transform([rest]).T).toarray().ravel()
+        best = int(scores.argmax())
+        field, template = self.topics[best]
+        values = DISEASE_INFO[disease].get(field)
+        if not values:
+            return None, 0.0
+        return template.format(D=disease, v="; ".join(values)), float(scores[best])
+
+    def _search_general(self, text):
+        words = _content_words(text)
+        if not words:
+            return None, 0.0
+        scores = (self.matrix @ self.vectorizer.transform([text]).T).toarray().ravel()
+        best, best_score = None, 0.0
+        for i in scores.argsort()[::-1][:CANDIDATES]:
+            covered = sum(1 for w in words if any(_similar(w, d) for d in self.doc_words[i]))
+            score = float(scores[i]) * covered / len(words)
+            if score > best_score:
+                best, best_score = self.answers[i], score
+        return best, best_score
+
+    def search(self, text):
+        """Return (answer, score) for the best match; answer is None when nothing applies."""
+        reply, score = self._search_disease(text)
+        if reply is not None and score >= getattr(settings, "CHATBOT_RETRIEVAL_THRESHOLD", 0.5):
+            return reply, score
+        return self._search_general(text)
+
+
+def get_index(rules):
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = RetrievalIndex(rules)
+    return _index
+
+
+def answer(text, rules):
+    """Best indexed answer if similar enough, else None (fall through to generation)."""
+    if not getattr(settings, "CHATBOT_RETRIEVAL", True):
+        return None
+    try:
+        reply, score = get_index(rules).search(text)
+    except Exception as e:
+        print("⚠️ Retrieval error:", e)
+        return None
+    if reply is not None and score >= getattr(settings, "CHATBOT_RETRIEVAL_THRESHOLD", 0.5):
+        _stats["hits"] += 1
+        return reply
+    _stats["misses"] += 1
+    return None
+
+
+def stats():
+    return dict(_stats, documents=len(_index.answers) if _index is not None else 0)
@@ -0,0 +1,8 @@
+# ai_medical_assistant/chatbot/routing.py
+from django.urls import path
+
+from chatbot import voice
+
+websocket_urlpatterns = [
+    path("ws/chatbot/voice/", voice.voice_socket, name="chatbot_voice_ws"),
+]
@@ -0,0 +1,19 @@
+# ai_medical_assistant/chatbot/signals.py
+"""
+Forget the chatbot's short-term memory on logout.
+
+The conversation cookie survives ``logout()``; memory is already keyed by
+user (memory_store.scoped_id), and this drops what was said so it doesn't
+linger in the cache until the TTL.
+"""
+from django.contrib.auth.signals import user_logged_out
+from django.dispatch import receiver
+
+from chatbot import memory_store
+
+
+@receiver(user_logged_out)
+def forget_conversation(sender, request=None, user=None, **kwargs):
+    conv_id = request.COOKIES.get(memory_store.CONVERSATION_COOKIE) if request is not None else None
+    if conv_id and memory_store._ID_RE.match(conv_id):
+        memory_store.forget(conv_id, user)
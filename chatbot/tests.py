@@ -0,0 +1,199 @@
+import asyncio
+import json
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from chatbot import memory_store, retrieval, voice
+from chatbot.models import ChatHistory
+from chatbot.views import RULES, history_page, instant_reply
+from medassist.websocket import WebSocket, WebSocketDisconnect
+
+
+class RetrievalTierTests(SimpleTestCase):
+    """The retrieval tier must answer paraphrases it knows and stay out of everything else."""
+
+    def answer(self, text):
+        return retrieval.answer(text, RULES)
+
+    def test_disease_answers_need_the_disease_to_be_named(self):
+        for text in ["home remedies for lupus", "what causes kidney stones", "what causes cancer"]:
+            with self.subTest(text=text):
+                self.assertIsNone(instant_reply(text))
+
+    def test_template_words_alone_do_not_match(self):
+        for text in ["how do i order pizza", "book a flight to delhi", "how do i cancel my netflix subscription",
+                     "how do i track my parcel", "what is a normal salary", "normal price of petrol",
+                     "order a taxi", "what causes earthquakes", "prevent my car from rusting",
+                     "what is the capital of france", "what should i eat to gain weight",
+                     "my knee clicks when i climb stairs"]:
+            with self.subTest(text=text):
+                self.assertIsNone(self.answer(text))
+
+    def test_two_diseases_fall_through(self):
+        self.assertIsNone(self.answer("what causes flu and dengue"))
+
+    def test_disease_topic_paraphrases(self):
+        cases = {
+            "what's the cause of migraine": "Common causes of Migraine",
+            "tips to prevent asthma": "To help prevent Asthma",
+            "home remedy for a migraine": "Home remedies that may help with Migraine",
+            "what should I avoid if I have diabetes": "With Diabetes, avoid",
+            "how to prevent diabetis": "To help prevent Diabetes",  # typo in the disease name
+            "what causes anemia in women": "Common causes of Anemia",
+            "preventing the flu": "To help prevent Flu:",
+            "things to avoid with high blood pressure": "With Hypertension, avoid",
+            "what causes covid": "Common causes of COVID-19",
+        }
+        for text, expected in cases.items():
+            with self.subTest(text=text):
+                self.assertTrue((self.answer(text) or "").startswith(expected), self.answer(text))
+
+    def test_faq_paraphrases(self):
+        cases = {
+            "how can i cancel an appointment": "Open your dashboard and press 'Cancel'",
+            "where can i buy medicine": "Open the Pharmacy marketplace",
+            "what's a normal pulse": "A normal resting heart rate",
+            "how do i calculate bmi": "BMI =",
+            "what is normal blood sugar level": "Normal fasting blood sugar",
+            "what is a normal blood presure": "A normal adult blood pressure",
+            "daily water intake for adults": "Most adults need about 2–3 liters",
+        }
+        for text, expected in cases.items():
+            with self.subTest(text=text):
+                self.assertTrue((self.answer(text) or "").startswith(expected), self.answer(text))
+
+    def test_short_names_are_not_fuzzy_matched(self):
+        index = retrieval.get_index(RULES)
+        self.assertEqual(index.find_disease("home remedies for lupus")[0], None)
+        self.assertEqual(index.find_disease("stomach flu remedies")[0], "Gastroenteritis")
+
+
+class ConversationMemoryLogoutTests(TestCase):
+    """The conversation cookie outlives logout; the memory behind it must not."""
+
+    def setUp(self):
+        User = get_user_model()
+        self.alice = User.objects.create_user("memory_alice", is_patient=True)
+        self.bob = User.objects.create_user("memory_bob", is_patient=True)
+        self.conv_id = "a" * 32
+        self.client.cookies[memory_store.CONVERSATION_COOKIE] = self.conv_id
+        self.store = memory_store.get_store()
+        self.addCleanup(memory_store.forget, self.conv_id, self.alice)
+
+    def test_memory_is_scoped_to_the_user(self):
+        self.store.append(memory_store.scoped_id(self.conv_id, self.alice), "i have diabetes", "noted")
+        self.assertEqual(self.store.load(memory_store.scoped_id(self.conv_id, self.bob)), [])
+        self.assertEqual(self.store.load(memory_store.scoped_id(self.conv_id)), [])
+
+    def test_logout_clears_memory_and_cookie(self):
+        self.client.force_login(self.alice)
+        self.store.append(memory_store.scoped_id(self.conv_id, self.alice), "i have diabetes", "noted")
+        response = self.client.get(reverse("logout"))
+        self.assertEqual(self.store.load(memory_store.scoped_id(self.conv_id, self.alice)), [])
+        self.assertEqual(response.cookies[memory_store.CONVERSATION_COOKIE].value, "")
+
+
+class HistoryPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user("history_user")
+        ChatHistory.objects.bulk_create(
+            ChatHistory(user=cls.user, message=f"m{i}", response=f"r{i}") for i in range(9)
+        )
+        # turns flushed in one batch can share a timestamp; only the id orders them
+        now = timezone.now()
+        rows = list(ChatHistory.objects.filter(user=cls.user).order_by("id"))
+        for i, row in enumerate(rows):
+            ChatHistory.objects.filter(pk=row.pk).update(timestamp=now - timedelta(seconds=i // 4))
+
+    def test_cursor_continuity_with_duplicate_timestamps(self):
+        expected = list(
+            ChatHistory.objects.filter(user=self.user).order_by("-timestamp", "-id").values_list("id", flat=True)
+        )
+        for limit in (1, 2, 3, 4):
+            with self.subTest(limit=limit):
+                seen, cursor = [], None
+                while True:
+                    rows, cursor = history_page(self.user, cursor, limit)
+                    seen.extend(r.id for r in rows)
+                    if not cursor:
+                        break
+                self.assertEqual(seen, expected)
+
+    @skipUnless(connection.vendor == "sqlite", "query plan text is SQLite's")
+    def test_cursor_seeks_the_index(self):
+        _rows, cursor = history_page(self.user, None, 2)
+        with CaptureQueriesContext(connection) as captured:
+            history_page(self.user, cursor, 2)
+        with connection.cursor() as db:
+            db.execute("EXPLAIN QUERY PLAN " + captured.captured_queries[0]["sql"])
+            plan = " ".join(str(row[-1]) for row in db.fetchall()).replace(" ", "")
+        self.assertIn("chat_user_ts_id_idx", plan)
+        self.assertIn("timestamp<", plan)
+
+
+class FakeRecognizer:
+    """Vosk stand-in: the first chunk ends a segment at a pause, the rest is still being spoken."""
+
+    def __init__(self):
+        self.chunks = 0
+        self.resets = 0
+
+    def AcceptWaveform(self, data):
+        self.chunks += 1
+        return self.chunks == 1
+
+    def Result(self):
+        return json.dumps({"text": "i have had a headache"})
+
+    def PartialResult(self):
+        return json.dumps({"partial": "since"})
+
+    def FinalResult(self):
+        return json.dumps({"text": "since yesterday"})
+
+    def Reset(self):
+        self.resets += 1
+
+
+class VoiceSocketTests(SimpleTestCase):
+    async def test_segments_finalized_at_pauses_are_kept(self):
+        recognizer = FakeRecognizer()
+        responded = asyncio.Event()
+        incoming = [
+            {"type": "websocket.receive", "bytes": b"\x00" * 320},
+            {"type": "websocket.receive", "bytes": b"\x00" * 320},
+            {"type": "websocket.receive", "text": json.dumps({"event": "end"})},
+        ]
+        sent, transcripts = [], []
+
+        async def receive():
+            if incoming:
+                return incoming.pop(0)
+            await responded.wait()
+            return {"type": "websocket.disconnect", "code": 1000}
+
+        async def send(message):
+            sent.append(message)
+
+        async def respond(ws, text, conv_id):
+            transcripts.append(text)
+            responded.set()
+
+        ws = WebSocket({"type": "websocket", "headers": []}, receive, send)
+        with mock.patch.object(voice, "_new_recognizer", return_value=recognizer), \
+                mock.patch.object(voice, "_respond", respond):
+            with self.assertRaises(WebSocketDisconnect):
+                await asyncio.wait_for(voice.voice_socket(ws), timeout=5)
+
+        self.assertEqual(transcripts, ["i have had a headache since yesterday"])
+        payloads = [json.loads(m["text"]) for m in sent if m["type"] == "websocket.send"]
+        self.assertIn({"partial": "i have had a headache since"}, payloads)
+        self.assertEqual(recognizer.resets, 1)
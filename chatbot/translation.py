@@ -0,0 +1,97 @@
+# ai_medical_assistant/chatbot/translation.py
+"""
+Offline translation for the chatbot (langdetect + Argos Translate).
+
+Installed Argos packages are loaded once per process, and the most frequent
+phrase translations are memoized in an LRU so repeated messages/replies never
+hit the translation model again. No network calls on the request path.
+"""
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+
+ENGLISH = "en"
+
+_translations = {}          # (src, dest) -> argostranslate ITranslation (or None)
+_translations_lock = threading.Lock()
+_installed_codes = None
+
+
+def _installed_languages():
+    """Language codes with an installed Argos package (loaded once)."""
+    global _installed_codes
+    if _installed_codes is None:
+        with _translations_lock:
+            if _installed_codes is None:
+                try:
+                    from argostranslate import translate as argos_translate
+                    _installed_codes = {lang.code: lang for lang in argos_translate.get_installed_languages()}
+                except Exception as e:
+                    print("⚠️ Offline translation unavailable:", e)
+                    _installed_codes = {}
+    return _installed_codes
+
+
+def _get_translation(src, dest):
+    key = (src, dest)
+    if key not in _translations:
+        languages = _installed_languages()
+        translation = None
+        if src in languages and dest in languages:
+            translation = languages[src].get_translation(languages[dest])
+        with _translations_lock:
+            _translations[key] = translation
+    return _translations[key]
+
+
+def detect_language(text):
+    """Best-guess ISO code; falls back to English for short/uncertain input."""
+    if text.isascii() and len(text.split()) < 3:
+        return ENGLISH  # langdetect is unreliable on "hi", "ok", "fever" etc.
+    try:
+        from langdetect import DetectorFactory, detect_langs
+        DetectorFactory.seed = 0  # deterministic results
+        best = detect_langs(text)[0]
+    except Exception:
+        return ENGLISH
+    min_prob = getattr(settings, "CHATBOT_LANGDETECT_MIN_PROB", 0.9)
+    if best.prob < min_prob or best.lang not in _installed_languages():
+        return ENGLISH
+    return best.lang
+
+
+@lru_cache(maxsize=getattr(settings, "CHATBOT_TRANSLATION_CACHE_SIZE", 2048))
+def _translate_cached(text, src, dest):
+    translation = _get_translation(src, dest)
+    if translation is None:
+        return text
+    return translation.translate(text)
+
+
+def translate_text(text, src="auto", dest=ENGLISH):
+    """Translate offline; returns the original text if no package is installed."""
+    if not text:
+        return text
+    if src == "auto":
+        src = detect_language(text)
+    if src == dest:
+        return text
+    try:
+        return _translate_cached(text, src, dest)
+    except Exception as e:
+        print("⚠️ Translation error:", e)
+        return text
+
+
+def to_english(text, lang):
+    return translate_text(text, src=lang, dest=ENGLISH)
+
+
+def from_english(text, lang):
+    return translate_text(text, src=ENGLISH, dest=lang)
+
+
+def cache_stats():
+    info = _translate_cached.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "maxsize": info.maxsize}
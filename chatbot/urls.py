@@ -4,7 +4,10 @@ from . import views
 urlpatterns = [
     path("", views.chatbot_home, name="chatbot_home"),
     path("get-response/", views.chatbot_reply, name="chatbot_reply"),
+    path("get-response-async/", views.chatbot_reply_async, name="chatbot_reply_async"),
     path("delete-history/", views.delete_chat_history, name="delete_chat_history"),
     path("history/", views.view_chat_history, name="view_chat_history"),
+    path("history/api/", views.chat_history_api, name="chat_history_api"),
+    path("stats/", views.chatbot_stats, name="chatbot_stats"),
 
 ]
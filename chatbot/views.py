@@ -1,29 +1,86 @@
 # ai_medical_assistant/chatbot/views.py
+import asyncio
+import base64
 import json
+import threading
+from datetime import datetime
 
+from asgiref.sync import sync_to_async
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-from transformers import AutoTokenizer, AutoModelForCausalLM
-import torch
+from django.conf import settings
+from django.db.models import Q
+from django.utils import dateformat, timezone
 
+from chatbot import history_writer, memory_store, reply_cache, retrieval, translation
+from chatbot.generation_pool import PoolBusy, get_pool
 from chatbot.models import ChatHistory
+from medassist import thread_budget
+from medassist.model_manager import model_manager
 
-# --- Lazy load model only when first used ---
-tokenizer = None
-model = None
+# --- Lazy load model only when first used (and unloaded again when idle) ---
+def _load_dialogpt():
+    # torch/transformers are only needed for this backend (the ONNX one runs without them)
+    from transformers import AutoTokenizer, AutoModelForCausalLM
 
-def load_small_model():
-    """Load DialoGPT-small model only once (on demand)."""
-    global tokenizer, model
-    if tokenizer is not None and model is not None:
-        return
+    thread_budget.configure_torch()
 
     print("🔹 Loading lightweight DialoGPT-small model (lazy)...")
     tokenizer = AutoTokenizer.from_pretrained("microsoft/DialoGPT-small", cache_dir="models/")
     model = AutoModelForCausalLM.from_pretrained("microsoft/DialoGPT-small", cache_dir="models/")
     print("✅ Chatbot model ready (DialoGPT-small).")
+    return tokenizer, model
+
+
+model_manager.register("dialogpt", _load_dialogpt)
+
+
+def load_small_model():
+    """Return (tokenizer, model), loading DialoGPT-small on demand."""
+    return model_manager.get("dialogpt")
+
+
+# Decoding settings shared by both backends ("torch" or "onnx", see settings.CHATBOT_BACKEND)
+GENERATION_KWARGS = {
+    "max_length": 220,
+    "no_repeat_ngram_size": 3,
+    "top_k": 40,
+    "top_p": 0.9,
+    "temperature": 0.8,
+}
+
+
+def _generate_torch(conversation_context: str, cancel_event=None) -> str:
+    tokenizer, model = load_small_model()
+
+    extra = {}
+    if cancel_event is not None:
+        from transformers import StoppingCriteria, StoppingCriteriaList
+
+        class _Cancelled(StoppingCriteria):
+            def __call__(self, input_ids, scores, **kwargs):
+                return cancel_event.is_set()
+
+        extra["stopping_criteria"] = StoppingCriteriaList([_Cancelled()])
+
+    input_ids = tokenizer.encode(conversation_context + tokenizer.eos_token, return_tensors="pt")
+    output_ids = model.generate(
+        input_ids,
+        pad_token_id=tokenizer.eos_token_id,
+        **GENERATION_KWARGS,
+        **extra,
+    )
+    return tokenizer.decode(output_ids[:, input_ids.shape[-1]:][0], skip_special_tokens=True)
+
+
+def _generate_onnx(conversation_context: str, cancel_event=None) -> str:
+    from chatbot.onnx_backend import get_onnx_generator
+
+    generator = get_onnx_generator()
+    input_ids = generator.encode(conversation_context + "<|endoftext|>")
+    return generator.decode(generator.generate(input_ids, cancel_event=cancel_event, **GENERATION_KWARGS))
 
 
 # --- simple rule-based health advice ---
@@ -150,36 +207,39 @@ RULES = {
 }
 
 
-def generate_ai_reply(user_input: str, memory=None) -> str:
+def generate_ai_reply(user_input: str, memory=None, cancel_event=None) -> str:
     """
     Generate a context-aware short reply using DialoGPT.
     memory = list of last few messages [{message:..., response:...}]
+    cancel_event = optional threading.Event; setting it stops generation early
     """
     try:
+        # Include last 3 user-bot exchanges for better context
+        context_window = memory[-3:] if memory else []
+
+        # ♻️ Near-identical questions in the same context reuse a cached reply
+        cache_key = None
+        if getattr(settings, "CHATBOT_REPLY_CACHE", True):
+            cache_key = reply_cache.make_key(user_input, context_window, GENERATION_KWARGS)
+            cached = reply_cache.get_reply(cache_key)
+            if cached is not None:
+                return cached
+
         # 🧠 Combine memory + new message into conversation context
         conversation_context = ""
-        if memory:
-            # Include last 3 user-bot exchanges for better context
-            for chat in memory[-3:]:
-                conversation_context += f"User: {chat['message']}\nBot: {chat['response']}\n"
+        for chat in context_window:
+            conversation_context += f"User: {chat['message']}\nBot: {chat['response']}\n"
         conversation_context += f"User: {user_input}\nBot:"
 
-        # 🔹 Tokenize and generate
-        load_small_model()  # ensure model is loaded
-
-        input_ids = tokenizer.encode(conversation_context + tokenizer.eos_token, return_tensors="pt")
-
-        output_ids = model.generate(
-            input_ids,
-            max_length=220,
-            pad_token_id=tokenizer.eos_token_id,
-            no_repeat_ngram_size=3,
-            top_k=40,
-            top_p=0.9,
-            temperature=0.8,
-        )
+        # 🔹 Tokenize and generate on the configured backend
+        if getattr(settings, "CHATBOT_BACKEND", "torch") == "onnx":
+            reply = _generate_onnx(conversation_context, cancel_event)
+        else:
+            reply = _generate_torch(conversation_context, cancel_event)
 
-        reply = tokenizer.decode(output_ids[:, input_ids.shape[-1]:][0], skip_special_tokens=True)
+        # 🛑 Client went away — don't cache a truncated reply
+        if cancel_event is not None and cancel_event.is_set():
+            return ""
 
         # 🩺 Fallback reply if model gives empty output
         if not reply.strip():
@@ -187,6 +247,9 @@ def generate_ai_reply(user_input: str, memory=None) -> str:
 
         # Add disclaimer automatically
         reply += "\n\n⚕️ *Disclaimer: I'm an AI assistant, not a doctor.*"
+
+        if cache_key:
+            reply_cache.set_reply(cache_key, reply)
         return reply
 
     except Exception as e:
@@ -198,18 +261,38 @@ def chatbot_home(request):
     """Render chatbot page."""
     return render(request, "chatbot/chatbot_home.html")
 
-MAX_MEMORY = 10
+# Offline (Argos) translation — kept here for backwards-compatible imports
+translate_text = translation.translate_text
+
+
+def match_rule(user_msg):
+    """Return the first RULES reply whose keyword appears in the message."""
+    text = user_msg.lower()
+    for keyword, response in RULES.items():
+        if keyword.lower() in text:
+            return response
+    return None
+
+
+def instant_reply(user_msg):
+    """RULES substring match, then the TF-IDF retrieval tier. None means 'generate'."""
+    return match_rule(user_msg) or retrieval.answer(user_msg, RULES)
 
-from deep_translator import GoogleTranslator
 
-def translate_text(text, src='auto', dest='en'):
+def save_chat(user, user_msg, bot_reply):
+    """Persist one chat turn (user is None for guests) via the write-behind buffer."""
     try:
-        return GoogleTranslator(source=src, target=dest).translate(text)
-    except Exception:
-        return text
+        history_writer.save_turn(user, user_msg, bot_reply)
+    except Exception as e:
+        print("⚠️ Chat save error:", e)
+
+
+BUSY_REPLY = "⏳ I'm helping a lot of people right now. Please try again in a few seconds."
+
+
 @csrf_exempt
 def chatbot_reply(request):
-    """Handle AJAX chat requests — English only, fully offline."""
+    """Handle AJAX chat requests — any installed language, fully offline."""
     if request.method != "POST":
         return JsonResponse({"response": "Invalid request method."})
 
@@ -217,39 +300,100 @@ def chatbot_reply(request):
     if not user_msg:
         return JsonResponse({"response": "Please type something."})
 
-    # ✅ Session-based memory
-    memory = request.session.get("chat_memory", [])
+    # ✅ Short-term memory lives in its own store (see chatbot/memory_store.py), not the session
+    store = memory_store.get_store()
+    conv_id = memory_store.get_conversation_id(request)
+    memory_id = memory_store.scoped_id(conv_id, request.user)
+    memory = store.load(memory_id)
 
-    # 🧠 Rule-based quick replies first
-    bot_reply = None
-    for keyword, response in RULES.items():
-        if keyword.lower() in user_msg.lower():
-            bot_reply = response
-            break
+    # 🌐 Work in English internally (RULES + model), answer in the user's language
+    lang = translation.detect_language(user_msg)
+    english_msg = translation.to_english(user_msg, lang)
+
+    # 🧠 Rule-based / retrieved quick replies first
+    english_reply = instant_reply(english_msg)
 
     # 💬 If not found in RULES, use the AI model
-    if not bot_reply:
+    if not english_reply:
         try:
-            bot_reply = generate_ai_reply(user_msg, memory)
+            english_reply = generate_ai_reply(english_msg, memory)
         except Exception as e:
             print("❌ AI reply error:", e)
-            bot_reply = "⚠️ Sorry, I encountered an issue generating a response."
+            english_reply = "⚠️ Sorry, I encountered an issue generating a response."
+
+    bot_reply = translation.from_english(english_reply, lang)
 
     # 💾 Save to DB (if logged in)
-    try:
-        user = request.user if request.user.is_authenticated else None
-        ChatHistory.objects.create(user=user, message=user_msg, response=bot_reply)
-    except Exception as e:
-        print("⚠️ Chat save error:", e)
+    save_chat(request.user if request.user.is_authenticated else None, user_msg, bot_reply)
 
-    # 🧠 Update short-term memory
-    memory.append({"message": user_msg, "response": bot_reply})
-    if len(memory) > MAX_MEMORY:
-        memory = memory[-MAX_MEMORY:]
-    request.session["chat_memory"] = memory
+    # 🧠 Update short-term memory (English, since it is model context)
+    store.append(memory_id, english_msg, english_reply)
 
     # ✅ Return response
-    return JsonResponse({"response": bot_reply})
+    return memory_store.set_conversation_cookie(JsonResponse({"response": bot_reply}), conv_id)
+
+
+async def areply(user_msg, user, conv_id):
+    """
+    Full chat pipeline for async callers (HTTP view, voice WebSocket):
+    translate → RULES/retrieval → bounded-pool generation → translate back,
+    then persist the turn and update memory. Raises PoolBusy when the
+    generation queue is full; cancelling the caller cancels generation.
+    """
+    store = memory_store.get_store()
+    memory_id = memory_store.scoped_id(conv_id, user)
+    memory = await sync_to_async(store.load, thread_sensitive=False)(memory_id)
+
+    lang = await sync_to_async(translation.detect_language, thread_sensitive=False)(user_msg)
+    english_msg = await sync_to_async(translation.to_english, thread_sensitive=False)(user_msg, lang)
+
+    english_reply = await sync_to_async(instant_reply, thread_sensitive=False)(english_msg)
+
+    if not english_reply:
+        cancel_event = threading.Event()
+        future = get_pool().submit(generate_ai_reply, english_msg, memory, cancel_event)
+        try:
+            english_reply = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            cancel_event.set()
+            future.cancel()
+            raise
+        except Exception as e:
+            print("❌ AI reply error:", e)
+            english_reply = "⚠️ Sorry, I encountered an issue generating a response."
+
+    bot_reply = await sync_to_async(translation.from_english, thread_sensitive=False)(english_reply, lang)
+
+    await sync_to_async(save_chat)(user if user is not None and user.is_authenticated else None,
+                                   user_msg, bot_reply)
+    await sync_to_async(store.append, thread_sensitive=False)(memory_id, english_msg, english_reply)
+    return bot_reply
+
+
+@csrf_exempt
+async def chatbot_reply_async(request):
+    """
+    Async variant of chatbot_reply (serve via medassist/asgi.py).
+    Generation runs on the bounded pool: a full queue answers 503 right away,
+    and a client disconnect cancels the queued or running generation.
+    """
+    if request.method != "POST":
+        return JsonResponse({"response": "Invalid request method."})
+
+    user_msg = request.POST.get("message", "").strip()
+    if not user_msg:
+        return JsonResponse({"response": "Please type something."})
+
+    conv_id = memory_store.get_conversation_id(request)
+    try:
+        # Django cancels this view (and so the generation) when the client disconnects
+        bot_reply = await areply(user_msg, await request.auser(), conv_id)
+    except PoolBusy:
+        response = JsonResponse({"response": BUSY_REPLY, "busy": True}, status=503)
+        response["Retry-After"] = "5"
+        return response
+
+    return memory_store.set_conversation_cookie(JsonResponse({"response": bot_reply}), conv_id)
 
 
 @csrf_exempt
@@ -261,10 +405,11 @@ def delete_chat_history(request):
     if request.method == "POST":
         chat_id = request.POST.get("chat_id")
         user = request.user
+        history_writer.flush_pending()
 
         if chat_id == "all":
             ChatHistory.objects.filter(user=user).delete()
-            request.session["chat_memory"] = []
+            memory_store.forget(memory_store.get_conversation_id(request), user)
             return JsonResponse({"status": "success", "message": "All chat history deleted."})
 
         elif chat_id and chat_id.isdigit():
@@ -273,10 +418,91 @@ def delete_chat_history(request):
 
     return JsonResponse({"status": "error", "message": "Invalid request."})
 
+@login_required
+def chatbot_stats(request):
+    """Staff-only JSON snapshot of chatbot runtime counters."""
+    if not request.user.is_staff:
+        return JsonResponse({"status": "error", "message": "Not authorized."}, status=403)
+    return JsonResponse({
+        "reply_cache": reply_cache.cache_stats(),
+        "generation_pool": get_pool().stats(),
+        "translation_cache": translation.cache_stats(),
+        "history_writer": history_writer.get_writer().stats(),
+        "retrieval": retrieval.stats(),
+        "models": model_manager.stats(),
+        "threads": thread_budget.report(),
+    })
+
+
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 100
+
+
+def _encode_cursor(chat):
+    raw = f"{chat.timestamp.isoformat()}|{chat.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor):
+    raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+    ts, chat_id = raw.rsplit("|", 1)
+    return datetime.fromisoformat(ts), int(chat_id)
+
+
+def history_page(user, cursor=None, limit=HISTORY_PAGE_SIZE):
+    """
+    One page of a user's history, newest first, using keyset pagination on
+    (timestamp, id) — served by chat_user_ts_id_idx, so page N costs the same as page 1.
+    Returns (rows, next_cursor).
+    """
+    qs = ChatHistory.objects.filter(user=user)
+    if cursor:
+        ts, chat_id = _decode_cursor(cursor)
+        # timestamp__lte on its own lets the index seek to the cursor; the OR alone only filters
+        qs = qs.filter(timestamp__lte=ts).filter(Q(timestamp__lt=ts) | Q(timestamp=ts, id__lt=chat_id))
+    rows = list(qs.order_by("-timestamp", "-id")[:limit + 1])
+    next_cursor = _encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
 @login_required
 def view_chat_history(request):
-    """Display user's saved chat history."""
-    user = request.user
-    history = ChatHistory.objects.filter(user=user).order_by('-timestamp')
-    return render(request, "chatbot/chat_history.html", {"history": history})
+    """Display the first page of the user's saved chat history (more loads on scroll)."""
+    history_writer.flush_pending()
+    history, next_cursor = history_page(request.user)
+    return render(request, "chatbot/chat_history.html", {
+        "history": history,
+        "next_cursor": next_cursor,
+    })
+
+
+@login_required
+def chat_history_api(request):
+    """JSON page of chat history: ?cursor=<next_cursor>&limit=<n>."""
+    try:
+        limit = min(max(int(request.GET.get("limit", HISTORY_PAGE_SIZE)), 1), HISTORY_MAX_PAGE_SIZE)
+    except ValueError:
+        limit = HISTORY_PAGE_SIZE
+
+    cursor = request.GET.get("cursor") or None
+    if cursor is None:
+        history_writer.flush_pending()
+    try:
+        rows, next_cursor = history_page(request.user, cursor, limit)
+    except (ValueError, UnicodeDecodeError):
+        return JsonResponse({"status": "error", "message": "Invalid cursor."}, status=400)
+
+    return JsonResponse({
+        "status": "success",
+        "results": [
+            {
+                "id": chat.id,
+                "message": chat.message,
+                "response": chat.response,
+                "timestamp": dateformat.format(timezone.localtime(chat.timestamp), "M d, Y, g:i A"),
+            }
+            for chat in rows
+        ],
+        "next_cursor": next_cursor,
+    })
 
@@ -0,0 +1,126 @@
+# ai_medical_assistant/chatbot/voice.py
+"""
+Streaming speech input for the chatbot (Vosk, fully offline).
+
+The browser opens ``ws/chatbot/voice/`` and streams 16 kHz mono PCM16 as
+binary frames. Chunks are fed to a per-connection KaldiRecognizer while the
+user is still speaking, so partial transcripts come back in real time and
+only the last chunk remains to decode once they stop. Protocol:
+
+    client → binary PCM16 frames, then {"event": "end"} (or "cancel")
+    server → {"partial": "..."}, {"text": "..."}, {"response": "..."}
+
+The final text goes through the same pipeline as typed messages
+(views.areply: RULES/retrieval, generation pool, history, memory).
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from chatbot import memory_store
+from medassist.model_manager import model_manager
+
+SAMPLE_RATE = 16000
+MAX_CHUNK_BYTES = 64 * 1024  # ~2 s of audio per frame is plenty
+MAX_QUEUED_CHUNKS = 50
+
+
+def _load_vosk():
+    from vosk import Model, SetLogLevel
+
+    SetLogLevel(-1)
+    path = str(getattr(settings, "VOSK_MODEL_PATH", settings.BASE_DIR / "models" / "vosk-model-small-en-us-0.15"))
+    print(f"🔹 Loading Vosk model from {path}...")
+    return Model(path)
+
+
+model_manager.register("vosk", _load_vosk)
+
+
+def _new_recognizer():
+    from vosk import KaldiRecognizer
+
+    return KaldiRecognizer(model_manager.get("vosk"), SAMPLE_RATE)
+
+
+async def voice_socket(ws):
+    await ws.accept()
+    try:
+        recognizer = await sync_to_async(_new_recognizer, thread_sensitive=False)()
+    except Exception as e:
+        print("❌ Vosk model unavailable:", e)
+        await ws.send_json({"error": "Voice input is not available right now."})
+        return
+
+    # shares memory with the typed chat; without the cookie it lives as long as the socket
+    conv_id = memory_store.conversation_id_from_cookies(ws.cookies)
+
+    chunks = asyncio.Queue(maxsize=MAX_QUEUED_CHUNKS)
+    recognize = sync_to_async(recognizer.AcceptWaveform, thread_sensitive=False)
+    partial = sync_to_async(recognizer.PartialResult, thread_sensitive=False)
+    result = sync_to_async(recognizer.Result, thread_sensitive=False)
+    final = sync_to_async(recognizer.FinalResult, thread_sensitive=False)
+    reset = sync_to_async(recognizer.Reset, thread_sensitive=False)
+
+    async def recognizer_loop():
+        """Decode chunks while the receiver keeps reading the socket."""
+        segments = []  # text of segments Vosk finalized at pauses, before "end"
+        last_partial = ""
+        while True:
+            item = await chunks.get()
+            if isinstance(item, bytes):
+                if await recognize(item):
+                    # Vosk finalized a segment at a pause; its text is only available from Result()
+                    text = json.loads(await result()).get("text", "").strip()
+                    if text:
+                        segments.append(text)
+                    continue
+                text = " ".join(segments + [json.loads(await partial()).get("partial", "")]).strip()
+                if text and text != last_partial:
+                    last_partial = text
+                    await ws.send_json({"partial": text})
+                continue
+
+            last_partial = ""
+            text = " ".join(segments + [json.loads(await final()).get("text", "")]).strip()
+            segments = []
+            await reset()
+            if item == "cancel" or not text:
+                await ws.send_json({"text": ""})
+                continue
+            await ws.send_json({"text": text})
+            await _respond(ws, text, conv_id)
+
+    worker = asyncio.create_task(recognizer_loop())
+    try:
+        while True:
+            message = await ws.receive()
+            if message.get("bytes") is not None:
+                data = message["bytes"]
+                if len(data) > MAX_CHUNK_BYTES:
+                    await ws.close(code=1009)
+                    return
+                await chunks.put(data)  # backpressure: waits while decoding lags behind
+            elif message.get("text"):
+                try:
+                    event = json.loads(message["text"]).get("event")
+                except (ValueError, AttributeError):
+                    continue
+                if event in ("end", "cancel"):
+                    await chunks.put(event)
+    finally:
+        worker.cancel()
+
+
+async def _respond(ws, text, conv_id):
+    from chatbot.generation_pool import PoolBusy
+    from chatbot.views import BUSY_REPLY, areply
+
+    try:
+        reply = await areply(text, ws.user, conv_id)
+    except PoolBusy:
+        await ws.send_json({"response": BUSY_REPLY, "busy": True})
+        return
+    await ws.send_json({"response": reply})
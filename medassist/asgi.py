@@ -5,6 +5,14 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Run with an ASGI server so async views (e.g. chatbot_reply_async) don't hold
+a worker thread while the chatbot generates:
+
+    uvicorn medassist.asgi:application --workers 2
+
+WebSocket connections (streaming voice input, appointment chat) are routed by
+medassist.websocket; everything else goes to Django.
 """
 
 import os
@@ -13,4 +21,17 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'medassist.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()  # sets up Django before app imports below
+
+from appointments.routing import websocket_urlpatterns as appointments_ws  # noqa: E402
+from chatbot.routing import websocket_urlpatterns as chatbot_ws  # noqa: E402
+from medassist.websocket import WebSocketRouter  # noqa: E402
+
+websocket_application = WebSocketRouter(chatbot_ws + appointments_ws)
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "websocket":
+        await websocket_application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -0,0 +1,117 @@
+# medassist/batch_writer.py
+"""
+Write-behind buffer for append-only tables.
+
+Rows are queued in memory and written with one ``bulk_create`` every
+``batch_size`` rows or ``flush_interval_ms`` ms, whichever comes first (and
+once more at interpreter shutdown when registered with ``atexit``). A
+request pays for an in-memory append instead of a write transaction.
+"""
+import threading
+
+from django.db import OperationalError, close_old_connections, transaction
+
+
+class BatchWriter:
+    def __init__(self, model, name, batch_size=50, flush_interval_ms=500, max_pending=10000):
+        self.model = model
+        self.name = name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_pending = max_pending
+        self._pending = []
+        self._lock = threading.Lock()         # guards _pending
+        self._flush_lock = threading.Lock()   # one flush at a time
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._stats = {"rows": 0, "batches": 0, "errors": 0, "dropped": 0}
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-writer", daemon=True)
+            self._thread.start()
+
+    def add_row(self, row):
+        with self._lock:
+            self._pending.append(row)
+            pending = len(self._pending)
+            self._ensure_thread()
+        if pending >= self.max_pending:
+            self.flush()  # backpressure: the writer thread is falling behind
+        elif pending >= self.batch_size:
+            self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+    def flush(self):
+        """
+        Write everything queued so far in a single transaction.
+
+        If the batch fails because the database is busy or unreachable
+        (OperationalError), it is queued again for the next flush. Any other
+        error is blamed on the rows: they are retried one by one, and rows
+        that still fail are logged and dropped, so one bad row can't block
+        every later batch.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            try:
+                self._save(batch)
+            except OperationalError as e:
+                print(f"⚠️ {self.name} batch save error (will retry):", e)
+                self._stats["errors"] += 1
+                self._requeue(batch)
+                return 0
+            except Exception as e:
+                print(f"⚠️ {self.name} batch save error, retrying row by row:", e)
+                self._stats["errors"] += 1
+                return self._save_each(batch)
+            self._stats["rows"] += len(batch)
+            self._stats["batches"] += 1
+            return len(batch)
+
+    def _save(self, rows):
+        with transaction.atomic():
+            self.model.objects.bulk_create(rows, batch_size=500)
+
+    def _save_each(self, batch):
+        written = 0
+        for i, row in enumerate(batch):
+            try:
+                self._save([row])
+            except OperationalError as e:
+                print(f"⚠️ {self.name} batch save error (will retry):", e)
+                self._requeue(batch[i:])
+                break
+            except Exception as e:
+                print(f"⚠️ {self.name} dropped a row that can't be saved:", e)
+                self._stats["dropped"] += 1
+            else:
+                written += 1
+        self._stats["rows"] += written
+        return written
+
+    def _requeue(self, rows):
+        with self._lock:
+            # keep rows for the next attempt, but never grow past max_pending (newest win)
+            pending = rows + self._pending
+            overflow = max(0, len(pending) - self.max_pending)
+            self._pending = pending[overflow:]
+        if overflow:
+            print(f"⚠️ {self.name} dropped {overflow} queued rows past max_pending")
+            self._stats["dropped"] += overflow
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {"pending": pending, **self._stats}
@@ -0,0 +1,202 @@
+# medassist/model_manager.py
+"""
+Process-wide manager for heavyweight in-process models.
+
+Models are registered with a loader and fetched with ``get(name)``:
+
+* loads are single-flight — concurrent requests for a cold model wait on one
+  load instead of each loading their own copy;
+* last use and the RSS growth caused by each load are tracked;
+* a background sweeper unloads models idle longer than ``MODEL_IDLE_TTL``
+  seconds, and least-recently-used models whenever the recorded footprints
+  of the loaded models add up to more than ``MODEL_RSS_BUDGET_MB``. The next
+  ``get`` reloads them on demand.
+
+The budget is checked against those footprints rather than live process
+RSS: allocators rarely hand freed memory back to the OS, so RSS barely drops
+after an unload and checking it would evict every model in turn.
+
+Requests that already hold a model reference keep it alive until they finish,
+so unloading never breaks an in-flight prediction. Keras keeps global
+session state, so TensorFlow inference runs under ``keras_session.shared()``
+and ``clear_session()`` under ``keras_session.exclusive()``.
+"""
+import gc
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+def _rss_bytes():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return 0
+
+
+class SharedLock:
+    """Many holders of ``shared()`` at once, or one of ``exclusive()``; waiting writers go first."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def shared(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def exclusive(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class _Entry:
+    def __init__(self, name, loader, on_unload=None, idle_ttl=None):
+        self.name = name
+        self.loader = loader
+        self.on_unload = on_unload
+        self.idle_ttl = idle_ttl
+        self.obj = None
+        self.last_used = 0.0
+        self.footprint = 0
+        self.loads = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+
+class ModelManager:
+    def __init__(self, idle_ttl=900, rss_budget_mb=0, sweep_interval=60):
+        self.idle_ttl = idle_ttl
+        self.rss_budget = rss_budget_mb * 1024 * 1024
+        self.sweep_interval = sweep_interval
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._sweeper = None
+
+    def register(self, name, loader, on_unload=None, idle_ttl=None):
+        """Register a loader; idempotent so module reloads don't duplicate entries."""
+        with self._lock:
+            if name not in self._entries:
+                self._entries[name] = _Entry(name, loader, on_unload, idle_ttl)
+            if self._sweeper is None and self.sweep_interval > 0:
+                self._sweeper = threading.Thread(target=self._sweep_forever, name="model-sweeper", daemon=True)
+                self._sweeper.start()
+
+    def get(self, name):
+        entry = self._entries[name]
+        entry.last_used = time.monotonic()
+        obj = entry.obj
+        if obj is not None:
+            return obj
+        with entry.lock:  # single-flight load
+            if entry.obj is None:
+                before = _rss_bytes()
+                print(f"🔹 Loading model '{name}'...")
+                entry.obj = entry.loader()
+                entry.footprint = max(0, _rss_bytes() - before)
+                entry.loads += 1
+                entry.last_used = time.monotonic()
+            obj = entry.obj
+        self._enforce_budget(keep=name)
+        return obj
+
+    def unload(self, name):
+        entry = self._entries[name]
+        with entry.lock:
+            if entry.obj is None:
+                return False
+            obj, entry.obj = entry.obj, None
+            entry.evictions += 1
+        if entry.on_unload:
+            try:
+                entry.on_unload(obj)
+            except Exception as e:
+                print(f"⚠️ Unload hook for '{name}' failed:", e)
+        del obj
+        gc.collect()
+        print(f"♻️ Unloaded idle model '{name}'.")
+        return True
+
+    def _loaded(self):
+        return [e for e in self._entries.values() if e.obj is not None]
+
+    def _enforce_budget(self, keep=None):
+        """Unload least-recently-used models until their summed footprint is back under budget."""
+        if not self.rss_budget:
+            return
+        loaded = sorted(self._loaded(), key=lambda e: e.last_used)
+        total = sum(e.footprint for e in loaded)
+        for entry in loaded:
+            if total <= self.rss_budget:
+                break
+            if entry.name != keep and self.unload(entry.name):
+                total -= entry.footprint
+
+    def sweep(self):
+        now = time.monotonic()
+        for entry in self._loaded():
+            ttl = entry.idle_ttl if entry.idle_ttl is not None else self.idle_ttl
+            if ttl and now - entry.last_used > ttl:
+                self.unload(entry.name)
+        self._enforce_budget()
+
+    def _sweep_forever(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                print("⚠️ Model sweep error:", e)
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            "rss_mb": round(_rss_bytes() / 1024 / 1024, 1),
+            "rss_budget_mb": round(self.rss_budget / 1024 / 1024, 1),
+            "loaded_footprint_mb": round(sum(e.footprint for e in self._loaded()) / 1024 / 1024, 1),
+            "models": {
+                e.name: {
+                    "loaded": e.obj is not None,
+                    "idle_seconds": round(now - e.last_used, 1) if e.last_used else None,
+                    "footprint_mb": round(e.footprint / 1024 / 1024, 1),
+                    "loads": e.loads,
+                    "evictions": e.evictions,
+                }
+                for e in self._entries.values()
+            },
+        }
+
+
+keras_session = SharedLock()
+
+model_manager = ModelManager(
+    idle_ttl=getattr(settings, "MODEL_IDLE_TTL", 900),
+    rss_budget_mb=getattr(settings, "MODEL_RSS_BUDGET_MB", 0),
+    sweep_interval=getattr(settings, "MODEL_SWEEP_INTERVAL", 60),
+)
@@ -9,6 +9,13 @@ load_dotenv()
 
 HF_AUTH_TOKEN = os.getenv('HF_AUTH_TOKEN')
 
+# ✅ CPU thread budget per worker, shared by TensorFlow, PyTorch, ONNX Runtime and BLAS.
+# 0 = cpu_count // WEB_CONCURRENCY. Applied here so BLAS sees it before NumPy is imported.
+CPU_THREADS_PER_WORKER = int(os.getenv('CPU_THREADS_PER_WORKER', '0'))
+CPU_INTEROP_THREADS = int(os.getenv('CPU_INTEROP_THREADS', '1'))
+from medassist.thread_budget import apply_env_limits
+apply_env_limits(CPU_THREADS_PER_WORKER)
+
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -116,3 +123,114 @@ from django.contrib.messages import constants as messages
 MESSAGE_TAGS = {
     messages.ERROR: 'danger',
 }
+
+# ✅ Chatbot generation backend: "torch" (transformers) or "onnx" (ONNX Runtime, CPU)
+# Export the ONNX model first with: python manage.py export_chatbot_onnx
+CHATBOT_BACKEND = os.getenv('CHATBOT_BACKEND', 'torch')
+CHATBOT_ONNX_DIR = BASE_DIR / 'models' / 'onnx' / 'dialogpt-small'
+CHATBOT_ONNX_THREADS = int(os.getenv('CHATBOT_ONNX_THREADS', '0'))  # 0 = CPU_THREADS_PER_WORKER budget
+
+# ✅ Caches: "chatbot" is shared by all workers (file-based) and holds generated replies
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'chatbot': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'chatbot',
+        'TIMEOUT': 3600,
+        'OPTIONS': {'MAX_ENTRIES': 5000},  # past this size a random 1/CULL_FREQUENCY (1/3) of the files is deleted
+    },
+    # Short-term chatbot memory (kept out of the session). Needs an atomic incr and a
+    # cheap set, so per-process LocMem here; a FileBasedCache has neither
+    'chatbot_memory': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'chatbot-memory',
+        'TIMEOUT': 1800,
+        'OPTIONS': {'MAX_ENTRIES': 200000},
+    },
+}
+# Use Redis for chatbot memory with several worker processes (e.g. CHATBOT_MEMORY_REDIS_URL=redis://127.0.0.1:6379/1)
+if os.getenv('CHATBOT_MEMORY_REDIS_URL'):
+    CACHES['chatbot_memory'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('CHATBOT_MEMORY_REDIS_URL'),
+        'TIMEOUT': 1800,
+    }
+CHATBOT_REPLY_CACHE = os.getenv('CHATBOT_REPLY_CACHE', '1') == '1'
+CHATBOT_REPLY_CACHE_TTL = int(os.getenv('CHATBOT_REPLY_CACHE_TTL', '3600'))  # seconds
+
+# ✅ Bounded generation pool for the async chatbot endpoint (per process)
+CHATBOT_GENERATION_WORKERS = int(os.getenv('CHATBOT_GENERATION_WORKERS', '2'))
+CHATBOT_GENERATION_QUEUE = int(os.getenv('CHATBOT_GENERATION_QUEUE', '8'))  # waiting jobs before 503
+
+# ✅ Offline chatbot translation (Argos Translate packages must be installed)
+CHATBOT_LANGDETECT_MIN_PROB = 0.9   # below this confidence we assume English
+CHATBOT_TRANSLATION_CACHE_SIZE = 2048  # phrase translations kept in the LRU
+
+# ✅ Chat history persistence: "buffered" (write-behind bulk inserts) or "durable" (insert per turn)
+CHATBOT_HISTORY_WRITE_MODE = os.getenv('CHATBOT_HISTORY_WRITE_MODE', 'buffered')
+CHATBOT_HISTORY_BATCH_SIZE = 50      # flush after this many rows...
+CHATBOT_HISTORY_FLUSH_MS = 500       # ...or after this many milliseconds
+CHATBOT_HISTORY_MAX_PENDING = 10000  # hard cap on unflushed rows
+
+# ✅ Chatbot short-term memory (ring buffer per conversation in the "chatbot_memory" cache)
+CHATBOT_MEMORY_TURNS = 10   # exchanges kept per conversation
+CHATBOT_MEMORY_TTL = 1800   # idle seconds before a conversation is forgotten
+
+# ✅ Retrieval tier (TF-IDF over RULES, DISEASE_INFO and the FAQ) before DialoGPT generation
+CHATBOT_RETRIEVAL = True
+# Score needed to answer without generating. The held-out paraphrases in chatbot/tests.py that
+# should be answered score >= 0.52 and the out-of-scope messages <= 0.37; this sits between
+CHATBOT_RETRIEVAL_THRESHOLD = 0.45
+
+# ✅ In-process model manager (DialoGPT, ONNX chatbot, Keras disease model)
+MODEL_IDLE_TTL = int(os.getenv('MODEL_IDLE_TTL', '900'))            # unload after this many idle seconds
+MODEL_RSS_BUDGET_MB = int(os.getenv('MODEL_RSS_BUDGET_MB', '0'))    # cap on the summed load footprint of resident models; 0 = none
+MODEL_SWEEP_INTERVAL = 60                                           # seconds between idle checks
+
+# ✅ Adaptive triage (/predictions/triage/): stop asking once the top disease is this likely
+PREDICTION_TRIAGE_CONFIDENCE = 0.8
+PREDICTION_TRIAGE_MAX_QUESTIONS = 8   # confirmed + denied answers before stopping
+PREDICTION_TRIAGE_TOP_N = 3           # questions suggested per step
+
+# ✅ Prediction event log (PredictionEvent rows, written in batches off the request path)
+PREDICTION_LOG = True
+PREDICTION_LOG_TOP_K = 3
+PREDICTION_LOG_BATCH_SIZE = 100
+PREDICTION_LOG_FLUSH_MS = 1000
+PREDICTION_LOG_MAX_PENDING = 20000
+
+# ✅ Drift monitor: live symptom/class histograms vs. the training CSVs (decayed over ~HALF_LIFE predictions)
+PREDICTION_DRIFT = True
+PREDICTION_DRIFT_HALF_LIFE = 1000
+PREDICTION_DRIFT_MIN_EVENTS = 50
+
+# ✅ Shadow evaluation: score live inputs with a candidate model in the background (folder like ml_model/)
+PREDICTION_SHADOW_DIR = os.getenv('PREDICTION_SHADOW_DIR') or None
+PREDICTION_SHADOW_QUEUE = 256   # samples beyond this are dropped, never waited on
+PREDICTION_SHADOW_BATCH = 32
+
+# ✅ Appointment chat WebSocket: idle sockets re-check the DB this often (messages sent via other workers)
+APPOINTMENT_CHAT_POLL_SECONDS = 5
+APPOINTMENT_CHAT_LONGPOLL_MAX = 25   # seconds a ?wait= sync request may hold open
+
+# ✅ Doctor search: SQLite FTS5 index (users.search), ranked prefix matching, paginated
+DOCTOR_SEARCH_FTS = True
+DOCTOR_SEARCH_PAGE_SIZE = 20
+
+# ✅ "Near me" doctors/pharmacies: in-memory lat/lon grid (users.geo), refreshed from the DB when stale
+GEO_GRID_CELL_DEG = 0.1        # ≈ 11 km cells
+GEO_NEAREST_K = 20
+GEO_NEAREST_MAX_KM = None      # e.g. 50 to hide anything farther away
+GEO_INDEX_MAX_AGE = 300        # seconds; picks up profile edits made in other workers
+
+# ✅ Slot booking: how many days ahead slots are generated from doctors' weekly availability
+APPOINTMENT_SLOT_HORIZON_DAYS = 14
+
+# ✅ Doctor/patient dashboards: appointments per page in each (keyset-paginated) section
+DASHBOARD_PAGE_SIZE = 20
+APPOINTMENT_BULK_MAX = 200   # ids per bulk approve/complete/cancel request
+
+# ✅ Streaming voice input (Vosk, served over the ASGI WebSocket route ws/chatbot/voice/)
+VOSK_MODEL_PATH = os.getenv('VOSK_MODEL_PATH', str(BASE_DIR / 'models' / 'vosk-model-small-en-us-0.15'))
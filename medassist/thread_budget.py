@@ -0,0 +1,115 @@
+# medassist/thread_budget.py
+"""
+One CPU thread budget per worker process, shared by TensorFlow, PyTorch,
+ONNX Runtime and NumPy/BLAS.
+
+Left alone, each library sizes its pool to *all* cores, so one worker can run
+3x cores threads and N workers oversubscribe the machine N times over. The
+budget comes from ``CPU_THREADS_PER_WORKER`` (or cpu_count // WEB_CONCURRENCY)
+and is applied:
+
+* to BLAS/OpenMP through environment variables, from settings.py, before
+  NumPy is first imported (plus threadpoolctl if it already was);
+* to TensorFlow/PyTorch right after they are imported (``configure_tensorflow``
+  / ``configure_torch``), before they start their thread pools.
+
+This module must not import Django settings at module level (settings.py
+imports it).
+"""
+import os
+import sys
+
+BLAS_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "BLIS_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+_effective = {}
+
+
+def default_threads_per_worker():
+    workers = max(1, int(os.getenv("WEB_CONCURRENCY", "1") or 1))
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def threads_per_worker():
+    from django.conf import settings
+    return getattr(settings, "CPU_THREADS_PER_WORKER", 0) or default_threads_per_worker()
+
+
+def interop_threads():
+    from django.conf import settings
+    return getattr(settings, "CPU_INTEROP_THREADS", 1)
+
+
+def apply_env_limits(threads):
+    """Cap BLAS/OpenMP pools. Call before NumPy/TF/torch are imported."""
+    threads = threads or default_threads_per_worker()
+    for var in BLAS_ENV_VARS:
+        os.environ.setdefault(var, str(threads))  # explicit env always wins
+    _effective["budget"] = threads
+    if "numpy" in sys.modules:  # too late for env vars — limit the live pools instead
+        try:
+            from threadpoolctl import threadpool_limits
+            threadpool_limits(limits=threads)
+        except ImportError:
+            pass
+    return threads
+
+
+def configure_tensorflow(tf):
+    threads, inter = threads_per_worker(), interop_threads()
+    try:
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(inter)
+    except RuntimeError as e:  # TF runtime already initialized
+        print("⚠️ TensorFlow thread settings not applied:", e)
+    _effective["tensorflow"] = {
+        "intra_op": tf.config.threading.get_intra_op_parallelism_threads(),
+        "inter_op": tf.config.threading.get_inter_op_parallelism_threads(),
+    }
+
+
+def configure_torch():
+    import torch
+
+    threads, inter = threads_per_worker(), interop_threads()
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(inter)
+    except RuntimeError:  # can only be set once, before any inter-op work
+        pass
+    _effective["torch"] = {
+        "intra_op": torch.get_num_threads(),
+        "inter_op": torch.get_num_interop_threads(),
+    }
+
+
+def report():
+    """Effective thread settings for this process."""
+    info = {
+        "cpu_count": os.cpu_count(),
+        "budget": _effective.get("budget"),
+        "env": {var: os.environ.get(var) for var in BLAS_ENV_VARS},
+        "tensorflow": _effective.get("tensorflow"),
+        "torch": _effective.get("torch"),
+        "onnxruntime": _effective.get("onnxruntime"),
+    }
+    try:
+        from threadpoolctl import threadpool_info
+        info["blas"] = [
+            {"library": p.get("internal_api"), "num_threads": p.get("num_threads")}
+            for p in threadpool_info()
+        ]
+    except ImportError:
+        pass
+    return info
+
+
+def record(framework, values):
+    _effective[framework] = values
+
@@ -0,0 +1,120 @@
+# medassist/websocket.py
+"""
+Minimal WebSocket support on plain ASGI (no extra dependency).
+
+Routes are ordinary ``django.urls.path()`` entries whose view is an
+``async def handler(ws, **kwargs)``; ``WebSocketRouter`` resolves the scope
+path, rejects cross-origin handshakes, and hands the handler a ``WebSocket``
+wrapper with the session user already resolved.
+"""
+import json
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs, urlparse
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.urls import Resolver404
+from django.urls.resolvers import RegexPattern, URLResolver
+
+
+class WebSocketDisconnect(Exception):
+    """Raised by WebSocket.receive() when the client goes away."""
+
+
+class WebSocket:
+    def __init__(self, scope, receive, send):
+        self.scope = scope
+        self._receive = receive
+        self._send = send
+        self.closed = False
+        self.user = None
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        self.headers = headers
+        cookie = SimpleCookie()
+        cookie.load(headers.get("cookie", ""))
+        self.cookies = {key: morsel.value for key, morsel in cookie.items()}
+        self.query = {k: v[-1] for k, v in parse_qs(scope.get("query_string", b"").decode()).items()}
+
+    async def accept(self):
+        await self._send({"type": "websocket.accept"})
+
+    async def close(self, code=1000):
+        if not self.closed:
+            self.closed = True
+            await self._send({"type": "websocket.close", "code": code})
+
+    async def receive(self):
+        """Next message as ``{"text": ...}`` or ``{"bytes": ...}``."""
+        message = await self._receive()
+        if message["type"] == "websocket.disconnect":
+            self.closed = True
+            raise WebSocketDisconnect(message.get("code"))
+        return message
+
+    async def send_text(self, text):
+        await self._send({"type": "websocket.send", "text": text})
+
+    async def send_json(self, data):
+        await self.send_text(json.dumps(data))
+
+
+def _origin_allowed(ws):
+    """Block cross-site WebSocket hijacking: Origin must match Host (or CSRF_TRUSTED_ORIGINS)."""
+    origin = ws.headers.get("origin")
+    if not origin:
+        return True  # non-browser client
+    if origin in getattr(settings, "CSRF_TRUSTED_ORIGINS", []):
+        return True
+    return urlparse(origin).netloc == ws.headers.get("host")
+
+
+async def get_user(ws):
+    """The authenticated user for the session cookie (or AnonymousUser)."""
+    from importlib import import_module
+
+    from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+    from django.contrib.auth.models import AnonymousUser
+    from django.utils.crypto import constant_time_compare
+
+    session_key = ws.cookies.get(settings.SESSION_COOKIE_NAME)
+    if not session_key:
+        return AnonymousUser()
+    store = import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+    user_id = await store.aget(SESSION_KEY)
+    backend = await store.aget(BACKEND_SESSION_KEY)
+    if user_id is None or backend not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+    user = await get_user_model()._default_manager.filter(pk=user_id).afirst()
+    if user is None or not user.is_active:
+        return AnonymousUser()
+    session_hash = await store.aget(HASH_SESSION_KEY)
+    if not session_hash or not constant_time_compare(session_hash, await sync_to_async(user.get_session_auth_hash)()):
+        return AnonymousUser()
+    return user
+
+
+class WebSocketRouter:
+    def __init__(self, urlpatterns):
+        self.resolver = URLResolver(RegexPattern(r"^/"), urlpatterns)
+
+    async def __call__(self, scope, receive, send):
+        ws = WebSocket(scope, receive, send)
+        try:
+            match = self.resolver.resolve(scope["path"])
+        except Resolver404:
+            match = None
+
+        first = await receive()  # websocket.connect
+        if first["type"] != "websocket.connect":
+            return
+        if match is None or not _origin_allowed(ws):
+            await ws.close(code=4403)
+            return
+
+        ws.user = await get_user(ws)
+        try:
+            await match.func(ws, **match.kwargs)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            await ws.close()
@@ -4,6 +4,7 @@ from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST
 from django.contrib import messages
 
+from users import geo
 from users.models import Medicine, PharmacyProfile
 from .models import Order
 
@@ -11,8 +12,19 @@ from .models import Order
 @login_required
 def pharmacy_marketplace(request):
     medicines = Medicine.objects.select_related("pharmacy").order_by("name")
+
+    near = geo.parse_point(request.GET)
+    if near:
+        # Medicines from the k nearest pharmacies with a location (users.geo), closest store first
+        distance = {pharmacy_id: round(km, 1) for km, pharmacy_id in geo.pharmacies.nearest(*near)}
+        medicines = list(medicines.filter(pharmacy_id__in=distance))
+        for med in medicines:
+            med.distance_km = distance[med.pharmacy_id]
+        medicines.sort(key=lambda med: med.distance_km)  # stable: names stay sorted per store
+
     return render(request, "pharmacy/marketplace.html", {
         "medicines": medicines,
+        "near": bool(near),
     })
 
 
@@ -174,6 +186,15 @@ def edit_pharmacy_profile(request):
         if qr_file:
             profile.upi_qr = qr_file
 
+        # optional store location for "near me"; both blank clears it
+        point = geo.parse_point(request.POST, "latitude", "longitude")
+        if point:
+            profile.latitude, profile.longitude = point
+        elif not (request.POST.get("latitude") or request.POST.get("longitude")):
+            profile.latitude = profile.longitude = None
+        else:
+            messages.warning(request, "Location ignored: latitude/longitude were not valid.")
+
         profile.save()
         messages.success(request, "Pharmacy profile updated successfully.")
         return redirect('pharmacy_dashboard')
@@ -0,0 +1,152 @@
+# predictions/disease_info.py
+# === Disease Information ===
+# Covers all 32 diseases from your dataset
+DISEASE_INFO = {
+    "Allergy": {
+        "causes": ["Exposure to allergens (dust, pollen, pet dander, etc.)"],
+        "prevention": ["Avoid known allergens", "Keep windows closed during pollen season"],
+        "dos": ["Use prescribed antihistamines", "Stay hydrated", "Shower after exposure"],
+        "donts": ["Do not ignore breathing difficulty", "Avoid strong perfumes or smoke"],
+        "home_remedies": ["Saline nasal rinse", "Steam inhalation", "Cool compress for itchy eyes"]
+    },
+    "Anemia": {
+        "causes": ["Iron deficiency", "Vitamin B12 or folate deficiency"],
+        "prevention": ["Eat iron-rich foods", "Take supplements if prescribed"],
+        "dos": ["Include leafy greens, meat, beans, and vitamin C"],
+        "donts": ["Avoid skipping meals", "Do not self-medicate iron"],
+        "home_remedies": ["Spinach, dates, pomegranate, and jaggery help boost hemoglobin"]
+    },
+    "Anxiety Disorder": {
+        "causes": ["Stress, trauma, chemical imbalance, genetics"],
+        "prevention": ["Stress management", "Sleep hygiene", "Therapy"],
+        "dos": ["Practice meditation, exercise regularly"],
+        "donts": ["Avoid caffeine and alcohol", "Don't isolate yourself"],
+        "home_remedies": ["Deep breathing, herbal teas like chamomile, journaling"]
+    },
+    "Appendicitis": {
+        "causes": ["Infection or obstruction of appendix"],
+        "prevention": ["No known prevention — prompt diagnosis is key"],
+        "dos": ["Seek immediate medical help if pain worsens"],
+        "donts": ["Do not self-treat or ignore severe abdominal pain"],
+        "home_remedies": ["None — medical attention is essential"]
+    },
+    "Arthritis": {
+        "causes": ["Joint inflammation due to wear, infection, or autoimmune causes"],
+        "prevention": ["Maintain healthy weight", "Stay active"],
+        "dos": ["Gentle exercises, warm compresses"],
+        "donts": ["Avoid overexertion", "Do not skip medications"],
+        "home_remedies": ["Turmeric milk, hot baths, omega-3 rich diet"]
+    },
+    "Asthma": {
+        "causes": ["Inflammation of airways triggered by allergens or pollution"],
+        "prevention": ["Avoid dust, smoke, and strong odors"],
+        "dos": ["Use inhalers regularly as prescribed"],
+        "donts": ["Do not stop medication abruptly"],
+        "home_remedies": ["Steam inhalation, ginger tea, avoid cold air"]
+    },
+    "Bronchitis": {
+        "causes": ["Viral or bacterial infection of airways"],
+        "prevention": ["Avoid smoking, cold air, and pollution"],
+        "dos": ["Drink fluids, use humidifier, rest"],
+        "donts": ["Avoid smoking or irritants"],
+        "home_remedies": ["Honey, turmeric milk, steam therapy"]
+    },
+    "COVID-19": {
+        "causes": ["SARS-CoV-2 virus infection"],
+        "prevention": ["Masking, hand hygiene, vaccination"],
+        "dos": ["Isolate, monitor oxygen, consult doctor if severe"],
+        "donts": ["Avoid public contact if symptomatic"],
+        "home_remedies": ["Steam inhalation, warm fluids, zinc and vitamin C-rich diet"]
+    },
+    "Chickenpox": {
+        "causes": ["Varicella-zoster virus"],
+        "prevention": ["Vaccination"],
+        "dos": ["Rest, keep hydrated, cool baths"],
+        "donts": ["Avoid scratching lesions"],
+        "home_remedies": ["Oatmeal baths, calamine lotion, neem leaves"]
+    },
+    "Chronic Fatigue Syndrome": {
+        "causes": ["Unknown; linked to viral infections and immune issues"],
+        "prevention": ["Healthy lifestyle, stress management"],
+        "dos": ["Rest, gradual physical activity"],
+        "donts": ["Avoid overexertion"],
+        "home_remedies": ["Balanced nutrition, meditation"]
+    },
+    "Common Cold": {
+        "causes": ["Rhinovirus infection"],
+        "prevention": ["Wash hands often", "Avoid crowds"],
+        "dos": ["Hydrate, rest, vitamin C intake"],
+        "donts": ["Avoid antibiotics"],
+        "home_remedies": ["Honey, ginger tea, salt-water gargle"]
+    },
+    "Dengue": {
+        "causes": ["Dengue virus via Aedes mosquitoes"],
+        "prevention": ["Avoid mosquito bites", "Remove stagnant water"],
+        "dos": ["Hydration, rest, monitor for warning signs"],
+        "donts": ["Avoid painkillers like aspirin or ibuprofen"],
+        "home_remedies": ["Papaya leaf juice, coconut water, fluids"]
+    },
+    "Depression": {
+        "causes": ["Chemical imbalance, trauma, chronic stress"],
+        "prevention": ["Therapy, social interaction, sleep hygiene"],
+        "dos": ["Stay connected, exercise, seek help"],
+        "donts": ["Avoid alcohol and isolation"],
+        "home_remedies": ["Sunlight, journaling, omega-3 foods"]
+    },
+    "Diabetes": {
+        "causes": ["Insulin resistance or deficiency"],
+        "prevention": ["Healthy diet, weight control"],
+        "dos": ["Monitor blood sugar regularly"],
+        "donts": ["Avoid sugary and processed foods"],
+        "home_remedies": ["Bitter gourd juice, fenugreek water"]
+    },
+    "Flu": {
+        "causes": ["Influenza virus"],
+        "prevention": ["Flu shot, hygiene"],
+        "dos": ["Rest, hydration, fever control"],
+        "donts": ["Avoid going out while sick"],
+        "home_remedies": ["Warm soups, steam inhalation"]
+    },
+    "Gastroenteritis": {
+        "causes": ["Viral/bacterial infection from contaminated food or water"],
+        "prevention": ["Hand hygiene, clean water"],
+        "dos": ["ORS, hydration, bland diet"],
+        "donts": ["Avoid dairy or oily foods"],
+        "home_remedies": ["Coconut water, ginger tea, banana"]
+    },
+    "Hypertension": {
+        "causes": ["Genetic, lifestyle, stress"],
+        "prevention": ["Exercise, reduce salt"],
+        "dos": ["Monitor BP, take medications regularly"],
+        "donts": ["Avoid salty food and alcohol"],
+        "home_remedies": ["Garlic, hibiscus tea, meditation"]
+    },
+    "Migraine": {
+        "causes": ["Neurological triggers like stress, dehydration, hormones"],
+        "prevention": ["Identify and avoid triggers"],
+        "dos": ["Rest, hydration, pain management"],
+        "donts": ["Avoid caffeine excess and bright lights"],
+        "home_remedies": ["Cold compress, peppermint oil, quiet room"]
+    },
+    "Pneumonia": {
+        "causes": ["Bacterial or viral infection of lungs"],
+        "prevention": ["Vaccination, hygiene"],
+        "dos": ["Rest, antibiotics if prescribed"],
+        "donts": ["Avoid smoking and cold exposure"],
+        "home_remedies": ["Steam, ginger tea, fluids"]
+    },
+    "Tuberculosis": {
+        "causes": ["Mycobacterium tuberculosis infection"],
+        "prevention": ["BCG vaccine, early detection"],
+        "dos": ["Complete TB treatment course"],
+        "donts": ["Avoid stopping meds early"],
+        "home_remedies": ["Nutrient-rich foods, sunlight exposure"]
+    },
+    "Unknown": {
+        "causes": ["Unclear symptom combination"],
+        "prevention": ["General hygiene, healthy habits"],
+        "dos": ["Consult a doctor"],
+        "donts": ["Avoid self-diagnosis"],
+        "home_remedies": ["Rest, fluids, balanced diet"]
+    }
+}
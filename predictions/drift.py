@@ -0,0 +1,149 @@
+# predictions/drift.py
+"""
+Input/prediction drift against the training distribution.
+
+Training marginals (per-symptom frequency, class frequency) are computed
+once from predictions/data/*.csv. Live traffic updates exponentially-decayed
+histograms in O(features + classes) per prediction — no rescans of the event
+log — so the comparison tracks roughly the last ``PREDICTION_DRIFT_HALF_LIFE``
+predictions:
+
+* per-symptom PSI (present/absent bins) and their mean → input drift;
+* PSI and KL(live ‖ train) of the predicted-class histogram → output drift.
+
+PSI < 0.1 is usually read as stable, 0.1–0.25 as moderate, > 0.25 as
+significant drift. Counters are per process; with several workers each one
+sees a random share of the traffic, which estimates the same distributions.
+"""
+import threading
+
+import numpy as np
+from django.conf import settings
+
+from predictions.training_data import load_training_frame
+
+EPS = 1e-4
+MODERATE, SIGNIFICANT = 0.1, 0.25
+
+
+def psi(live, expected):
+    live, expected = np.clip(live, EPS, None), np.clip(expected, EPS, None)
+    return (live - expected) * np.log(live / expected)
+
+
+def kl(p, q):
+    p, q = np.clip(p, EPS, None), np.clip(q, EPS, None)
+    p, q = p / p.sum(), q / q.sum()
+    return float((p * np.log(p / q)).sum())
+
+
+def status(value):
+    return "significant" if value > SIGNIFICANT else "moderate" if value > MODERATE else "stable"
+
+
+class DriftMonitor:
+    def __init__(self, symptoms, classes, half_life=1000, min_events=50):
+        df = load_training_frame()
+        self.symptoms = list(symptoms)
+        self.index = {s: i for i, s in enumerate(self.symptoms)}
+        self.classes = [str(c) for c in classes]
+        columns = [s for s in self.symptoms if s in df.columns]
+        self.train_symptoms = np.zeros(len(self.symptoms))
+        self.train_symptoms[[self.symptoms.index(c) for c in columns]] = df[columns].mean().values
+        self.train_classes = (
+            df["disease"].value_counts(normalize=True).reindex(self.classes).fillna(0.0).values
+        )
+
+        self.decay = 0.5 ** (1.0 / half_life) if half_life else 1.0
+        self.min_events = min_events
+        self._symptom_counts = np.zeros(len(self.symptoms))
+        self._class_counts = np.zeros(len(self.classes))
+        self._weight = 0.0   # decayed number of events
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def observe(self, symptom_idx, class_idx):
+        """Record one prediction: indices of the selected symptoms and of the predicted class."""
+        with self._lock:
+            self._symptom_counts *= self.decay
+            self._class_counts *= self.decay
+            self._weight = self._weight * self.decay + 1.0
+            self._symptom_counts[symptom_idx] += 1.0
+            self._class_counts[class_idx] += 1.0
+            self._total += 1
+
+    def report(self):
+        with self._lock:
+            weight, total = self._weight, self._total
+            live_symptoms = self._symptom_counts / weight if weight else self._symptom_counts.copy()
+            live_classes = self._class_counts / weight if weight else self._class_counts.copy()
+
+        expected = self.train_symptoms
+        per_symptom = psi(live_symptoms, expected) + psi(1 - live_symptoms, 1 - expected)
+        input_psi = float(per_symptom.mean())
+        output_psi = float(psi(live_classes, self.train_classes).sum())
+
+        top = np.argsort(-per_symptom)[:5]
+        return {
+            "events": total,
+            "warming_up": total < self.min_events,
+            "input_psi": round(input_psi, 4),
+            "input_status": status(input_psi),
+            "output_psi": round(output_psi, 4),
+            "output_kl": round(kl(live_classes, self.train_classes), 4) if weight else 0.0,
+            "output_status": status(output_psi),
+            "top_symptoms": [
+                {
+                    "symptom": self.symptoms[i],
+                    "psi": round(float(per_symptom[i]), 4),
+                    "live": round(float(live_symptoms[i]), 3),
+                    "train": round(float(expected[i]), 3),
+                }
+                for i in top
+            ],
+        }
+
+
+_monitor = None
+_monitor_lock = threading.Lock()
+
+
+def get_monitor(symptoms=None, classes=None):
+    """The process-wide monitor; created by the first prediction (needs symptoms and classes)."""
+    global _monitor
+    if _monitor is None and symptoms is not None:
+        with _monitor_lock:
+            if _monitor is None:
+                _monitor = DriftMonitor(
+                    symptoms, classes,
+                    half_life=getattr(settings, "PREDICTION_DRIFT_HALF_LIFE", 1000),
+                    min_events=getattr(settings, "PREDICTION_DRIFT_MIN_EVENTS", 50),
+                )
+    return _monitor
+
+
+def observe(selected, symptoms, classes, class_idx):
+    if not getattr(settings, "PREDICTION_DRIFT", True):
+        return
+    monitor = get_monitor(symptoms, classes)
+    monitor.observe([monitor.index[s] for s in selected if s in monitor.index], class_idx)
+
+
+def report():
+    """Drift report, or None before this process has made any prediction."""
+    monitor = get_monitor()
+    return monitor.report() if monitor is not None else None
+
+
+def prometheus_metrics(r):
+    lines = [
+        "# TYPE prediction_drift_events counter",
+        f"prediction_drift_events {r['events']}",
+        "# TYPE prediction_input_drift_psi gauge",
+        f"prediction_input_drift_psi {r['input_psi']}",
+        "# TYPE prediction_output_drift_psi gauge",
+        f"prediction_output_drift_psi {r['output_psi']}",
+        "# TYPE prediction_output_drift_kl gauge",
+        f"prediction_output_drift_kl {r['output_kl']}",
+    ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,144 @@
+# predictions/event_log.py
+"""
+Compact log of every disease prediction.
+
+Each prediction becomes one PredictionEvent row — symptom bitmask, model
+version, top-k classes/probabilities packed into a few bytes, latency and
+user — queued on a write-behind BatchWriter, so logging costs the request an
+in-memory append (microseconds) rather than a DB transaction.
+
+``read_events()`` returns the log as NumPy arrays for analysis:
+
+    >>> ev = read_events(since=timezone.now() - timedelta(days=7))
+    >>> ev["symptoms"].mean(axis=0)            # per-symptom frequency
+    >>> np.bincount(ev["top_idx"][:, 0])       # predicted-class histogram
+"""
+import atexit
+import hashlib
+import os
+import threading
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from medassist.batch_writer import BatchWriter
+from predictions.models import PredictionEvent
+
+_writer = None
+_writer_lock = threading.Lock()
+_versions = {}
+
+
+def model_version(path):
+    """Short content hash of the model file, recomputed only when the file changes."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return "unknown"
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    version = _versions.get(key)
+    if version is None:
+        digest = hashlib.sha1()
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                digest.update(chunk)
+        version = _versions[key] = digest.hexdigest()[:12]
+    return version
+
+
+def symptom_mask(selected, symptoms):
+    index = {s: i for i, s in enumerate(symptoms)}
+    mask = 0
+    for s in selected:
+        i = index.get(s)
+        if i is not None and i < 63:  # BigIntegerField holds 63 bits
+            mask |= 1 << i
+    return mask
+
+
+def pack_top_k(probs, k):
+    top = np.argsort(probs)[::-1][:k]
+    return top.astype("<u2").tobytes() + probs[top].astype("<f4").tobytes()
+
+
+def unpack_top_k(blob):
+    k = len(blob) // 6
+    return np.frombuffer(blob, "<u2", k, 0), np.frombuffer(blob, "<f4", k, 2 * k)
+
+
+def get_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = BatchWriter(
+                    PredictionEvent, "prediction-log",
+                    batch_size=getattr(settings, "PREDICTION_LOG_BATCH_SIZE", 100),
+                    flush_interval_ms=getattr(settings, "PREDICTION_LOG_FLUSH_MS", 1000),
+                    max_pending=getattr(settings, "PREDICTION_LOG_MAX_PENDING", 20000),
+                )
+                atexit.register(_writer.flush)
+    return _writer
+
+
+def log_prediction(selected, symptoms, probs, version, latency_ms, user=None):
+    if not getattr(settings, "PREDICTION_LOG", True):
+        return
+    get_writer().add_row(PredictionEvent(
+        timestamp=timezone.now(),  # rows reach the DB up to a flush interval later
+        user_id=user.pk if user is not None and user.is_authenticated else None,
+        symptom_mask=symptom_mask(selected, symptoms),
+        model_version=version,
+        top_k=pack_top_k(probs, getattr(settings, "PREDICTION_LOG_TOP_K", 3)),
+        latency_ms=latency_ms,
+    ))
+
+
+def flush_pending():
+    if _writer is not None:
+        _writer.flush()
+
+
+def read_events(since=None, until=None, user=None, version=None, n_symptoms=63):
+    """
+    Logged predictions as column arrays:
+
+    ``timestamp`` datetime64[us] (UTC), ``user_id`` int64 (-1 = anonymous),
+    ``symptom_mask`` uint64, ``symptoms`` bool (n, n_symptoms),
+    ``model_version`` str, ``top_idx`` int16 (n, k; -1 padded),
+    ``top_prob`` float32 (n, k; 0 padded), ``latency_ms`` float32.
+    """
+    flush_pending()
+    qs = PredictionEvent.objects.order_by("id")
+    if since is not None:
+        qs = qs.filter(timestamp__gte=since)
+    if until is not None:
+        qs = qs.filter(timestamp__lt=until)
+    if user is not None:
+        qs = qs.filter(user=user)
+    if version is not None:
+        qs = qs.filter(model_version=version)
+    rows = list(qs.values_list("timestamp", "user_id", "symptom_mask", "model_version", "top_k", "latency_ms"))
+
+    n = len(rows)
+    k = max((len(r[4]) // 6 for r in rows), default=0)
+    top_idx = np.full((n, k), -1, dtype=np.int16)
+    top_prob = np.zeros((n, k), dtype=np.float32)
+    for i, r in enumerate(rows):
+        idx, prob = unpack_top_k(bytes(r[4]))
+        top_idx[i, :len(idx)] = idx
+        top_prob[i, :len(prob)] = prob
+
+    masks = np.array([r[2] for r in rows], dtype=np.uint64)
+    bits = np.arange(n_symptoms, dtype=np.uint64)
+    return {
+        "timestamp": np.array([r[0].replace(tzinfo=None) for r in rows], dtype="datetime64[us]"),
+        "user_id": np.array([r[1] if r[1] is not None else -1 for r in rows], dtype=np.int64),
+        "symptom_mask": masks,
+        "symptoms": ((masks[:, None] >> bits) & np.uint64(1)).astype(bool),
+        "model_version": np.array([r[3] for r in rows], dtype=str),
+        "top_idx": top_idx,
+        "top_prob": top_prob,
+        "latency_ms": np.array([r[5] for r in rows], dtype=np.float32),
+    }
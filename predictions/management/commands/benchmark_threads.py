@@ -0,0 +1,106 @@
+# predictions/management/commands/benchmark_threads.py
+import multiprocessing as mp
+import os
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from medassist import thread_budget
+
+
+class Command(BaseCommand):
+    help = ("Compare throughput of N concurrent worker processes with unrestricted thread pools "
+            "vs. the per-worker CPU thread budget.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="Concurrent worker processes (like WEB_CONCURRENCY).")
+        parser.add_argument("--seconds", type=float, default=5.0, help="Measurement window per run.")
+        parser.add_argument("--size", type=int, default=256, help="Matrix size for the matmul workload.")
+        parser.add_argument("--workload", choices=["numpy", "tensorflow", "torch"], default="numpy")
+        parser.add_argument("--threads", type=int, default=0,
+                            help="Threads per worker for the budgeted run (default: cpu_count // workers).")
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+        budget = options["threads"] or max(1, (os.cpu_count() or 1) // workers)
+
+        self.stdout.write(f"Effective settings in this process: {thread_budget.report()}")
+        self.stdout.write(f"{workers} workers × {options['workload']} matmul {options['size']}², "
+                          f"{options['seconds']}s each run, {os.cpu_count()} CPUs")
+
+        runs = [("unrestricted (all cores each)", 0), (f"budget {budget} thread(s)/worker", budget)]
+        for label, threads in runs:
+            ops, latencies = self._run(workers, threads, options)
+            lat = sorted(latencies)
+            p95 = lat[int(0.95 * (len(lat) - 1))] * 1000 if lat else 0.0
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {label} =="))
+            self.stdout.write(f"throughput: {ops / options['seconds']:.1f} ops/s   "
+                              f"latency ms: median {statistics.median(lat) * 1000 if lat else 0:.2f}  p95 {p95:.2f}")
+
+    def _run(self, workers, threads, options):
+        ctx = mp.get_context("spawn")  # fresh interpreters, so env limits apply before BLAS loads
+        ready, results, start = ctx.Queue(), ctx.Queue(), ctx.Event()
+        procs = [
+            ctx.Process(target=_benchmark_worker,
+                        args=(threads, options["workload"], options["seconds"], options["size"],
+                              ready, start, results))
+            for _ in range(workers)
+        ]
+        env_backup = {var: os.environ.pop(var, None) for var in thread_budget.BLAS_ENV_VARS}
+        try:
+            for p in procs:
+                p.start()
+        finally:
+            for var, value in env_backup.items():
+                if value is not None:
+                    os.environ[var] = value
+        for _ in procs:
+            ready.get()
+        start.set()
+        total_ops, latencies = 0, []
+        for _ in procs:
+            ops, lat = results.get()
+            total_ops += ops
+            latencies.extend(lat)
+        for p in procs:
+            p.join()
+        time.sleep(0.2)
+        return total_ops, latencies
+
+
+def _benchmark_worker(threads, workload, seconds, size, ready, start, results):
+    """Benchmark child process: set the thread limits, then loop a matmul."""
+    if threads:
+        for var in thread_budget.BLAS_ENV_VARS:
+            os.environ[var] = str(threads)
+
+    if workload == "tensorflow":
+        import tensorflow as tf
+        if threads:
+            tf.config.threading.set_intra_op_parallelism_threads(threads)
+            tf.config.threading.set_inter_op_parallelism_threads(1)
+        a = tf.random.uniform((size, size))
+        step = lambda: tf.linalg.matmul(a, a).numpy()  # noqa: E731
+    elif workload == "torch":
+        import torch
+        if threads:
+            torch.set_num_threads(threads)
+        a = torch.rand(size, size)
+        step = lambda: torch.mm(a, a)  # noqa: E731
+    else:
+        import numpy as np
+        a = np.random.rand(size, size)
+        step = lambda: a @ a  # noqa: E731
+
+    step()  # warm-up
+    ready.put(True)
+    start.wait()  # all workers start together, like a burst of concurrent requests
+    ops, latencies = 0, []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        step()
+        latencies.append(time.perf_counter() - t0)
+        ops += 1
+    results.put((ops, latencies))
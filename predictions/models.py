@@ -0,0 +1,16 @@
+from django.db import models
+from django.conf import settings
+from django.utils import timezone
+
+
+class PredictionEvent(models.Model):
+    """One disease prediction, append-only and compact (see predictions/event_log.py)."""
+    timestamp = models.DateTimeField(default=timezone.now, db_index=True)  # set at prediction time, not at flush
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    symptom_mask = models.BigIntegerField()          # bit i = SYMPTOMS[i] selected
+    model_version = models.CharField(max_length=16)  # short hash of disease_model.h5
+    top_k = models.BinaryField()                     # k × uint16 class index, then k × float32 probability
+    latency_ms = models.FloatField()
+
+    def __str__(self):
+        return f"Prediction {self.pk} ({self.model_version}) at {self.timestamp:%Y-%m-%d %H:%M:%S}"
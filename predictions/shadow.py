@@ -0,0 +1,158 @@
+# predictions/shadow.py
+"""
+Shadow evaluation of a candidate disease model on live traffic.
+
+With ``PREDICTION_SHADOW_DIR`` set (a folder laid out like ml_model/, i.e.
+``disease_model.h5`` and optionally its own ``scaler.pkl`` /
+``label_encoder.pkl``), every prediction's feature row is handed to a
+background thread with ``put_nowait``, together with the active model's
+answer and the time its model call took in the request — the active model
+is never run a second time. The thread scores queued rows with the
+candidate in batches of up to ``PREDICTION_SHADOW_BATCH`` and records
+agreement, confidence delta and latency. The two latencies are not the same
+kind of call: the active one is the request's explain batch (2^n symptom
+subsets), the candidate's is per row of a shadow batch. When the queue is
+full the sample is dropped (and counted) — shadow work never blocks or
+slows a request.
+
+The candidate is loaded through the model manager, so it is unloaded when
+idle like the active model.
+"""
+import queue
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+from django.conf import settings
+
+from medassist.model_manager import keras_session, model_manager
+
+ACTIVE_MODEL = "disease_model"
+SHADOW_MODEL = "disease_model_shadow"
+
+
+class ShadowEvaluator:
+    def __init__(self, max_queue=256, batch_size=32):
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stats = {
+            "submitted": 0, "dropped": 0, "scored": 0, "agreed": 0, "batches": 0, "errors": 0,
+            "confidence_delta_sum": 0.0, "active_ms_sum": 0.0, "candidate_ms_sum": 0.0,
+        }
+        self._disagreements = Counter()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="prediction-shadow", daemon=True)
+            self._thread.start()
+
+    def submit(self, x_row, active_label, active_confidence, active_ms):
+        """Queue one unscaled feature row with the active model's answer and latency; never blocks."""
+        with self._lock:
+            self._stats["submitted"] += 1
+            self._ensure_thread()
+        try:
+            self._queue.put_nowait((x_row, active_label, active_confidence, active_ms))
+        except queue.Full:
+            with self._lock:
+                self._stats["dropped"] += 1
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._score(batch)
+            except Exception as e:
+                print("⚠️ Shadow evaluation error:", e)
+                with self._lock:
+                    self._stats["errors"] += 1
+
+    @staticmethod
+    def _timed_predict(model, scaler, batch):
+        """(probs, ms per row) for the batch's feature rows, aligned to ``scaler``."""
+        n_features = scaler.n_features_in_
+        x = np.zeros((len(batch), n_features), dtype=np.float32)
+        for i, (row, *_rest) in enumerate(batch):
+            width = min(n_features, row.shape[-1])
+            x[i, :width] = row.reshape(-1)[:width]
+        started = time.perf_counter()
+        with keras_session.shared():
+            probs = np.asarray(model(scaler.transform(x).astype(np.float32), training=False))
+        return probs, (time.perf_counter() - started) * 1000 / len(batch)
+
+    def _score(self, batch):
+        model, scaler, label_encoder = model_manager.get(SHADOW_MODEL)
+        probs, per_row_ms = self._timed_predict(model, scaler, batch)
+
+        labels = label_encoder.inverse_transform(probs.argmax(axis=1))
+        confidences = probs.max(axis=1)
+        with self._lock:
+            s = self._stats
+            s["batches"] += 1
+            for (_row, active_label, active_conf, active_ms), label, conf in zip(batch, labels, confidences):
+                s["scored"] += 1
+                s["active_ms_sum"] += active_ms
+                s["candidate_ms_sum"] += per_row_ms
+                s["confidence_delta_sum"] += float(conf) - active_conf
+                if str(label) == str(active_label):
+                    s["agreed"] += 1
+                else:
+                    self._disagreements[(str(active_label), str(label))] += 1
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            disagreements = self._disagreements.most_common(10)
+        scored = s["scored"] or 1
+        return {
+            "queue": self._queue.qsize(),
+            "submitted": s["submitted"],
+            "dropped": s["dropped"],
+            "scored": s["scored"],
+            "batches": s["batches"],
+            "errors": s["errors"],
+            "agreement": round(s["agreed"] / scored, 4) if s["scored"] else None,
+            "mean_confidence_delta": round(s["confidence_delta_sum"] / scored, 4),
+            "active_ms_per_request": round(s["active_ms_sum"] / scored, 3),
+            "candidate_ms_per_row": round(s["candidate_ms_sum"] / scored, 3),
+            "top_disagreements": [
+                {"active": a, "candidate": c, "count": n} for (a, c), n in disagreements
+            ],
+        }
+
+
+_evaluator = None
+_evaluator_lock = threading.Lock()
+
+
+def enabled():
+    return bool(getattr(settings, "PREDICTION_SHADOW_DIR", None))
+
+
+def get_evaluator():
+    global _evaluator
+    if _evaluator is None:
+        with _evaluator_lock:
+            if _evaluator is None:
+                _evaluator = ShadowEvaluator(
+                    max_queue=getattr(settings, "PREDICTION_SHADOW_QUEUE", 256),
+                    batch_size=getattr(settings, "PREDICTION_SHADOW_BATCH", 32),
+                )
+    return _evaluator
+
+
+def submit(x_row, active_label, active_confidence, active_ms):
+    if enabled():
+        get_evaluator().submit(x_row, active_label, active_confidence, active_ms)
+
+
+def stats():
+    return get_evaluator().stats() if enabled() else None
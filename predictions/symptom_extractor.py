@@ -0,0 +1,241 @@
+# predictions/symptom_extractor.py
+"""
+Free-text symptom extraction for the disease predictor.
+
+    >>> get_extractor().extract("I've had a fever and a dry cough, no rash")
+    Extraction(symptoms=['fever', 'cough'], negated=['rash'])
+    >>> get_extractor().extract("my temperature is normal")
+    Extraction(symptoms=[], negated=['fever'])
+
+All symptom names and synonyms are compiled into ONE regex alternation
+(longest phrase first), so a message is scanned once regardless of how many
+phrases there are; negation is resolved with three more precompiled scans
+(cues before the symptom, "normal"-style cues around it, clause boundaries)
+plus a bisect per match. Typical chat messages take a few microseconds, so
+it is cheap enough to run on every chat turn.
+
+Like disease_info.py this module does not import TensorFlow, so the chatbot
+can use it too.
+"""
+import bisect
+import csv
+import glob
+import os
+import re
+import threading
+from collections import namedtuple
+
+import numpy as np
+from django.conf import settings
+
+DATA_FOLDER = os.path.join(settings.BASE_DIR, 'predictions', 'data')
+
+# Extra phrasings per CSV column; the column name itself ("sore_throat" → "sore throat")
+# is always matched too.
+SYNONYMS = {
+    "fever": ["feverish", "high temperature", "temperature", "pyrexia", "febrile"],
+    "chills": ["shivering", "shivers", "feeling cold", "rigors"],
+    "sweating": ["sweats", "night sweats", "sweaty", "perspiring"],
+    "cough": ["coughing", "dry cough", "wet cough", "productive cough"],
+    "sore_throat": ["throat pain", "scratchy throat", "painful swallowing", "throat hurts", "throat is sore"],
+    "runny_nose": ["running nose", "nose is running", "rhinorrhea", "dripping nose"],
+    "nasal_congestion": ["blocked nose", "stuffy nose", "stuffed nose", "congested nose", "congestion"],
+    "shortness_of_breath": ["short of breath", "breathless", "breathlessness", "difficulty breathing",
+                            "trouble breathing", "hard to breathe", "can't breathe", "cannot breathe"],
+    "wheezing": ["wheeze", "wheezy", "whistling breath"],
+    "chest_pain": ["pain in my chest", "pain in the chest", "chest hurts", "chest ache"],
+    "fatigue": ["tired", "tiredness", "exhausted", "exhaustion", "worn out", "lethargic", "no energy"],
+    "weakness": ["weak", "feeble", "lack of strength"],
+    "headache": ["headaches", "head ache", "head hurts", "head pain", "head is pounding"],
+    "migraine_like_pain": ["migraine", "migraines", "throbbing headache", "one sided headache"],
+    "dizziness": ["dizzy", "lightheaded", "light headed", "vertigo", "head spinning", "head is spinning"],
+    "nausea": ["nauseous", "nauseated", "queasy", "feel like throwing up", "want to throw up"],
+    "vomiting": ["vomit", "vomited", "throwing up", "threw up", "puking"],
+    "diarrhea": ["diarrhoea", "loose stools", "loose motions", "watery stools"],
+    "abdominal_pain": ["stomach ache", "stomachache", "stomach pain", "belly pain", "tummy ache",
+                       "stomach cramps", "abdominal cramps", "stomach hurts"],
+    "loss_of_appetite": ["no appetite", "not hungry", "poor appetite", "lost my appetite"],
+    "body_pain": ["body ache", "body aches", "aching all over", "whole body hurts"],
+    "joint_pain": ["joints hurt", "aching joints", "painful joints", "arthralgia"],
+    "muscle_ache": ["muscle aches", "muscle pain", "sore muscles", "myalgia"],
+    "rash": ["rashes", "skin rash", "red spots", "hives", "spots on my skin"],
+    "itching": ["itchy", "itch", "pruritus"],
+    "eye_redness": ["red eyes", "red eye", "redness in my eyes", "bloodshot eyes", "pink eye"],
+    "loss_of_taste_or_smell": ["loss of taste", "loss of smell", "can't taste", "can't smell",
+                               "lost my sense of taste", "lost my sense of smell", "no sense of smell"],
+    "urinary_frequency": ["frequent urination", "urinating often", "urinating frequently",
+                          "peeing a lot", "pee a lot", "passing urine frequently"],
+    "burning_urination": ["burning when urinating", "burning while urinating", "burning when i pee",
+                          "painful urination", "dysuria", "burns when i pee"],
+    "bleeding": ["bleed", "bleeds", "blood loss"],
+    "sweeling_limbs": ["swollen legs", "swollen arms", "swollen limbs", "swollen ankles", "swollen feet",
+                       "swelling in my legs", "swelling of legs", "limb swelling", "swelling limbs"],
+    "back_pain": ["backache", "back ache", "lower back pain", "back hurts"],
+    "constipation": ["constipated", "hard stools"],
+    "anxiety": ["anxious", "nervous", "panic attacks", "panicky"],
+    "depression": ["depressed", "feeling low", "hopeless", "sad all the time"],
+    "memory_loss": ["forgetful", "forgetting things", "can't remember", "poor memory"],
+    "sleep_disturbance": ["insomnia", "can't sleep", "cannot sleep", "trouble sleeping", "sleep problems",
+                          "poor sleep", "sleeplessness"],
+    "blurred_vision": ["blurry vision", "blurry eyes", "vision is blurry", "can't see clearly"],
+    "ear_pain": ["earache", "ear ache", "ear hurts"],
+    "skin_peeling": ["peeling skin", "flaky skin", "skin flaking", "skin is peeling"],
+    "sensitivity_to_light": ["light sensitivity", "photophobia", "light hurts my eyes"],
+    "dehydration": ["dehydrated", "very thirsty", "dry mouth"],
+    "palpitations": ["heart racing", "racing heart", "pounding heart", "heart pounding",
+                     "fluttering heart", "irregular heartbeat"],
+    "chest_tightness": ["tight chest", "tightness in my chest", "chest feels tight"],
+    "swelling": ["swollen", "puffiness", "puffy"],
+}
+
+# A cue negates symptoms that follow it in the same clause, up to NEGATION_SCOPE words later
+NEGATION_CUES = [
+    "no", "not", "never", "without", "denies", "deny", "denied", "free of", "absence of",
+    "negative for", "don't have", "do not have", "doesn't have", "does not have",
+    "haven't had", "have not had", "hasn't had", "didn't have", "did not have",
+]
+CLAUSE_BREAKS = r"[.;:!?,]|\b(?:but|however|although|though|except|yet)\b"
+NEGATION_SCOPE = 5
+
+# A normal-value cue negates a symptom just before it in the same clause ("my temperature is
+# normal", "breathing is fine"), or right after it ("normal temperature"); "not normal" does not
+NORMAL_CUES = ["normal", "fine", "ok", "okay", "gone", "went away", "resolved", "settled"]
+NORMAL_SCOPE = 3
+_NORMAL_FLIP_RE = re.compile(r"(?:\b(?:not|never|no|hardly)|n't)\s+$")
+
+Extraction = namedtuple("Extraction", ["symptoms", "negated"])
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def _phrase_pattern(phrase):
+    words = phrase.lower().replace("_", " ").split()
+    return r"\s+".join(re.escape(w) for w in words)
+
+
+def _normalize(text):
+    return text.lower().replace("’", "'")
+
+
+class SymptomExtractor:
+    def __init__(self, symptoms, synonyms=SYNONYMS):
+        self.symptoms = list(symptoms)
+        self.index = {name: i for i, name in enumerate(self.symptoms)}
+
+        phrases = {}
+        for name in self.symptoms:
+            if name.startswith("feature_"):  # placeholder column added to match the scaler
+                continue
+            for phrase in [name.replace("_", " ")] + synonyms.get(name, []):
+                phrases.setdefault(" ".join(phrase.lower().split()), name)
+        self._phrase_to_symptom = phrases
+
+        # Longest first, so "swollen legs" wins over "swollen" and "dry cough" over "cough"
+        ordered = sorted(phrases, key=len, reverse=True)
+        self._symptom_re = re.compile(
+            r"\b(?:" + "|".join(_phrase_pattern(p) for p in ordered) + r")\b"
+        )
+        self._cue_re = re.compile(
+            r"\b(?:" + "|".join(_phrase_pattern(c) for c in sorted(NEGATION_CUES, key=len, reverse=True)) + r")\b"
+        )
+        self._normal_re = re.compile(
+            r"\b(?:" + "|".join(_phrase_pattern(c) for c in sorted(NORMAL_CUES, key=len, reverse=True)) + r")\b"
+        )
+        self._break_re = re.compile(CLAUSE_BREAKS)
+
+    def extract(self, text):
+        """Symptoms mentioned in ``text`` (first-mention order) and those explicitly negated."""
+        text = _normalize(text or "")
+        matches = [(m.start(), m.end(), m.group()) for m in self._symptom_re.finditer(text)]
+        if not matches:
+            return Extraction([], [])
+
+        # Cues inside a symptom phrase ("not hungry", "can't sleep") are part of the symptom
+        cues = []
+        spans = iter(matches)
+        span = next(spans, None)
+        for m in self._cue_re.finditer(text):
+            while span is not None and span[1] <= m.start():
+                span = next(spans, None)
+            if span is None or m.end() <= span[0]:
+                cues.append(m.end())
+        breaks = [m.start() for m in self._break_re.finditer(text)]
+        normals = [
+            (m.start(), m.end()) for m in self._normal_re.finditer(text)
+            if not _NORMAL_FLIP_RE.search(text, max(0, m.start() - 12), m.start())
+        ]
+
+        present, negated = {}, {}
+        for start, end, phrase in matches:
+            name = self._phrase_to_symptom.get(" ".join(phrase.split()))
+            if name is None:
+                continue
+            if self._is_negated(text, start, cues, breaks) or self._is_normal(text, start, end, normals, breaks):
+                negated.setdefault(name, None)
+            else:
+                present.setdefault(name, None)
+        return Extraction(list(present), [n for n in negated if n not in present])
+
+    @staticmethod
+    def _is_negated(text, start, cues, breaks):
+        i = bisect.bisect_right(cues, start) - 1
+        if i < 0:
+            return False
+        cue_end = cues[i]
+        b = bisect.bisect_right(breaks, start) - 1
+        if b >= 0 and breaks[b] >= cue_end:
+            return False  # clause boundary between the cue and the symptom
+        return len(_WORD_RE.findall(text, cue_end, start)) <= NEGATION_SCOPE
+
+    @staticmethod
+    def _is_normal(text, start, end, normals, breaks):
+        i = bisect.bisect_left(normals, (end,))
+        if i < len(normals):  # "temperature is normal"
+            cue_start = normals[i][0]
+            b = bisect.bisect_left(breaks, end)
+            if (b == len(breaks) or breaks[b] >= cue_start) and \
+                    len(_WORD_RE.findall(text, end, cue_start)) <= NORMAL_SCOPE:
+                return True
+        # "normal temperature": the cue directly precedes the symptom
+        return i > 0 and not text[normals[i - 1][1]:start].strip()
+
+    def vector(self, symptoms):
+        """Binary feature row (1, n_symptoms) for a list of symptom names."""
+        x = np.zeros((1, len(self.symptoms)), dtype=np.float32)
+        for name in symptoms:
+            i = self.index.get(name)
+            if i is not None:
+                x[0, i] = 1.0
+        return x
+
+    def features(self, text):
+        """Free text → (Extraction, feature row ready for the scaler/model)."""
+        found = self.extract(text)
+        return found, self.vector(found.symptoms)
+
+
+def symptom_names():
+    """Feature columns from the first training CSV header (same source as predictions.views)."""
+    files = sorted(glob.glob(os.path.join(DATA_FOLDER, "*.csv")))
+    if not files:
+        raise FileNotFoundError("No CSV found in predictions/data/")
+    with open(files[0], newline="", encoding="utf-8") as fh:
+        header = next(csv.reader(fh))
+    return [c for c in header if c != "disease"]
+
+
+_extractors = {}
+_lock = threading.Lock()
+
+
+def get_extractor(symptoms=None):
+    """Shared extractor for a symptom list (default: the CSV columns); compiled once."""
+    key = tuple(symptoms) if symptoms is not None else None
+    extractor = _extractors.get(key)
+    if extractor is None:
+        with _lock:
+            extractor = _extractors.get(key)
+            if extractor is None:
+                extractor = SymptomExtractor(symptoms if symptoms is not None else symptom_names())
+                _extractors[key] = extractor
+    return extractor
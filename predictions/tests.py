@@ -0,0 +1,92 @@
+from datetime import timedelta
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from predictions import event_log, shadow, triage
+from predictions.models import PredictionEvent
+from predictions.symptom_extractor import SYNONYMS, SymptomExtractor
+
+
+class PredictionEventTimestampTests(TestCase):
+    def test_timestamp_is_prediction_time_not_flush_time(self):
+        queued = []
+        predicted_at = timezone.now() - timedelta(seconds=30)
+        writer = mock.Mock(add_row=queued.append)
+        with mock.patch.object(event_log, "get_writer", return_value=writer), \
+                mock.patch.object(event_log.timezone, "now", return_value=predicted_at):
+            event_log.log_prediction(["fever"], ["fever", "cough"], np.array([0.7, 0.3]), "v1", 4.2)
+
+        PredictionEvent.objects.bulk_create(queued)  # what the BatchWriter does on flush, later
+        self.assertEqual(PredictionEvent.objects.get().timestamp, predicted_at)
+
+
+class ShadowEvaluatorTests(TestCase):
+    def test_scoring_uses_the_active_output_from_the_request(self):
+        scaler = mock.Mock(n_features_in_=2, transform=lambda x: x)
+        encoder = mock.Mock(inverse_transform=lambda idx: np.array(["Flu", "Cold"])[idx])
+        candidate = mock.Mock(return_value=np.array([[0.2, 0.8], [0.9, 0.1]]))
+        evaluator = shadow.ShadowEvaluator()
+        batch = [(np.array([[1, 0]]), "Cold", 0.6, 12.0), (np.array([[0, 1]]), "Cold", 0.7, 8.0)]
+        with mock.patch.object(shadow.model_manager, "get", return_value=(candidate, scaler, encoder)) as get:
+            evaluator._score(batch)
+
+        get.assert_called_once_with(shadow.SHADOW_MODEL)  # the active model is not run again
+        stats = evaluator.stats()
+        self.assertEqual((stats["scored"], stats["agreement"]), (2, 0.5))
+        self.assertEqual(stats["active_ms_per_request"], 10.0)
+        self.assertAlmostEqual(stats["mean_confidence_delta"], 0.2)
+
+
+class SymptomNegationTests(SimpleTestCase):
+    extractor = SymptomExtractor(list(SYNONYMS))
+
+    def extract(self, text):
+        return self.extractor.extract(text)
+
+    def test_negated_and_normal_values_are_not_symptoms(self):
+        for text in ["no fever", "not feverish", "without fever", "my temperature is normal",
+                     "normal temperature", "my fever went away"]:
+            with self.subTest(text=text):
+                self.assertEqual(self.extract(text), ([], ["fever"]))
+
+    def test_scope_ends_at_the_clause(self):
+        self.assertEqual(self.extract("no fever but a bad cough"), (["cough"], ["fever"]))
+        self.assertEqual(self.extract("i have a headache and my temperature is fine"), (["headache"], ["fever"]))
+        self.assertEqual(self.extract("i feel fine but have a fever"), (["fever"], []))
+
+    def test_not_normal_is_a_symptom(self):
+        for text in ["my temperature is not normal", "my temperature isn't normal"]:
+            with self.subTest(text=text):
+                self.assertEqual(self.extract(text), (["fever"], []))
+
+
+class TriageInformationGainTests(SimpleTestCase):
+    def next_questions(self, likelihood, probs, **kwargs):
+        n_classes, n_symptoms = likelihood.shape
+        symptoms = [f"s{i}" for i in range(n_symptoms)]
+        model = mock.Mock(return_value=probs[None, :])
+        scaler = mock.Mock(n_features_in_=n_symptoms, transform=lambda x: x)
+        encoder = mock.Mock(classes_=np.array([f"d{i}" for i in range(n_classes)]))
+        with mock.patch.object(triage, "get_stats", return_value=mock.Mock(likelihood=likelihood)):
+            return triage.next_questions(model, scaler, encoder, symptoms, **kwargs)
+
+    def test_information_gain_is_never_negative(self):
+        rng = np.random.default_rng(0)
+        for trial in range(50):
+            likelihood = rng.uniform(0.01, 0.99, size=(6, 12))
+            probs = rng.dirichlet(np.ones(6))
+            step = self.next_questions(likelihood, probs, confirmed=["s0"], denied=["s1"],
+                                       top_n=12, confidence=1.1)
+            with self.subTest(trial=trial):
+                self.assertEqual(len(step["questions"]), 10)
+                self.assertTrue(all(q["information_gain"] >= 0 for q in step["questions"]))
+                self.assertLessEqual(step["questions"][0]["information_gain"], step["entropy"])
+
+    def test_discriminating_symptom_ranks_first(self):
+        likelihood = np.array([[0.5, 0.5, 0.95], [0.5, 0.5, 0.05]])
+        step = self.next_questions(likelihood, np.array([0.5, 0.5]), confirmed=[], top_n=3)
+        self.assertEqual(step["questions"][0]["symptom"], "s2")
+        self.assertAlmostEqual(step["questions"][-1]["information_gain"], 0.0)
@@ -0,0 +1,30 @@
+# predictions/training_data.py
+"""The training CSVs in predictions/data/, loaded once per process (no TensorFlow)."""
+import glob
+import os
+import threading
+
+import pandas as pd
+from django.conf import settings
+
+DATA_FOLDER = os.path.join(settings.BASE_DIR, 'predictions', 'data')
+
+_frame = None
+_lock = threading.Lock()
+
+
+def load_training_frame():
+    """All CSVs concatenated, like train_multi_final.load_all_csvs (symptom NaNs → 0)."""
+    global _frame
+    if _frame is None:
+        with _lock:
+            if _frame is None:
+                files = sorted(glob.glob(os.path.join(DATA_FOLDER, "*.csv")))
+                if not files:
+                    raise FileNotFoundError("No CSV found in predictions/data/")
+                df = pd.concat([pd.read_csv(f) for f in files], ignore_index=True)
+                symptoms = [c for c in df.columns if c != "disease"]
+                df[symptoms] = df[symptoms].fillna(0).astype(float)
+                df["disease"] = df["disease"].astype(str)
+                _frame = df
+    return _frame
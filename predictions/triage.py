@@ -0,0 +1,126 @@
+# predictions/triage.py
+"""
+Adaptive symptom questioning: pick the next symptom to ask about.
+
+For the symptoms confirmed so far, every remaining candidate is scored by
+expected information gain about the disease:
+
+    IG(s) = H(P) - [ p(s) * H(P | s present) + (1 - p(s)) * H(P | s absent) ]
+
+* P — the model's output for the current answers (one forward pass).
+* P | s present / absent — P times P(s|d) or 1 - P(s|d), each normalized,
+  with per-disease symptom frequencies precomputed once from the training
+  CSVs; all candidates at once as (k, n_classes) arrays.
+* p(s) = Σ_d P(d) P(s|d), the predictive probability of a "yes".
+
+Both branches are updates of the same P with the same likelihoods, so P is
+exactly their p(s)-weighted mixture and IG is the mutual information
+between the answer and the disease — never negative. Symptoms the patient
+has denied are folded in as the same Bayes factor. The model is passed in,
+so this module does not import TensorFlow.
+"""
+import threading
+import time
+
+import numpy as np
+
+from medassist.model_manager import keras_session
+from predictions.training_data import load_training_frame
+
+
+def entropy(p, axis=-1):
+    p = np.clip(p, 1e-12, 1.0)
+    return -(p * np.log2(p)).sum(axis=axis)
+
+
+def _normalize(p):
+    return p / p.sum(axis=-1, keepdims=True)
+
+
+class SymptomStats:
+    """P(symptom | disease) from the training CSVs, rows in label-encoder order."""
+
+    def __init__(self, symptoms, classes):
+        df = load_training_frame()
+        columns = [s for s in symptoms if s in df.columns]
+        grouped = df[columns].groupby(df["disease"])
+
+        counts = grouped.sum().reindex([str(c) for c in classes]).fillna(0.0)
+        totals = grouped.size().reindex([str(c) for c in classes]).fillna(0.0)
+
+        likelihood = np.full((len(classes), len(symptoms)), 0.5)  # no data → uninformative
+        col = [symptoms.index(c) for c in columns]
+        # Laplace smoothing so one unseen symptom never zeroes out a disease
+        likelihood[:, col] = (counts.values + 1.0) / (totals.values[:, None] + 2.0)
+        self.likelihood = likelihood
+
+
+_stats = {}
+_lock = threading.Lock()
+
+
+def get_stats(symptoms, classes):
+    key = (tuple(symptoms), tuple(str(c) for c in classes))
+    stats = _stats.get(key)
+    if stats is None:
+        with _lock:
+            stats = _stats.get(key)
+            if stats is None:
+                stats = _stats[key] = SymptomStats(list(symptoms), list(classes))
+    return stats
+
+
+def next_questions(model, scaler, label_encoder, symptoms, confirmed, denied=(), top_n=3,
+                   confidence=0.8, max_questions=8):
+    """
+    Rank the next symptoms to ask about. ``confirmed`` / ``denied`` are
+    symptom names; returns the current top diagnoses, the ranked questions
+    (empty once ``done``) and the time spent.
+    """
+    started = time.perf_counter()
+    classes = label_encoder.classes_
+    stats = get_stats(symptoms, classes)
+    index = {s: i for i, s in enumerate(symptoms)}
+    n_features = scaler.n_features_in_
+
+    confirmed_idx = [index[s] for s in confirmed if s in index and index[s] < n_features]
+    denied_idx = [index[s] for s in denied if s in index and index[s] < n_features]
+    asked = set(confirmed_idx) | set(denied_idx)
+    candidates = np.array([i for i in range(n_features)
+                           if i not in asked and not symptoms[i].startswith("feature_")], dtype=int)
+
+    x = np.zeros((1, n_features), dtype=np.float32)
+    x[:, confirmed_idx] = 1.0
+    with keras_session.shared():
+        current = np.asarray(model(scaler.transform(x).astype(np.float32), training=False), dtype=np.float64)[0]
+
+    # Fold denied symptoms in as a Bayes factor
+    absent = 1.0 - stats.likelihood  # (n_classes, n_symptoms)
+    current = _normalize(current * absent[:, denied_idx].prod(axis=1) if denied_idx else current)
+
+    done = not len(candidates) or current.max() >= confidence or len(asked) >= max_questions
+    questions = []
+    if not done:
+        present = stats.likelihood[:, candidates].T                              # (k, n_classes)
+        p_present = present @ current                                            # (k,)
+        if_present = _normalize(current[None, :] * present)
+        if_absent = _normalize(current[None, :] * (1.0 - present))
+        expected = p_present * entropy(if_present) + (1.0 - p_present) * entropy(if_absent)
+        gain = np.maximum(entropy(current) - expected, 0.0)  # ≥ 0 up to rounding
+        for k in np.argsort(-gain)[:top_n]:
+            questions.append({
+                "symptom": symptoms[candidates[k]],
+                "information_gain": round(float(gain[k]), 4),
+                "p_present": round(float(p_present[k]), 3),
+            })
+
+    top = np.argsort(-current)[:3]
+    return {
+        "done": bool(done),
+        "questions": questions,
+        "predictions": [
+            {"disease": str(classes[i]), "probability": round(float(current[i]), 4)} for i in top
+        ],
+        "entropy": round(float(entropy(current)), 4),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
@@ -4,5 +4,10 @@ from . import views
 urlpatterns = [
     path('predict/', views.predict_disease, name='predict_disease'),
     path('result/', views.predict_disease, name='result'),
+    path('extract-symptoms/', views.extract_symptoms_api, name='extract_symptoms_api'),
+    path('predict-api/', views.predict_api, name='predict_api'),
+    path('triage/', views.triage_api, name='triage_api'),
+    path('drift/', views.drift_report, name='prediction_drift'),
+    path('shadow/', views.shadow_report, name='prediction_shadow'),
     path('manage/', views.manage_health, name='manage_health'),
 ]
@@ -1,6 +1,8 @@
 # predictions/views.py
 import glob
+import json
 import os
+import time
 import joblib
 import numpy as np
 import tensorflow as tf
@@ -9,9 +11,17 @@ from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
 from django.conf import settings
 from django.contrib import messages
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
 import os, joblib, tensorflow as tf, pandas as pd, numpy as np
 from django.conf import settings
 from analytics.models import HealthRecord
+from medassist import thread_budget
+from medassist.model_manager import keras_session, model_manager
+from predictions import drift, event_log, explain, shadow, triage
+from predictions.symptom_extractor import get_extractor, symptom_names
+
+thread_budget.configure_tensorflow(tf)
 
 
 # === Paths ===
@@ -22,189 +32,108 @@ SCALER_PKL = os.path.join(settings.BASE_DIR, 'predictions', 'ml_model', 'scaler.
 DATA_FOLDER = os.path.join(settings.BASE_DIR, 'predictions', 'data')
 
 # === Load model and preprocessors ===
-_model, _scaler, _label_encoder, SYMPTOMS = None, None, None, []
+# The Keras model is owned by the model manager (unloaded when idle, reloaded on demand);
+# scaler, encoder and symptom list are small and stay resident.
+_scaler, _label_encoder, SYMPTOMS = None, None, []
 
-def load_artifacts():
-    """Load model, scaler, encoder, and symptoms from CSV with auto feature alignment."""
-    global _model, _scaler, _label_encoder, SYMPTOMS
-    if _model and _scaler and _label_encoder and SYMPTOMS:
-        return _model, _scaler, _label_encoder, SYMPTOMS
+def _clear_keras_session():
+    # clear_session resets global Keras state; never while another thread is predicting
+    with keras_session.exclusive():
+        tf.keras.backend.clear_session()
+
+
+model_manager.register(
+    shadow.ACTIVE_MODEL,
+    lambda: tf.keras.models.load_model(MODEL_H5),
+    on_unload=lambda _model: _clear_keras_session(),
+)
+
+def _load_shadow_model():
+    """Candidate model for shadow evaluation, with its own scaler/encoder when present."""
+    shadow_dir = settings.PREDICTION_SHADOW_DIR
+    scaler, label_encoder, _symptoms = load_preprocessors()
+    scaler_pkl = os.path.join(shadow_dir, 'scaler.pkl')
+    label_pkl = os.path.join(shadow_dir, 'label_encoder.pkl')
+    return (
+        tf.keras.models.load_model(os.path.join(shadow_dir, 'disease_model.h5')),
+        joblib.load(scaler_pkl) if os.path.exists(scaler_pkl) else scaler,
+        joblib.load(label_pkl) if os.path.exists(label_pkl) else label_encoder,
+    )
+
+
+model_manager.register(
+    shadow.SHADOW_MODEL,
+    _load_shadow_model,
+    on_unload=lambda _model: _clear_keras_session(),
+)
+
+
+def load_preprocessors():
+    """Load scaler, encoder, and symptoms from CSV with auto feature alignment (no Keras model)."""
+    global _scaler, _label_encoder, SYMPTOMS
+    if _scaler and _label_encoder and SYMPTOMS:
+        return _scaler, _label_encoder, SYMPTOMS
 
     # Load artifacts
-    _model = tf.keras.models.load_model(MODEL_H5)
     _scaler = joblib.load(SCALER_PKL)
     _label_encoder = joblib.load(LABEL_PKL)
 
     # Load symptoms from first CSV
-    files = sorted(glob.glob(os.path.join(DATA_FOLDER, "*.csv")))
-    if not files:
-        raise FileNotFoundError("No CSV found in predictions/data/")
-    df = pd.read_csv(files[0])
-    SYMPTOMS = [c for c in df.columns if c != "disease"]
+    symptoms = symptom_names()
 
     # Align features with model input
-    expected_features = getattr(_scaler, "n_features_in_", len(SYMPTOMS))
-    if len(SYMPTOMS) > expected_features:
-        print(f"[WARN] Trimming {len(SYMPTOMS) - expected_features} extra symptoms.")
-        SYMPTOMS = SYMPTOMS[:expected_features]
-    elif len(SYMPTOMS) < expected_features:
-        print(f"[WARN] Padding with {expected_features - len(SYMPTOMS)} placeholder features.")
-        while len(SYMPTOMS) < expected_features:
-            SYMPTOMS.append(f"feature_{len(SYMPTOMS)+1}")
+    expected_features = getattr(_scaler, "n_features_in_", len(symptoms))
+    if len(symptoms) > expected_features:
+        print(f"[WARN] Trimming {len(symptoms) - expected_features} extra symptoms.")
+        symptoms = symptoms[:expected_features]
+    elif len(symptoms) < expected_features:
+        print(f"[WARN] Padding with {expected_features - len(symptoms)} placeholder features.")
+        while len(symptoms) < expected_features:
+            symptoms.append(f"feature_{len(symptoms)+1}")
+    SYMPTOMS = symptoms
+
+    return _scaler, _label_encoder, SYMPTOMS
+
+
+def load_artifacts():
+    """Load model, scaler, encoder, and symptoms."""
+    _model = model_manager.get(shadow.ACTIVE_MODEL)
+    return (_model, *load_preprocessors())
 
-    return _model, _scaler, _label_encoder, SYMPTOMS
 
 # === Disease Information ===
-# Covers all 32 diseases from your dataset
-DISEASE_INFO = {
-    "Allergy": {
-        "causes": ["Exposure to allergens (dust, pollen, pet dander, etc.)"],
-        "prevention": ["Avoid known allergens", "Keep windows closed during pollen season"],
-        "dos": ["Use prescribed antihistamines", "Stay hydrated", "Shower after exposure"],
-        "donts": ["Do not ignore breathing difficulty", "Avoid strong perfumes or smoke"],
-        "home_remedies": ["Saline nasal rinse", "Steam inhalation", "Cool compress for itchy eyes"]
-    },
-    "Anemia": {
-        "causes": ["Iron deficiency", "Vitamin B12 or folate deficiency"],
-        "prevention": ["Eat iron-rich foods", "Take supplements if prescribed"],
-        "dos": ["Include leafy greens, meat, beans, and vitamin C"],
-        "donts": ["Avoid skipping meals", "Do not self-medicate iron"],
-        "home_remedies": ["Spinach, dates, pomegranate, and jaggery help boost hemoglobin"]
-    },
-    "Anxiety Disorder": {
-        "causes": ["Stress, trauma, chemical imbalance, genetics"],
-        "prevention": ["Stress management", "Sleep hygiene", "Therapy"],
-        "dos": ["Practice meditation, exercise regularly"],
-        "donts": ["Avoid caffeine and alcohol", "Don't isolate yourself"],
-        "home_remedies": ["Deep breathing, herbal teas like chamomile, journaling"]
-    },
-    "Appendicitis": {
-        "causes": ["Infection or obstruction of appendix"],
-        "prevention": ["No known prevention — prompt diagnosis is key"],
-        "dos": ["Seek immediate medical help if pain worsens"],
-        "donts": ["Do not self-treat or ignore severe abdominal pain"],
-        "home_remedies": ["None — medical attention is essential"]
-    },
-    "Arthritis": {
-        "causes": ["Joint inflammation due to wear, infection, or autoimmune causes"],
-        "prevention": ["Maintain healthy weight", "Stay active"],
-        "dos": ["Gentle exercises, warm compresses"],
-        "donts": ["Avoid overexertion", "Do not skip medications"],
-        "home_remedies": ["Turmeric milk, hot baths, omega-3 rich diet"]
-    },
-    "Asthma": {
-        "causes": ["Inflammation of airways triggered by allergens or pollution"],
-        "prevention": ["Avoid dust, smoke, and strong odors"],
-        "dos": ["Use inhalers regularly as prescribed"],
-        "donts": ["Do not stop medication abruptly"],
-        "home_remedies": ["Steam inhalation, ginger tea, avoid cold air"]
-    },
-    "Bronchitis": {
-        "causes": ["Viral or bacterial infection of airways"],
-        "prevention": ["Avoid smoking, cold air, and pollution"],
-        "dos": ["Drink fluids, use humidifier, rest"],
-        "donts": ["Avoid smoking or irritants"],
-        "home_remedies": ["Honey, turmeric milk, steam therapy"]
-    },
-    "COVID-19": {
-        "causes": ["SARS-CoV-2 virus infection"],
-        "prevention": ["Masking, hand hygiene, vaccination"],
-        "dos": ["Isolate, monitor oxygen, consult doctor if severe"],
-        "donts": ["Avoid public contact if symptomatic"],
-        "home_remedies": ["Steam inhalation, warm fluids, zinc and vitamin C-rich diet"]
-    },
-    "Chickenpox": {
-        "causes": ["Varicella-zoster virus"],
-        "prevention": ["Vaccination"],
-        "dos": ["Rest, keep hydrated, cool baths"],
-        "donts": ["Avoid scratching lesions"],
-        "home_remedies": ["Oatmeal baths, calamine lotion, neem leaves"]
-    },
-    "Chronic Fatigue Syndrome": {
-        "causes": ["Unknown; linked to viral infections and immune issues"],
-        "prevention": ["Healthy lifestyle, stress management"],
-        "dos": ["Rest, gradual physical activity"],
-        "donts": ["Avoid overexertion"],
-        "home_remedies": ["Balanced nutrition, meditation"]
-    },
-    "Common Cold": {
-        "causes": ["Rhinovirus infection"],
-        "prevention": ["Wash hands often", "Avoid crowds"],
-        "dos": ["Hydrate, rest, vitamin C intake"],
-        "donts": ["Avoid antibiotics"],
-        "home_remedies": ["Honey, ginger tea, salt-water gargle"]
-    },
-    "Dengue": {
-        "causes": ["Dengue virus via Aedes mosquitoes"],
-        "prevention": ["Avoid mosquito bites", "Remove stagnant water"],
-        "dos": ["Hydration, rest, monitor for warning signs"],
-        "donts": ["Avoid painkillers like aspirin or ibuprofen"],
-        "home_remedies": ["Papaya leaf juice, coconut water, fluids"]
-    },
-    "Depression": {
-        "causes": ["Chemical imbalance, trauma, chronic stress"],
-        "prevention": ["Therapy, social interaction, sleep hygiene"],
-        "dos": ["Stay connected, exercise, seek help"],
-        "donts": ["Avoid alcohol and isolation"],
-        "home_remedies": ["Sunlight, journaling, omega-3 foods"]
-    },
-    "Diabetes": {
-        "causes": ["Insulin resistance or deficiency"],
-        "prevention": ["Healthy diet, weight control"],
-        "dos": ["Monitor blood sugar regularly"],
-        "donts": ["Avoid sugary and processed foods"],
-        "home_remedies": ["Bitter gourd juice, fenugreek water"]
-    },
-    "Flu": {
-        "causes": ["Influenza virus"],
-        "prevention": ["Flu shot, hygiene"],
-        "dos": ["Rest, hydration, fever control"],
-        "donts": ["Avoid going out while sick"],
-        "home_remedies": ["Warm soups, steam inhalation"]
-    },
-    "Gastroenteritis": {
-        "causes": ["Viral/bacterial infection from contaminated food or water"],
-        "prevention": ["Hand hygiene, clean water"],
-        "dos": ["ORS, hydration, bland diet"],
-        "donts": ["Avoid dairy or oily foods"],
-        "home_remedies": ["Coconut water, ginger tea, banana"]
-    },
-    "Hypertension": {
-        "causes": ["Genetic, lifestyle, stress"],
-        "prevention": ["Exercise, reduce salt"],
-        "dos": ["Monitor BP, take medications regularly"],
-        "donts": ["Avoid salty food and alcohol"],
-        "home_remedies": ["Garlic, hibiscus tea, meditation"]
-    },
-    "Migraine": {
-        "causes": ["Neurological triggers like stress, dehydration, hormones"],
-        "prevention": ["Identify and avoid triggers"],
-        "dos": ["Rest, hydration, pain management"],
-        "donts": ["Avoid caffeine excess and bright lights"],
-        "home_remedies": ["Cold compress, peppermint oil, quiet room"]
-    },
-    "Pneumonia": {
-        "causes": ["Bacterial or viral infection of lungs"],
-        "prevention": ["Vaccination, hygiene"],
-        "dos": ["Rest, antibiotics if prescribed"],
-        "donts": ["Avoid smoking and cold exposure"],
-        "home_remedies": ["Steam, ginger tea, fluids"]
-    },
-    "Tuberculosis": {
-        "causes": ["Mycobacterium tuberculosis infection"],
-        "prevention": ["BCG vaccine, early detection"],
-        "dos": ["Complete TB treatment course"],
-        "donts": ["Avoid stopping meds early"],
-        "home_remedies": ["Nutrient-rich foods, sunlight exposure"]
-    },
-    "Unknown": {
-        "causes": ["Unclear symptom combination"],
-        "prevention": ["General hygiene, healthy habits"],
-        "dos": ["Consult a doctor"],
-        "donts": ["Avoid self-diagnosis"],
-        "home_remedies": ["Rest, fluids, balanced diet"]
+# Lives in disease_info.py so the chatbot can use it without importing TensorFlow
+from predictions.disease_info import DISEASE_INFO
+
+
+def build_features(selected, SYMPTOMS, scaler):
+    """Binary feature row for the selected symptom names, aligned with the scaler."""
+    x = get_extractor(SYMPTOMS).vector(selected)
+    if x.shape[1] > scaler.n_features_in_:
+        x = x[:, :scaler.n_features_in_]
+    elif x.shape[1] < scaler.n_features_in_:
+        pad = np.zeros((1, scaler.n_features_in_ - x.shape[1]), dtype=x.dtype)
+        x = np.concatenate([x, pad], axis=1)
+    return x
+
+
+def run_prediction(selected, user=None):
+    """Predict from symptom names; the per-symptom explanation comes from the same batched call."""
+    model, scaler, label_encoder, SYMPTOMS = load_artifacts()
+    started = time.perf_counter()
+    probs, explanation = explain.predict_with_explanation(model, scaler, SYMPTOMS, selected)
+    latency_ms = (time.perf_counter() - started) * 1000
+    event_log.log_prediction(selected, SYMPTOMS, probs, event_log.model_version(MODEL_H5), latency_ms, user)
+    idx = int(np.argmax(probs))
+    drift.observe(selected, SYMPTOMS, label_encoder.classes_, idx)
+    label = label_encoder.inverse_transform([idx])[0]
+    if shadow.enabled():
+        shadow.submit(get_extractor(SYMPTOMS).vector(selected), label, float(probs[idx]), latency_ms)
+    return {
+        "predicted": label,
+        "confidence": round(float(probs[idx]) * 100, 2),
+        "explanation": explanation,
     }
-}
 
 
 def predict_disease(request):
@@ -219,40 +148,24 @@ def predict_disease(request):
             request.POST.get("symptom4"),
             request.POST.get("symptom5"),
         ]
-        selected = [s for s in raw if s and s.strip() != ""]
+        # ...plus anything described in words ("fever and a dry cough, no rash")
+        description = request.POST.get("description", "").strip()
+        if description:
+            raw += get_extractor(SYMPTOMS).extract(description).symptoms
+        selected = [s for s in raw if s and s.strip() != "" and s in SYMPTOMS]
         selected = list(dict.fromkeys(selected))  # dedupe, preserve order
 
         if len(selected) < 2:
-            messages.error(request, "Please select at least 2 different symptoms.")
-            return render(request, "predictions/predict.html", {"symptoms": SYMPTOMS})
-
-        # Build binary feature vector
-        x = np.zeros((1, len(SYMPTOMS)))
-        for s in selected:
-            if s in SYMPTOMS:
-                x[0, SYMPTOMS.index(s)] = 1
-
-        # Align features if necessary
-        if x.shape[1] > scaler.n_features_in_:
-            x = x[:, :scaler.n_features_in_]
-        elif x.shape[1] < scaler.n_features_in_:
-            pad = np.zeros((1, scaler.n_features_in_ - x.shape[1]))
-            x = np.concatenate([x, pad], axis=1)
-
-        # Predict
-        x_scaled = scaler.transform(x)
-        probs = model.predict(x_scaled)
-        idx = int(np.argmax(probs))
-        label = label_encoder.inverse_transform([idx])[0]
-        confidence = float(np.max(probs))
-
-        info = DISEASE_INFO.get(label, DISEASE_INFO["Unknown"])
+            messages.error(request, "Please select or describe at least 2 different symptoms.")
+            return render(request, "predictions/predict.html", {"symptoms": SYMPTOMS, "description": description})
 
+        result = run_prediction(selected, request.user)
         context = {
-            "predicted": label,
-            "confidence": round(confidence * 100, 2),
+            "predicted": result["predicted"],
+            "confidence": result["confidence"],
             "selected_symptoms": selected,
-            "info": info,
+            "info": DISEASE_INFO.get(result["predicted"], DISEASE_INFO["Unknown"]),
+            "explanation": result["explanation"],
             "symptoms": SYMPTOMS,
         }
         return render(request, "predictions/result.html", context)
@@ -260,6 +173,115 @@ def predict_disease(request):
     return render(request, "predictions/predict.html", {"symptoms": SYMPTOMS})
 
 
+def extract_symptoms_api(request):
+    """
+    JSON: free text → symptoms found, symptoms negated, and the feature vector
+    predict_disease would use. Does not load the Keras model.
+    """
+    text = (request.POST.get("text") if request.method == "POST" else request.GET.get("text")) or ""
+    if not text.strip():
+        return JsonResponse({"error": "Missing 'text'."}, status=400)
+
+    scaler, _label_encoder, symptoms = load_preprocessors()
+    found = get_extractor(symptoms).extract(text[:5000])
+    x = build_features(found.symptoms, symptoms, scaler)
+    return JsonResponse({
+        "symptoms": found.symptoms,
+        "negated": found.negated,
+        "features": x[0].astype(int).tolist(),
+        "feature_names": symptoms[:x.shape[1]],
+    })
+
+
+@csrf_exempt
+def predict_api(request):
+    """
+    JSON prediction with per-symptom contributions:
+
+        POST {"symptoms": ["fever", "cough"], "text": "optional free text"}
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "POST required."}, status=405)
+    try:
+        payload = json.loads(request.body or b"{}") if request.content_type == "application/json" else request.POST
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON."}, status=400)
+
+    _scaler, _label_encoder, SYMPTOMS = load_preprocessors()
+    selected = _as_list(payload.get("symptoms"))
+    if payload.get("text"):
+        selected += get_extractor(SYMPTOMS).extract(str(payload["text"])[:5000]).symptoms
+    selected = list(dict.fromkeys(s for s in selected if s in SYMPTOMS))
+    if len(selected) < 2:
+        return JsonResponse({"error": "At least 2 different symptoms are required."}, status=400)
+
+    result = run_prediction(selected, request.user)
+    result.update({"predicted": str(result["predicted"]), "selected_symptoms": selected})
+    return JsonResponse(result)
+
+
+@login_required
+def drift_report(request):
+    """Staff-only drift metrics for this worker (JSON, or ?format=prometheus)."""
+    if not request.user.is_staff:
+        return JsonResponse({"status": "error", "message": "Not authorized."}, status=403)
+    report = drift.report()
+    if request.GET.get("format") == "prometheus":
+        return HttpResponse(drift.prometheus_metrics(report) if report else "",
+                            content_type="text/plain; version=0.0.4")
+    return JsonResponse({"drift": report})
+
+
+@login_required
+def shadow_report(request):
+    """Staff-only shadow evaluation counters (null when PREDICTION_SHADOW_DIR is unset)."""
+    if not request.user.is_staff:
+        return JsonResponse({"status": "error", "message": "Not authorized."}, status=403)
+    return JsonResponse({"shadow": shadow.stats()})
+
+
+def _as_list(value):
+    if isinstance(value, str):
+        return [v.strip() for v in value.split(",") if v.strip()]
+    return [str(v) for v in value or []]
+
+
+@csrf_exempt
+def triage_api(request):
+    """
+    Interactive triage, one step per call (stateless — the client sends its answers):
+
+        POST {"confirmed": ["fever"], "denied": ["rash"], "text": "optional free text"}
+        → {"questions": [{"symptom": ..., "information_gain": ...}], "predictions": [...], "done": false}
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "POST required."}, status=405)
+    try:
+        payload = json.loads(request.body or b"{}") if request.content_type == "application/json" else request.POST
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON."}, status=400)
+
+    model, scaler, label_encoder, SYMPTOMS = load_artifacts()
+    confirmed = [s for s in _as_list(payload.get("confirmed")) if s in SYMPTOMS]
+    denied = [s for s in _as_list(payload.get("denied")) if s in SYMPTOMS]
+    text = payload.get("text") or ""
+    if text:
+        found = get_extractor(SYMPTOMS).extract(str(text)[:5000])
+        confirmed += found.symptoms
+        denied += found.negated
+    confirmed = list(dict.fromkeys(confirmed))
+    denied = [s for s in dict.fromkeys(denied) if s not in confirmed]
+
+    step = triage.next_questions(
+        model, scaler, label_encoder, SYMPTOMS, confirmed, denied,
+        top_n=getattr(settings, "PREDICTION_TRIAGE_TOP_N", 3),
+        confidence=getattr(settings, "PREDICTION_TRIAGE_CONFIDENCE", 0.8),
+        max_questions=getattr(settings, "PREDICTION_TRIAGE_MAX_QUESTIONS", 8),
+    )
+    step.update({"confirmed": confirmed, "denied": denied})
+    return JsonResponse(step)
+
+
 
 # ==== Manage Health ====
 from analytics.models import HealthRecord
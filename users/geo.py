@@ -0,0 +1,195 @@
+# users/geo.py
+"""
+"Near me" lookups for doctors and pharmacies without sorting every row by distance.
+
+Profiles with a latitude/longitude are bucketed in memory into a grid of
+GEO_GRID_CELL_DEG-degree cells (0.1° ≈ 11 km). A query walks rings of cells
+outward from the caller's cell, computes haversine distances only for the
+points in those cells, and stops as soon as the next ring can't hold
+anything closer than the k-th hit.
+
+Each process builds its index lazily from the database on first use.
+users.signals apply profile saves and deletes to it after commit, and it is
+rebuilt from the database every GEO_INDEX_MAX_AGE seconds so edits made
+through other worker processes show up too. Longitude wrap-around at ±180°
+is not handled.
+"""
+import math
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def parse_point(data, lat_key="lat", lon_key="lon"):
+    """(lat, lon) from a QueryDict / dict, or None if missing or out of range."""
+    try:
+        lat, lon = float(data.get(lat_key, "")), float(data.get(lon_key, ""))
+    except (TypeError, ValueError):
+        return None
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
+        return None
+    return lat, lon
+
+
+class GridIndex:
+    """Fixed-size lat/lon grid: cell -> {key: (lat, lon)}, plus key -> cell for updates."""
+
+    def __init__(self, cell_deg=0.1):
+        self.cell_deg = cell_deg
+        self._cells = defaultdict(dict)
+        self._where = {}
+        self._bounds = None  # (min row, max row, min col, max col); only ever grows
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._where)
+
+    def _cell(self, lat, lon):
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def _discard(self, key):
+        cell = self._where.pop(key, None)
+        if cell is not None:
+            bucket = self._cells[cell]
+            bucket.pop(key, None)
+            if not bucket:
+                del self._cells[cell]
+
+    def upsert(self, key, lat, lon):
+        """Add or move ``key``; a missing coordinate removes it."""
+        with self._lock:
+            self._discard(key)
+            if lat is None or lon is None:
+                return
+            cell = self._cell(lat, lon)
+            self._cells[cell][key] = (lat, lon)
+            self._where[key] = cell
+            r, c = cell
+            if self._bounds is None:
+                self._bounds = (r, r, c, c)
+            else:
+                r0, r1, c0, c1 = self._bounds
+                self._bounds = (min(r0, r), max(r1, r), min(c0, c), max(c1, c))
+
+    def remove(self, key):
+        with self._lock:
+            self._discard(key)
+
+    def _ring_min_km(self, ring, lat):
+        """Lower bound on the distance to any point in cells ``ring`` steps from the caller's cell."""
+        if ring <= 1:
+            return 0.0
+        widest_lat = min(89.0, abs(lat) + ring * self.cell_deg)
+        return (ring - 1) * self.cell_deg * KM_PER_DEGREE * math.cos(math.radians(widest_lat))
+
+    def _ring_cells(self, row, col, ring):
+        if ring == 0:
+            yield row, col
+            return
+        for c in range(col - ring, col + ring + 1):
+            yield row - ring, c
+            yield row + ring, c
+        for r in range(row - ring + 1, row + ring):
+            yield r, col - ring
+            yield r, col + ring
+
+    def nearest(self, lat, lon, k=10, max_km=None):
+        """``[(distance_km, key), ...]`` for the k closest points, nearest first."""
+        with self._lock:
+            if not self._where or k <= 0:
+                return []
+            row, col = self._cell(lat, lon)
+            r0, r1, c0, c1 = self._bounds
+            last_ring = max(abs(row - r0), abs(row - r1), abs(col - c0), abs(col - c1))
+
+            hits = []
+            visited = 0
+            for ring in range(last_ring + 1):
+                floor_km = self._ring_min_km(ring, lat)
+                if max_km is not None and floor_km > max_km:
+                    break
+                if len(hits) >= k:
+                    hits.sort()
+                    if floor_km > hits[k - 1][0]:
+                        break
+                visited += 8 * ring or 1
+                if visited > len(self._cells):
+                    # Sparse grid far from the caller: cheaper to scan every occupied cell once
+                    hits = [(haversine_km(lat, lon, plat, plon), key)
+                            for bucket in self._cells.values() for key, (plat, plon) in bucket.items()]
+                    break
+                for cell in self._ring_cells(row, col, ring):
+                    bucket = self._cells.get(cell)
+                    if bucket:
+                        hits.extend((haversine_km(lat, lon, plat, plon), key) for key, (plat, plon) in bucket.items())
+
+        hits.sort()
+        if max_km is not None:
+            hits = [h for h in hits if h[0] <= max_km]
+        return hits[:k]
+
+
+class ProfileIndex:
+    """A GridIndex built lazily from ``loader()`` rows (key, lat, lon) and refreshed when stale."""
+
+    def __init__(self, loader):
+        self.loader = loader
+        self._grid = None
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def grid(self):
+        max_age = getattr(settings, "GEO_INDEX_MAX_AGE", 300)
+        with self._lock:
+            if self._grid is None or (max_age and time.monotonic() - self._built_at > max_age):
+                grid = GridIndex(getattr(settings, "GEO_GRID_CELL_DEG", 0.1))
+                for key, lat, lon in self.loader():
+                    grid.upsert(key, lat, lon)
+                self._grid, self._built_at = grid, time.monotonic()
+            return self._grid
+
+    def upsert(self, key, lat, lon):
+        if self._grid is not None:  # not built yet: the first query loads it from the DB
+            self._grid.upsert(key, lat, lon)
+
+    def remove(self, key):
+        if self._grid is not None:
+            self._grid.remove(key)
+
+    def nearest(self, lat, lon, k=None, max_km=None):
+        k = k or getattr(settings, "GEO_NEAREST_K", 20)
+        if max_km is None:
+            max_km = getattr(settings, "GEO_NEAREST_MAX_KM", None)
+        return self.grid().nearest(lat, lon, k, max_km)
+
+
+def _doctor_rows():
+    from users.models import DoctorProfile
+
+    return DoctorProfile.objects.filter(
+        user__is_doctor=True, latitude__isnull=False, longitude__isnull=False
+    ).values_list("user_id", "latitude", "longitude").iterator()
+
+
+def _pharmacy_rows():
+    from users.models import PharmacyProfile
+
+    return PharmacyProfile.objects.filter(
+        latitude__isnull=False, longitude__isnull=False
+    ).values_list("id", "latitude", "longitude").iterator()
+
+
+doctors = ProfileIndex(_doctor_rows)        # keyed by doctor user id
+pharmacies = ProfileIndex(_pharmacy_rows)   # keyed by PharmacyProfile id
@@ -0,0 +1,22 @@
+# users/management/commands/rebuild_doctor_search.py
+"""
+Rebuild the doctor search index from the users tables.
+
+    python manage.py rebuild_doctor_search
+
+Needed only after writes that bypass model signals (bulk_create,
+queryset.update, raw SQL, fixtures loaded with --raw data).
+"""
+from django.core.management.base import BaseCommand
+
+from users import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the SQLite FTS5 doctor search index."
+
+    def handle(self, *args, **options):
+        if not search.enabled():
+            self.stdout.write("Doctor search index not in use (not SQLite, or DOCTOR_SEARCH_FTS = False).")
+            return
+        self.stdout.write(self.style.SUCCESS(f"Indexed {search.rebuild()} doctor(s)."))
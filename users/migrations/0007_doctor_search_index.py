@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:40
+# Doctor search: SQLite FTS5 index over doctors (kept in sync by users.signals)
+
+from django.db import OperationalError, migrations
+
+CREATE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS users_doctor_fts USING fts5(
+    username, specialty, address, email,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+BACKFILL = """
+INSERT INTO users_doctor_fts(rowid, username, specialty, address, email)
+SELECT u.id, u.username, COALESCE(p.specialty, ''), COALESCE(p.address, ''), u.email
+FROM users_user u LEFT JOIN users_doctorprofile p ON p.user_id = u.id
+WHERE u.is_doctor
+"""
+
+
+def create_index(apps, schema_editor):
+    # Other databases (and SQLite builds without FTS5) keep the icontains search
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    try:
+        schema_editor.execute(CREATE)
+    except OperationalError:  # no such module: fts5
+        return
+    schema_editor.execute(BACKFILL)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS users_doctor_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_pharmacyprofile_upi_id_pharmacyprofile_upi_qr'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -22,6 +22,9 @@ class DoctorProfile(models.Model):
     specialty = models.CharField(max_length=100, blank=True)
     fees = models.DecimalField(max_digits=7, decimal_places=2, null=True, blank=True)
     address = models.TextField(blank=True, null=True)
+    # Optional clinic location for "near me" search (users.geo)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
 
     def __str__(self):
         return f"{self.user.username} ({self.specialty})"
@@ -36,6 +39,10 @@ class PharmacyProfile(models.Model):   # 🆕 new / already existing – extend
     upi_id = models.CharField(max_length=100, blank=True, null=True)
     upi_qr = models.ImageField(upload_to='upi_qr/', blank=True, null=True)
 
+    # Optional store location for "near me" search (users.geo)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+
     def __str__(self):
         return self.pharmacy_name
 
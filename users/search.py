@@ -0,0 +1,152 @@
+# users/search.py
+"""
+Doctor search backed by an SQLite FTS5 index.
+
+``users_doctor_fts`` (created by migration 0007) holds one row per doctor,
+rowid = user id, with username, specialty, address and email. Signals in
+users.signals keep it in step with User / DoctorProfile saves and deletes;
+bulk writes that skip signals need ``python manage.py rebuild_doctor_search``.
+
+Queries match every word as a prefix ("card ban" → cardiology in Bangalore)
+and are ordered by bm25, with matches in the specialty and username weighted
+above the address. Results come back as a lazy sequence that Paginator
+slices, so only one page of ids is ranked and loaded per request.
+
+On other databases (or DOCTOR_SEARCH_FTS = False), and for queries with no
+words in them, search falls back to the old icontains filter.
+"""
+import re
+
+from django.conf import settings
+from django.db import OperationalError, connection
+from django.db.models import Q
+
+FTS_TABLE = "users_doctor_fts"
+# bm25 column weights, in table column order: username, specialty, address, email
+BM25_WEIGHTS = (2.0, 3.0, 1.0, 0.5)
+
+_available = {}  # database NAME -> index table exists
+
+
+def enabled():
+    if not getattr(settings, "DOCTOR_SEARCH_FTS", True) or connection.vendor != "sqlite":
+        return False
+    name = str(connection.settings_dict["NAME"])
+    if name not in _available:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            _available[name] = cursor.fetchone() is not None
+    return _available[name]
+
+
+def _index_sql(where):
+    from users.models import DoctorProfile, User
+
+    return (
+        f"INSERT INTO {FTS_TABLE}(rowid, username, specialty, address, email) "
+        f"SELECT u.id, u.username, COALESCE(p.specialty, ''), COALESCE(p.address, ''), u.email "
+        f"FROM {User._meta.db_table} u "
+        f"LEFT JOIN {DoctorProfile._meta.db_table} p ON p.user_id = u.id "
+        f"WHERE u.is_doctor {where}"
+    )
+
+
+def index_doctor(user_id):
+    """(Re)index one user; a user who is not (or no longer) a doctor is just removed."""
+    if not enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [user_id])
+        cursor.execute(_index_sql("AND u.id = %s"), [user_id])
+
+
+def remove_doctor(user_id):
+    if not enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [user_id])
+
+
+def rebuild():
+    """Re-create every row from the users tables; returns the number of doctors indexed."""
+    if not enabled():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(_index_sql(""))
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+        cursor.execute(f"SELECT count(*) FROM {FTS_TABLE}")
+        return cursor.fetchone()[0]
+
+
+def match_expression(q):
+    """'Cardio  bang!' -> '"cardio"* "bang"*' (every word, as a prefix); None if no words."""
+    words = re.findall(r"\w+", q.lower())
+    if not words:
+        return None
+    return " ".join(f'"{w}"*' for w in words[:8])
+
+
+class DoctorSearchResults:
+    """
+    Ranked FTS hits as a sequence Paginator understands: ``count()`` runs one
+    COUNT over the index, and slicing ranks just that page and loads its
+    doctors from ``queryset`` (which may carry select_related / annotate).
+    """
+
+    def __init__(self, match, queryset):
+        self.match = match
+        self.queryset = queryset
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [self.match])
+                self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def ranked_ids(self, limit, offset=0):
+        weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+                f"ORDER BY bm25({FTS_TABLE}, {weights}), rowid LIMIT %s OFFSET %s",
+                [self.match, limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start = key.start or 0
+            stop = self.count() if key.stop is None else key.stop
+            ids = self.ranked_ids(max(0, stop - start), start)
+        else:
+            ids = self.ranked_ids(1, key)
+            if not ids:
+                raise IndexError(key)
+        found = self.queryset.in_bulk(ids)
+        page = [found[i] for i in ids if i in found]
+        return page if isinstance(key, slice) else page[0]
+
+
+def search_doctors(q, queryset):
+    """Doctors in ``queryset`` matching ``q``, best first (FTS) or as a filtered queryset (fallback)."""
+    if enabled():
+        match = match_expression(q)
+        if match is not None:
+            try:
+                results = DoctorSearchResults(match, queryset)
+                results.count()
+                return results
+            except OperationalError:  # malformed MATCH despite the quoting; fall through to LIKE
+                pass
+    return queryset.filter(
+        Q(username__icontains=q) |
+        Q(email__icontains=q) |
+        Q(doctorprofile__specialty__icontains=q) |
+        Q(doctorprofile__address__icontains=q)
+    ).distinct()
@@ -0,0 +1,55 @@
+# users/signals.py
+"""
+Keep the doctor search index (users.search) and the in-memory "near me"
+grids (users.geo) in step with User / DoctorProfile / PharmacyProfile writes.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users import geo, search
+from users.models import DoctorProfile, PharmacyProfile, User
+
+# Saves that can't change what is searchable (login bookkeeping)
+_UNINDEXED_FIELDS = {"last_login", "password"}
+
+
+@receiver(post_save, sender=User)
+def index_user(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields and set(update_fields) <= _UNINDEXED_FIELDS):
+        return
+    if instance.is_doctor or not kwargs.get("created"):
+        search.index_doctor(instance.pk)  # also drops users who stopped being doctors
+    if not instance.is_doctor:
+        transaction.on_commit(lambda: geo.doctors.remove(instance.pk))
+
+
+@receiver(post_delete, sender=User)
+def unindex_user(sender, instance, **kwargs):
+    search.remove_doctor(instance.pk)
+
+
+@receiver(post_save, sender=DoctorProfile)
+@receiver(post_delete, sender=DoctorProfile)
+def index_profile(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_doctor(instance.user_id)
+    if kwargs["signal"] is post_delete:
+        transaction.on_commit(lambda: geo.doctors.remove(instance.user_id))
+    else:
+        lat, lon = instance.latitude, instance.longitude
+        transaction.on_commit(lambda: geo.doctors.upsert(instance.user_id, lat, lon))
+
+
+@receiver(post_save, sender=PharmacyProfile)
+def locate_pharmacy(sender, instance, raw=False, **kwargs):
+    if not raw:
+        lat, lon = instance.latitude, instance.longitude
+        transaction.on_commit(lambda: geo.pharmacies.upsert(instance.pk, lat, lon))
+
+
+@receiver(post_delete, sender=PharmacyProfile)
+def unlocate_pharmacy(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: geo.pharmacies.remove(pk))
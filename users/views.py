@@ -7,6 +7,8 @@ from datetime import date
 from pharmacy.models import Order
 from users.models import PharmacyProfile, Medicine  # if not already imported
 from .models import PatientProfile, DoctorProfile
+from . import geo
+from chatbot.memory_store import CONVERSATION_COOKIE
 
 User = get_user_model()
 def home(request):
@@ -66,8 +68,10 @@ def doctor_login(request):
 
 # Logout View
 def user_logout(request):
-    logout(request)
-    return redirect('home')
+    logout(request)  # user_logged_out clears the chatbot's memory (chatbot/signals.py)
+    response = redirect('home')
+    response.delete_cookie(CONVERSATION_COOKIE)  # next user on this browser starts a new conversation
+    return response
 
 # Register Patient
 def register_patient(request):
@@ -186,15 +190,13 @@ def patient_dashboard(request):
     if request.user.is_doctor:
         return redirect('doctor_dashboard')
 
-    from appointments.models import Appointment
+    from appointments.dashboard import dashboard_context
     from .models import PatientProfile
 
-    appointments = Appointment.objects.filter(patient=request.user).order_by('date')
-
     profile = PatientProfile.objects.filter(user=request.user).first()
 
     return render(request, 'patient/dashboard.html', {
-        'appointments': appointments,
+        **dashboard_context(request, 'patient'),  # paginated upcoming / history + status counts
         'profile': profile
     })
 
@@ -226,15 +228,13 @@ def doctor_dashboard(request):
     if not request.user.is_doctor:
         return redirect('patient_dashboard')
 
-    from appointments.models import Appointment
+    from appointments.dashboard import dashboard_context
     from .models import DoctorProfile
 
-    appointments = Appointment.objects.filter(doctor=request.user).order_by('date')
-
     profile = DoctorProfile.objects.filter(user=request.user).first()
 
     return render(request, 'doctor/dashboard.html', {
-        'appointments': appointments,
+        **dashboard_context(request, 'doctor'),  # paginated upcoming / history + status counts
         'profile': profile
     })
 
@@ -340,6 +340,16 @@ def edit_doctor_profile(request):
             profile.fees = None
 
         profile.address = address or ""
+
+        # optional clinic location for "near me"; both blank clears it
+        point = geo.parse_point(request.POST, "latitude", "longitude")
+        if point:
+            profile.latitude, profile.longitude = point
+        elif not (request.POST.get("latitude") or request.POST.get("longitude")):
+            profile.latitude = profile.longitude = None
+        else:
+            messages.warning(request, "Location ignored: latitude/longitude were not valid.")
+
         profile.save()
 
         messages.success(request, "Profile updated successfully.")